@@ -1,7 +1,16 @@
+import os
+import sys
 from pyodk.client import Client
 
+# Shared helpers live next to the tracker
+TRACKER_DIR = os.path.join(os.path.dirname(__file__), 'With_Pygsheets', 'Automatic ODK Submissions Tracker+Email Notification')
+sys.path.append(TRACKER_DIR)
+from http_cache import install_cache
+
 # Initialize Client using ~/.pyodk_config.toml
 client = Client()
+# Repeated runs revalidate the cached forms list and table instead of downloading them again
+cache = install_cache(client)
 
 # Step 1: List available forms in the project
 # Get a list of forms
@@ -15,3 +24,4 @@ if forms:
     print(submissions)
 else:
     print("⚠️ No forms found.")
+print(cache.report())
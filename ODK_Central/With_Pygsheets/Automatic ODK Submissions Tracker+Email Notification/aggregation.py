@@ -0,0 +1,103 @@
+# aggregation.py
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+DAILY_KEYS = ['today', 'submitter']
+VALUE_COLUMNS = ['photo_count', 'duration']
+
+
+@dataclass
+class Rollups:
+    """All the summary tables the tracker publishes, built from one daily grouping."""
+    daily: pd.DataFrame
+    weekly_avg: pd.DataFrame
+    weekly_total: pd.DataFrame
+    submitter_totals: pd.DataFrame
+
+
+def format_hhmmss(seconds) -> np.ndarray:
+    """Formats an array of seconds as h:mm:ss strings without a Python-level loop."""
+    seconds = np.asarray(seconds, dtype=np.int64)
+    hours = (seconds // 3600).astype(str)
+    minutes = np.char.zfill(((seconds % 3600) // 60).astype(str), 2)
+    secs = np.char.zfill((seconds % 60).astype(str), 2)
+    return np.char.add(np.char.add(hours, ':'), np.char.add(np.char.add(minutes, ':'), secs))
+
+
+def week_start(dates: pd.Series) -> pd.Series:
+    """Returns the Monday that starts each date's W-SUN week."""
+    dates = dates.dt.normalize()
+    return dates - pd.to_timedelta(dates.dt.dayofweek, unit='D')
+
+
+def group_daily(df: pd.DataFrame) -> pd.DataFrame:
+    """Sums photo counts and durations per (today, submitter); the result can be combined across chunks."""
+    grouped = df.groupby(DAILY_KEYS, observed=True)[VALUE_COLUMNS].sum()
+    return grouped.astype('int64')
+
+
+def combine_partials(partials: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Merges per-chunk group_daily results into one flat daily table."""
+    partials = list(partials)
+    if not partials:
+        return pd.DataFrame(columns=DAILY_KEYS + VALUE_COLUMNS)
+    return pd.concat(partials).groupby(level=DAILY_KEYS, observed=True).sum().reset_index()
+
+
+def pivot_daily(grouped: pd.DataFrame) -> pd.DataFrame:
+    """Daily table with one <submitter>_count and one <submitter>_duration column per submitter."""
+    if grouped.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name='today'))
+    wide = grouped.set_index(DAILY_KEYS)[VALUE_COLUMNS].unstack('submitter', fill_value=0)
+
+    counts = wide['photo_count'].astype(int)
+    durations = wide['duration']
+    durations = pd.DataFrame(format_hhmmss(durations.to_numpy()).reshape(durations.shape),
+                             index=durations.index, columns=durations.columns)
+
+    counts.columns = [f'{col}_count' for col in counts.columns]
+    durations.columns = [f'{col}_duration' for col in durations.columns]
+    combined = pd.concat([counts, durations], axis=1)
+    return combined.reindex(sorted(combined.columns), axis=1)
+
+
+def weekly_table(grouped: pd.DataFrame) -> pd.DataFrame:
+    """Per (week_start, submitter) photo total and average daily photo count."""
+    weekly = grouped.groupby(['week_start', 'submitter'], observed=True)['photo_count'].agg(['sum', 'mean'])
+    return weekly.rename(columns={'sum': 'photo_count', 'mean': 'avg_photo_count'}).reset_index()
+
+
+def assemble_rollups(grouped: pd.DataFrame, weekly: pd.DataFrame) -> Rollups:
+    """Turns a flat daily table and a flat weekly table into the published summary tables."""
+    grouped = grouped.copy()
+    grouped['submitter'] = grouped['submitter'].astype(str)
+    grouped['today'] = pd.to_datetime(grouped['today'])
+
+    weekly = weekly.copy()
+    weekly['submitter'] = weekly['submitter'].astype(str)
+    weekly['week_start'] = pd.to_datetime(weekly['week_start'])
+    weekly = weekly.set_index(['week_start', 'submitter'])
+    weekly_total = weekly['photo_count'].unstack('submitter', fill_value=0).astype(int)
+    weekly_avg = weekly['avg_photo_count'].unstack('submitter', fill_value=0).round(2)
+
+    totals = grouped.groupby('submitter', observed=True)['photo_count'].sum()
+    submitter_totals = totals.to_frame(name='Total').T
+
+    return Rollups(
+        daily=pivot_daily(grouped),
+        weekly_avg=weekly_avg,
+        weekly_total=weekly_total,
+        submitter_totals=submitter_totals,
+    )
+
+
+def compute_rollups(grouped: pd.DataFrame) -> Rollups:
+    """Builds the daily pivot, weekly averages, weekly totals and per-submitter totals."""
+    grouped = grouped.copy()
+    grouped['submitter'] = grouped['submitter'].astype(str)
+    grouped['today'] = pd.to_datetime(grouped['today'])
+    grouped['week_start'] = week_start(grouped['today'])
+    return assemble_rollups(grouped, weekly_table(grouped))
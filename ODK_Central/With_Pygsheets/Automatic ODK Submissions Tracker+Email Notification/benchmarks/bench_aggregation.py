@@ -0,0 +1,102 @@
+# bench_aggregation.py
+# Compares the shared aggregation module against the per-script groupbys/pivots it replaced.
+# Usage: python benchmarks/bench_aggregation.py --rows 1000000
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from aggregation import compute_rollups, group_daily
+
+
+def synthetic_submissions(rows: int, submitters: int = 12, days: int = 365, seed: int = 42) -> pd.DataFrame:
+    """Builds a flattened submission frame shaped like the tracker's projected fields."""
+    rng = np.random.default_rng(seed)
+    names = np.array([f'is_site_{i:02}' for i in range(submitters)])
+    start = np.datetime64('2024-01-01')
+    return pd.DataFrame({
+        'submitter': pd.Categorical(names[rng.integers(0, submitters, rows)]),
+        'today': start + rng.integers(0, days, rows).astype('timedelta64[D]'),
+        'photo_count': rng.integers(0, 60, rows).astype('int32'),
+        'duration': rng.integers(0, 1800, rows).astype('int32'),
+    })
+
+
+def legacy_rollups(df: pd.DataFrame):
+    """The pre-refactor main.py implementation, kept here as the baseline (DataFrame.applymap is now .map)."""
+    def format_seconds_to_hhmmss(seconds):
+        hours = seconds // 3600
+        minutes = (seconds % 3600) // 60
+        secs = seconds % 60
+        return f'{hours}:{minutes:02}:{secs:02}'
+
+    df = df.astype({'submitter': object})
+    grouped = df.groupby(['today', 'submitter'])[['photo_count', 'duration']].sum().reset_index()
+    pivot_counts = grouped.pivot(index='today', columns='submitter', values='photo_count').fillna(0).astype(int)
+    pivot_duration = grouped.pivot(index='today', columns='submitter', values='duration').fillna(0).astype(int)
+    pivot_duration = pivot_duration.map(format_seconds_to_hhmmss)
+    pivot_counts.columns = [f'{col}_count' for col in pivot_counts.columns]
+    pivot_duration.columns = [f'{col}_duration' for col in pivot_duration.columns]
+    pivot_combined = pd.concat([pivot_counts, pivot_duration], axis=1)
+    pivot_combined = pivot_combined.reindex(sorted(pivot_combined.columns), axis=1)
+
+    grouped['week_start'] = grouped['today'].dt.to_period('W-SUN').apply(lambda r: r.start_time)
+    weekly_avg = grouped.groupby(['week_start', 'submitter'])['photo_count'].mean().reset_index()
+    weekly_avg = weekly_avg.pivot(index='week_start', columns='submitter', values='photo_count').fillna(0).round(2)
+    grouped['week_start'] = grouped['today'].dt.to_period('W-SUN').apply(lambda r: r.start_time)
+    weekly_total = grouped.groupby(['week_start', 'submitter'])['photo_count'].sum().reset_index()
+    weekly_total = weekly_total.pivot(index='week_start', columns='submitter', values='photo_count').fillna(0).astype(int)
+
+    counts = pivot_combined[[col for col in pivot_combined.columns if col.endswith('_count')]].sum()
+    submitter_totals = counts.to_frame(name='Total')
+    submitter_totals.index = [i.replace('_count', '') for i in submitter_totals.index]
+    return pivot_combined, weekly_avg, weekly_total, submitter_totals.T
+
+
+def shared_rollups(df: pd.DataFrame):
+    rollups = compute_rollups(group_daily(df).reset_index())
+    return rollups.daily, rollups.weekly_avg, rollups.weekly_total, rollups.submitter_totals
+
+
+def assert_same_rollups(legacy, shared):
+    """Fails unless the shared tables hold the same values as the legacy ones."""
+    for name, old, new in zip(['daily', 'weekly_avg', 'weekly_total'], legacy, shared):
+        pd.testing.assert_frame_equal(old, new, check_names=False, check_dtype=False,
+                                      check_column_type=False, check_index_type=False, obj=name)
+    assert legacy[3].values.tolist() == shared[3].values.tolist(), "submitter totals differ"
+
+
+def best_of(func, df: pd.DataFrame, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tracker rollups.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_submissions(args.rows)
+    print(f"🧪 {args.rows:,} synthetic submissions, best of {args.repeat} runs")
+
+    legacy_time, legacy = best_of(legacy_rollups, df, args.repeat)
+    shared_time, shared = best_of(shared_rollups, df, args.repeat)
+
+    assert_same_rollups(legacy, shared)
+
+    print(f"• legacy per-script pivots: {legacy_time:.3f}s")
+    print(f"• shared aggregation:       {shared_time:.3f}s")
+    print(f"⚡ Speedup: {legacy_time / shared_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
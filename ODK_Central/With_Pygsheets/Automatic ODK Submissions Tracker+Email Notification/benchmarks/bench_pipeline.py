@@ -0,0 +1,206 @@
+# bench_pipeline.py
+# End-to-end benchmarks against the local mock Central: the tracker pipeline (main.py) and the plot reports.
+# Every size gets its own mock server and every case runs in a fresh process, so peak RSS is per case.
+# Usage: python benchmarks/bench_pipeline.py --sizes 10000,100000,1000000 --json results.json
+#        python benchmarks/bench_pipeline.py --sizes 100000 --baseline results.json --tolerance 0.25
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import importlib.util
+import subprocess
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACKER_DIR = os.path.dirname(BENCH_DIR)
+TASKS_DIR = os.path.normpath(os.path.join(TRACKER_DIR, '..', '..', 'pyodk tasks'))
+sys.path.append(TRACKER_DIR)
+sys.path.append(TASKS_DIR)
+
+CASES = ['main', 'main-incremental', 'plots']
+OPTIONAL_CASES = ['attachments']
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, in MiB (None where the platform does not report it)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2 ** 20
+        except (ImportError, AttributeError):
+            return None
+
+
+def load_task_module(filename: str, name: str):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(TASKS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_main_case(workdir: str) -> int:
+    """collect_summary -> CSV -> sheet diff against an in-memory worksheet, as main() does minus the network."""
+    from pyodk.client import Client
+    from main import FORM_ID, TrackerSettings, collect_summary, save_to_csv, summary_blocks
+    from sheet_sync import FakeSheetBackend, SheetSync
+    from submission_stats import SubmissionStats
+
+    client = Client()
+    settings = TrackerSettings(sheet_name='bench', service_file='', sheet_url='http://localhost/sheet',
+                               output_file=os.path.join(workdir, 'pivoted_photo_summary.csv'),
+                               allowed_submitters=list(SubmissionStats(client, FORM_ID).submitters()),
+                               store_path=os.path.join(workdir, 'submissions_store.db'))
+    with redirect_stdout(open(os.devnull, 'w')):
+        result = collect_summary(client, settings)
+        save_to_csv(result.pivot_combined, settings.output_file)
+        sync = SheetSync(FakeSheetBackend('bench'), cache_path=os.path.join(workdir, 'sheet_cache.json'))
+        sync.publish(summary_blocks(result.pivot_combined, result.weekly_avg, result.weekly_total,
+                                    result.submitter_totals))
+    return int(result.submitter_totals.sum(axis=1).iloc[0])
+
+
+def run_plots_case(workdir: str) -> int:
+    """The Excel plot report plus the per-submitter stats tables behind the Google Sheet report."""
+    from odk_payloads import FORM_ID
+    report = load_task_module('count_unique_plot_Idsto csv.py', 'plot_report')
+    from plot_stats import plot_counts_by_submitter, submitter_plot_stats
+
+    df = report.fetch_plot_frame(FORM_ID)
+    with redirect_stdout(open(os.devnull, 'w')):
+        names = report.analyze_global_stats(df)
+        report.generate_submitter_reports(df, names, os.path.join(workdir, 'submitter_plot_counts.xlsx'))
+        counts = plot_counts_by_submitter(df)
+        submitter_plot_stats(df, counts)
+    return len(df)
+
+
+def run_attachments_case(workdir: str, limit: int = 500) -> int:
+    """Downloads the photo zips of the first `limit` submissions with the shared downloader."""
+    from pyodk.client import Client
+    from odk_payloads import FORM_ID
+    from submission_reader import SubmissionReader
+    downloader_module = load_task_module('attachment_downloader.py', 'attachment_downloader')
+
+    client = Client()
+    reader = SubmissionReader(client, FORM_ID, page_size=limit)
+    records = next(reader.iter_pages(select='__id,__system/submitterName,plot_id,today,photos/photoQuantity,'
+                                            'photos/photoSessionDuration,photos/photoZip'), [])
+    downloader = downloader_module.AttachmentDownloader(client, os.path.join(workdir, 'photos'), FORM_ID)
+    with redirect_stdout(open(os.devnull, 'w')):
+        results = downloader.download_all(downloader_module.attachment_jobs(records))
+    return sum(1 for r in results if r['status'] != 'failed')
+
+
+RUNNERS = {'main': run_main_case, 'main-incremental': run_main_case, 'plots': run_plots_case,
+           'attachments': run_attachments_case}
+
+
+def worker(case: str, workdir: str) -> None:
+    started = time.perf_counter()
+    rows = RUNNERS[case](workdir)
+    seconds = time.perf_counter() - started
+    print(json.dumps({'case': case, 'seconds': round(seconds, 3), 'peak_rss_mb': peak_rss_mb(), 'result': rows}))
+
+
+def start_mock(submissions: int) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'mock_central.py'),
+                                '--submissions', str(submissions)],
+                               stdout=subprocess.PIPE, text=True, cwd=BENCH_DIR)
+    line = process.stdout.readline()
+    if not line.startswith('listening on '):
+        process.kill()
+        raise RuntimeError(f"mock Central failed to start: {line!r}")
+    process.url = line.split()[2]
+    return process
+
+
+def write_pyodk_config(directory: str, url: str) -> Dict[str, str]:
+    """Points pyodk (via PYODK_CONFIG_FILE/PYODK_CACHE_FILE) at the mock server for the worker processes."""
+    config_path = os.path.join(directory, 'pyodk_config.toml')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(f'[central]\nbase_url = "{url}"\nusername = "bench@example.org"\n'
+                f'password = "bench"\ndefault_project_id = 1\n')
+    return dict(os.environ, PYODK_CONFIG_FILE=config_path, PYODK_CACHE_FILE=os.path.join(directory, 'pyodk_cache.toml'))
+
+
+def run_size(submissions: int, cases: List[str]) -> List[Dict]:
+    mock = start_mock(submissions)
+    workdir = tempfile.mkdtemp(prefix=f'odk-bench-{submissions}-')
+    results = []
+    try:
+        env = write_pyodk_config(workdir, mock.url)
+        for case in cases:
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', case, '--workdir', workdir],
+                                       env=env, capture_output=True, text=True, cwd=TRACKER_DIR)
+            if completed.returncode != 0:
+                print(completed.stderr, file=sys.stderr)
+                raise RuntimeError(f"benchmark case '{case}' failed at {submissions:,} submissions")
+            result = dict(json.loads(completed.stdout.strip().splitlines()[-1]), submissions=submissions)
+            rss = f"{result['peak_rss_mb']:.0f} MiB" if result['peak_rss_mb'] is not None else 'n/a'
+            print(f"• {case:<17} {submissions:>9,}  {result['seconds']:>8.2f}s  {rss:>9}")
+            results.append(result)
+    finally:
+        mock.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> List[str]:
+    """Lists cases that got slower or bigger than the baseline by more than tolerance."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['case'], r['submissions']): r for r in json.load(f)}
+    regressions = []
+    for result in results:
+        before = baseline.get((result['case'], result['submissions']))
+        if not before:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            if before.get(metric) and result.get(metric) and result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{result['case']} @ {result['submissions']:,}: {metric} "
+                                   f"{before[metric]:.2f} -> {result[metric]:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tracker pipeline and plot reports against a mock Central.")
+    parser.add_argument('--sizes', default='10000,100000,1000000', help="Comma-separated submission counts")
+    parser.add_argument('--cases', default=','.join(CASES), help=f"Any of {', '.join(CASES + OPTIONAL_CASES)}")
+    parser.add_argument('--json', help="Write the results to this file")
+    parser.add_argument('--baseline', help="Results file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown/growth before flagging")
+    parser.add_argument('--worker', choices=sorted(RUNNERS), help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args.worker, args.workdir)
+
+    cases = [case.strip() for case in args.cases.split(',') if case.strip()]
+    print(f"🧪 {'case':<17} {'submissions':>9}  {'wall':>9}  {'peak RSS':>9}")
+    results = []
+    for size in (int(s) for s in args.sizes.split(',')):
+        results.extend(run_size(size, cases))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results saved to {args.json}")
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+# mock_central.py
+# Local stand-in for the ODK Central endpoints the scripts use, serving a SyntheticForm.
+# Usage: python benchmarks/mock_central.py --submissions 100000 --port 8383
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import dataclasses
+from datetime import datetime, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+from odk_payloads import FORM_ID, SyntheticForm, attachment_zip
+
+PROJECT_ID = 1
+CREATED_AT = '2024-01-01T00:00:00.000Z'
+_TOKEN = re.compile(r"\(|\)|'[^']*'|[^\s()]+")
+_OPS = {'eq': np.equal, 'ne': np.not_equal, 'gt': np.greater, 'ge': np.greater_equal,
+        'lt': np.less, 'le': np.less_equal}
+
+
+class FilterParser:
+    """Evaluates the OData $filter subset the scripts send (comparisons on __system fields joined by
+    and/or, with parentheses) as numpy masks over the whole form at once."""
+
+    def __init__(self, form: SyntheticForm, text: str):
+        self.form = form
+        self.tokens = _TOKEN.findall(text)
+        self.pos = 0
+
+    def _next(self) -> str:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def parse(self) -> np.ndarray:
+        mask = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected token {self._peek()!r} in $filter")
+        return mask
+
+    def _or(self) -> np.ndarray:
+        mask = self._and()
+        while self._peek() == 'or':
+            self._next()
+            mask = mask | self._and()
+        return mask
+
+    def _and(self) -> np.ndarray:
+        mask = self._factor()
+        while self._peek() == 'and':
+            self._next()
+            mask = mask & self._factor()
+        return mask
+
+    def _factor(self) -> np.ndarray:
+        if self._peek() == '(':
+            self._next()
+            mask = self._or()
+            if self._next() != ')':
+                raise ValueError("Unbalanced parentheses in $filter")
+            return mask
+        field, op, value = self._next(), self._next(), self._next()
+        return self._compare(field, op, value)
+
+    def _compare(self, field: str, op: str, value: str) -> np.ndarray:
+        if field in ('__system/submissionDate', '__system/updatedAt'):
+            column = self.form.submitted if field.endswith('submissionDate') else self.form.updated
+            if value == 'null':
+                return np.isnat(column) if op == 'eq' else ~np.isnat(column)
+            target = np.datetime64(value.rstrip('Z').replace('+00:00', ''), 'ms')
+            return _OPS[op](column, target) & ~np.isnat(column)
+        if field == '__system/submitterId':
+            return _OPS[op](self.form.submitter_idx.astype('int64') + 100, int(value.strip("'")))
+        raise ValueError(f"Unsupported $filter field {field}")
+
+
+def project(record: Dict, paths: List[str]) -> Dict:
+    """Applies a $select list of slash paths to one record."""
+    selected: Dict = {}
+    for path in paths:
+        parts = path.split('/')
+        source, target = record, selected
+        for part in parts[:-1]:
+            source = source.get(part) or {}
+            target = target.setdefault(part, {})
+        target[parts[-1]] = source.get(parts[-1])
+    return selected
+
+
+class MockCentral:
+    def __init__(self, form: SyntheticForm):
+        self.form = form
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.matches = lru_cache(maxsize=64)(self._matches)
+
+    def _matches(self, odata_filter: Optional[str]) -> np.ndarray:
+        if not odata_filter:
+            return np.arange(len(self.form))
+        return np.flatnonzero(FilterParser(self.form, odata_filter).parse())
+
+    def submissions(self, query: Dict[str, str]) -> Dict:
+        indices = self.matches(query.get('$filter'))
+        skip = int(query.get('$skip', 0))
+        top = int(query.get('$top', len(indices)))
+        records = self.form.records(indices[skip:skip + top])
+        if '$select' in query:
+            records = [project(record, query['$select'].split(',')) for record in records]
+        payload = {'@odata.context': f"/v1/projects/{PROJECT_ID}/forms/{FORM_ID}.svc/$metadata#Submissions",
+                   'value': records}
+        if query.get('$count') == 'true':
+            payload['@odata.count'] = int(len(indices))
+        return payload
+
+    def forms(self) -> List[Dict]:
+        return [{
+            'projectId': PROJECT_ID, 'xmlFormId': FORM_ID, 'name': FORM_ID, 'version': '2024061201',
+            'enketoId': 'bench', 'hash': hashlib.md5(FORM_ID.encode()).hexdigest(), 'state': 'open',
+            'keyId': None, 'createdAt': CREATED_AT, 'updatedAt': None, 'publishedAt': CREATED_AT,
+            'submissions': len(self.form),
+        }]
+
+    def submitters(self) -> List[Dict]:
+        return [{'id': self.form.submitter_id(i), 'displayName': name, 'type': 'user', 'createdAt': CREATED_AT}
+                for i, name in enumerate(self.form.submitters)]
+
+
+def make_handler(central: MockCentral):
+    prefix = f"/v1/projects/{PROJECT_ID}/forms"
+    routes = [
+        (re.compile(rf"^{prefix}/(?P<form>[^/]+)\.svc/Submissions$"), 'odata'),
+        (re.compile(rf"^{prefix}/(?P<form>[^/]+)/submissions/submitters$"), 'submitters'),
+        (re.compile(rf"^{prefix}/(?P<form>[^/]+)/submissions/(?P<instance>[^/]+)/attachments/(?P<name>[^/]+)$"),
+         'attachment'),
+        (re.compile(rf"^{prefix}$"), 'forms'),
+        (re.compile(r"^/v1/users/current$"), 'user'),
+    ]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes = b'', content_type: str = 'application/json',
+                  headers: Optional[Dict[str, str]] = None) -> None:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            if body and self.command != 'HEAD':
+                self.wfile.write(body)
+
+        def _json(self, payload) -> None:
+            body = json.dumps(payload, separators=(',', ':')).encode()
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, headers={'ETag': etag})
+            else:
+                self._send(200, body, headers={'ETag': etag})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.path.startswith('/v1/sessions'):
+                self._json({'token': 'bench-token', 'createdAt': CREATED_AT,
+                            'expiresAt': datetime(2999, 1, 1, tzinfo=timezone.utc).isoformat()})
+            else:
+                self._send(404, b'{"message":"not found"}')
+
+        def do_GET(self):
+            with central._lock:
+                central.requests += 1
+            url = urlsplit(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            for pattern, name in routes:
+                match = pattern.match(url.path)
+                if match:
+                    break
+            else:
+                return self._send(404, b'{"message":"not found"}')
+
+            try:
+                if 'form' in match.groupdict() and unquote(match['form']) != FORM_ID:
+                    return self._send(404, b'{"message":"form not found"}')
+                if name == 'odata':
+                    return self._json(central.submissions(query))
+                if name == 'forms':
+                    return self._json(central.forms())
+                if name == 'submitters':
+                    return self._json(central.submitters())
+                if name == 'user':
+                    return self._json({'id': 1, 'type': 'user', 'displayName': 'bench', 'email': 'bench@example.org',
+                                       'createdAt': CREATED_AT})
+                return self._attachment(match)
+            except ValueError as e:
+                self._send(400, json.dumps({'message': str(e)}).encode())
+
+        def _attachment(self, match) -> None:
+            form = central.form
+            i = form.index_of(unquote(match['instance']))
+            if i >= len(form) or unquote(match['name']) != form.zip_name(i):
+                return self._send(404, b'{"message":"attachment not found"}')
+            body = attachment_zip(form, i)
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            range_header = self.headers.get('Range')
+            if range_header:
+                start = int(range_header.split('=')[1].split('-')[0])
+                if start >= len(body):
+                    return self._send(416, headers={'Content-Range': f'bytes */{len(body)}'})
+                return self._send(206, body[start:], 'application/zip',
+                                  {'Content-Range': f'bytes {start}-{len(body) - 1}/{len(body)}', 'ETag': etag})
+            self._send(200, body, 'application/zip', {'ETag': etag})
+
+    return Handler
+
+
+def serve(submissions: int, port: int = 0, seed: int = 42) -> Tuple[ThreadingHTTPServer, MockCentral]:
+    """Starts the mock server on a background thread and returns it with its state."""
+    central = MockCentral(SyntheticForm.generate(submissions, seed=seed))
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(central))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-central', daemon=True).start()
+    return server, central
+
+
+class LocalCentral:
+    """serve() plus a pyodk Client pointed at it, with the config and token cache kept in directory."""
+
+    def __init__(self, submissions: int, directory: str, seed: int = 42):
+        from pyodk.client import Client
+
+        self.server, self.central = serve(submissions, seed=seed)
+        config_path = os.path.join(directory, 'pyodk_config.toml')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write(f'[central]\nbase_url = "http://127.0.0.1:{self.server.server_port}"\n'
+                    f'username = "test@example.org"\npassword = "test"\ndefault_project_id = {PROJECT_ID}\n')
+        self.client = Client(config_path=config_path, cache_path=os.path.join(directory, 'pyodk_cache.toml'))
+
+    @property
+    def form(self) -> SyntheticForm:
+        return self.central.form
+
+    def edit(self, i: int, **changes) -> None:
+        """Edits submission i like a review on Central would: new column values and a fresh updatedAt."""
+        form = self.central.form
+        for name, value in changes.items():
+            getattr(form, name)[i] = value
+        form.updated[i] = max(form.submitted.max(), np.nanmax(form.updated)) + np.timedelta64(1, 's')
+        self.central.matches.cache_clear()
+
+    def delete_newest(self, n: int) -> None:
+        """Deletes the n most recently submitted submissions."""
+        form = self.central.form
+        arrays = {f.name: getattr(form, f.name)[:-n] for f in dataclasses.fields(form)
+                  if isinstance(getattr(form, f.name), np.ndarray)}
+        self.central.form = dataclasses.replace(form, **arrays)
+        self.central.matches.cache_clear()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic ODK Central submissions on localhost.")
+    parser.add_argument('--submissions', type=int, default=10_000)
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    server, central = serve(args.submissions, args.port, args.seed)
+    # the benchmark runner reads this line to find the port
+    print(f"listening on http://127.0.0.1:{server.server_port} with {len(central.form):,} submissions", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
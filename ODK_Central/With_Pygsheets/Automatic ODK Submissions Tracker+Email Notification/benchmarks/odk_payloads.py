@@ -0,0 +1,124 @@
+# odk_payloads.py
+# Deterministic synthetic 'Image Safari Crop Scout (Phone Approach)' submissions for benchmarks.
+# Columns are generated up front with numpy; the nested OData records are only built when a page is served.
+import io
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+FORM_ID = 'Image Safari Crop Scout (Phone Approach)'
+ZIP_PHOTOS = 3
+PHOTO_BYTES = 16 * 1024
+
+
+def _iso(stamp: np.datetime64) -> str:
+    return f"{np.datetime_as_string(stamp, unit='ms')}Z"
+
+
+@dataclass
+class SyntheticForm:
+    """Column arrays describing n submissions, ordered by submission date like Central returns them."""
+    seed: int
+    submitters: List[str]
+    submitter_idx: np.ndarray
+    plot_idx: np.ndarray
+    today: np.ndarray
+    submitted: np.ndarray
+    updated: np.ndarray
+    photo_quantity: np.ndarray
+    duration: np.ndarray
+
+    @classmethod
+    def generate(cls, n: int, submitters: int = 12, plots: int = 5000, days: int = 180, seed: int = 42,
+                 edited_fraction: float = 0.02) -> 'SyntheticForm':
+        rng = np.random.default_rng(seed)
+        start = np.datetime64('2024-01-01T06:00:00.000')
+        offsets = np.sort(rng.integers(0, days * 86_400_000, n)).astype('timedelta64[ms]')
+        submitted = start + offsets
+        # most forms are sent the day they are filled in, some a day or two later
+        lag = rng.choice([0, 0, 0, 0, 1, 2], n).astype('timedelta64[D]')
+        today = submitted.astype('datetime64[D]') - lag
+
+        updated = np.full(n, np.datetime64('NaT'), dtype='datetime64[ms]')
+        edited = rng.random(n) < edited_fraction
+        updated[edited] = submitted[edited] + rng.integers(60_000, 7 * 86_400_000, edited.sum()).astype('timedelta64[ms]')
+
+        # a few busy plots get revisited far more often than the rest
+        plot_weights = rng.pareto(1.5, plots) + 1
+        return cls(
+            seed=seed,
+            submitters=[f'is_site_{i:02}' for i in range(submitters)],
+            submitter_idx=rng.integers(0, submitters, n).astype('int16'),
+            plot_idx=rng.choice(plots, n, p=plot_weights / plot_weights.sum()).astype('int32'),
+            today=today,
+            submitted=submitted,
+            updated=updated,
+            photo_quantity=rng.integers(0, 60, n).astype('int16'),
+            duration=rng.integers(30, 1800, n).astype('int32'),
+        )
+
+    def __len__(self) -> int:
+        return len(self.submitted)
+
+    def submitter_id(self, idx: int) -> int:
+        return 100 + idx
+
+    def instance_id(self, i: int) -> str:
+        return f"uuid:{self.seed:08x}-{i >> 32 & 0xffff:04x}-4{i >> 16 & 0xfff:03x}-8{i & 0xfff:03x}-{i:012x}"
+
+    def zip_name(self, i: int) -> str:
+        return f"photos_{i:09d}.zip"
+
+    def record(self, i: int) -> Dict:
+        """The OData representation of submission i, shaped like Central's Submissions feed."""
+        instance_id = self.instance_id(i)
+        submitter = int(self.submitter_idx[i])
+        quantity = int(self.photo_quantity[i])
+        updated = self.updated[i]
+        return {
+            '__id': instance_id,
+            'start': f"{self.today[i]}T07:58:12.000+03:00",
+            'end': f"{self.today[i]}T08:{int(self.duration[i]) // 60 % 60:02}:40.000+03:00",
+            'today': str(self.today[i]),
+            'deviceid': f"collect:{submitter:04d}bench",
+            'plot_id': f"PLT-{int(self.plot_idx[i]):05d}",
+            'crop_stage': ('vegetative', 'flowering', 'maturity')[i % 3],
+            'photos': {
+                'photoQuantity': quantity,
+                'photoSessionDuration': int(self.duration[i]),
+                'photoZip': self.zip_name(i) if quantity else None,
+            },
+            'meta': {'instanceID': instance_id},
+            '__system': {
+                'submissionDate': _iso(self.submitted[i]),
+                'updatedAt': None if np.isnat(updated) else _iso(updated),
+                'submitterId': str(self.submitter_id(submitter)),
+                'submitterName': self.submitters[submitter],
+                'attachmentsPresent': 1 if quantity else 0,
+                'attachmentsExpected': 1 if quantity else 0,
+                'status': None,
+                'reviewState': None,
+                'deviceId': f"collect:{submitter:04d}bench",
+                'edits': 0 if np.isnat(updated) else 1,
+                'formVersion': '2024061201',
+            },
+        }
+
+    def records(self, indices: Sequence[int]) -> List[Dict]:
+        return [self.record(int(i)) for i in indices]
+
+    def index_of(self, instance_id: str) -> int:
+        return int(instance_id.rsplit('-', 1)[1], 16)
+
+
+def attachment_zip(form: SyntheticForm, i: int) -> bytes:
+    """A photo zip for submission i: photo_quantity capped JPEG-like entries, deterministic per submission."""
+    rng = np.random.default_rng([form.seed, i])
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for k in range(min(int(form.photo_quantity[i]), ZIP_PHOTOS)):
+            body = rng.integers(0, 256, PHOTO_BYTES, dtype=np.uint8).tobytes()
+            archive.writestr(f"IMG_{i:09d}_{k}.jpg", b'\xff\xd8\xff\xe0\x00\x10JFIF\x00' + body + b'\xff\xd9')
+    return buffer.getvalue()
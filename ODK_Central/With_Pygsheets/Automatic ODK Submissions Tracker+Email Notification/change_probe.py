@@ -0,0 +1,102 @@
+# change_probe.py
+import os
+import json
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from pyodk.client import Client
+
+from submission_stats import SubmissionStats
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), 'output_files')
+PROBE_STATE_PATH = os.path.join(OUTPUT_DIR, 'change_probe.json')
+SKIP_LOG_PATH = os.path.join(OUTPUT_DIR, 'skipped_runs.jsonl')
+
+_state_lock = threading.Lock()
+
+
+def newer_than_filter(watermark: str) -> str:
+    """$filter for submissions created or edited strictly after the watermark."""
+    return f"__system/submissionDate gt {watermark} or __system/updatedAt gt {watermark}"
+
+
+@dataclass
+class ProbeResult:
+    form_id: str
+    total: int
+    newer: int
+    watermark: Optional[str]
+    changed: bool
+    reason: str
+
+
+class ChangeProbe:
+    """Tells whether a form changed since its summary was last published, using two $count requests.
+
+    The fingerprint of a published summary is the form's submission count plus the watermark
+    (latest submissionDate/updatedAt) of the data it was built from. A different count catches new
+    and deleted submissions; a count of submissions newer than the watermark catches edits.
+
+    Fingerprints are kept per project, form and target (where the summary is published), so the
+    same xmlFormId in two projects, or one form published to two tabs, never skips the other's changes.
+    """
+
+    def __init__(self, client: Client, form_id: str, project_id: Optional[int] = None,
+                 state_path: str = PROBE_STATE_PATH, log_path: str = SKIP_LOG_PATH, target: Optional[str] = None):
+        self.form_id = form_id
+        self.stats = SubmissionStats(client, form_id, project_id)
+        self.project_id = self.stats.project_id
+        self.target = target
+        self.key = f"{self.project_id}/{form_id}" + (f"#{target}" if target else '')
+        self.state_path = state_path
+        self.log_path = log_path
+
+    def _load_state(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def last_published(self) -> Optional[Dict]:
+        with _state_lock:
+            return self._load_state().get(self.key)
+
+    def check(self) -> ProbeResult:
+        published = self.last_published()
+        total = self.stats.count_matching()
+        if not published:
+            return ProbeResult(self.form_id, total, total, None, True, "no previous publish")
+
+        watermark = published.get('watermark')
+        if total != published['total']:
+            return ProbeResult(self.form_id, total, 0, watermark, True,
+                               f"submission count changed from {published['total']} to {total}")
+        newer = self.stats.count_matching(newer_than_filter(watermark)) if watermark else total
+        if newer:
+            return ProbeResult(self.form_id, total, newer, watermark, True,
+                               f"{newer} submission(s) created or edited since {watermark}")
+        return ProbeResult(self.form_id, total, 0, watermark, False, "no changes since the last publish")
+
+    def mark_published(self, probe: ProbeResult, watermark: Optional[str]) -> None:
+        """Stores the fingerprint of a successful publish; call it only once every stage succeeded."""
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with _state_lock:
+            state = self._load_state()
+            state[self.key] = {
+                'total': probe.total,
+                'watermark': watermark,
+                'published_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+
+    def record_skip(self, probe: ProbeResult, job: str) -> None:
+        """Appends a skipped run to the skip log."""
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        entry = dict(asdict(probe), project_id=self.project_id, target=self.target, job=job, skipped_at=datetime.now().isoformat(timespec='seconds'))
+        with _state_lock, open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
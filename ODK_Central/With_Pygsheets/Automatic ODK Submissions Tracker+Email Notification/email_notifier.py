@@ -1,8 +1,10 @@
 # email_notifier.py
 import os
 import smtplib
+from dataclasses import dataclass
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -12,24 +14,74 @@ load_dotenv()
 SENDER_EMAIL = os.getenv("EMAIL_ADDRESS")
 SENDER_PASSWORD = os.getenv("EMAIL_PASSWORD")
 
-def send_email(subject: str, body: str, to_email: str):
-    if not SENDER_EMAIL or not SENDER_PASSWORD:
-        raise ValueError("⚠️ EMAIL_ADDRESS and EMAIL_PASSWORD must be set in the .env file")
 
-    recipients = [email.strip() for email in to_email.split(",")]
+@dataclass(frozen=True)
+class SmtpConfig:
+    """SMTP server settings; SMTP_HOST/SMTP_PORT/SMTP_STARTTLS point the notifier at a local test server."""
+    sender: str
+    password: Optional[str]
+    host: str = 'smtp.gmail.com'
+    port: int = 587
+    starttls: bool = True
+    timeout: float = 30
 
+    @classmethod
+    def from_env(cls) -> 'SmtpConfig':
+        sender = os.getenv("EMAIL_ADDRESS", SENDER_EMAIL)
+        password = os.getenv("EMAIL_PASSWORD", SENDER_PASSWORD)
+        host = os.getenv("SMTP_HOST", 'smtp.gmail.com')
+        if not sender or (not password and host == 'smtp.gmail.com'):
+            raise ValueError("⚠️ EMAIL_ADDRESS and EMAIL_PASSWORD must be set in the .env file")
+        return cls(sender=sender, password=password or None, host=host,
+                   port=int(os.getenv("SMTP_PORT", 587)),
+                   starttls=os.getenv("SMTP_STARTTLS", '1').lower() not in ('0', 'false', 'no'))
+
+
+def parse_recipients(to_email: str) -> List[str]:
+    return [email.strip() for email in to_email.split(",") if email.strip()]
+
+
+def build_message(subject: str, body: str, recipients: List[str], sender: str) -> MIMEMultipart:
     msg = MIMEMultipart()
-    msg['From'] = SENDER_EMAIL
+    msg['From'] = sender
     msg['To'] = ", ".join(recipients)
     msg['Subject'] = subject
 
     msg.attach(MIMEText(body, 'plain'))
+    return msg
+
 
+def connect(config: SmtpConfig) -> smtplib.SMTP:
+    """Opens an SMTP connection, upgraded to TLS and logged in when the config asks for it."""
+    server = smtplib.SMTP(config.host, config.port, timeout=config.timeout)
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
+        if config.starttls:
             server.starttls()
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            server.send_message(msg)
-        print(f"📨 Email sent to: {', '.join(recipients)}")
-    except Exception as e:
-        print(f"❌ Failed to send email: {e}")
+        if config.password:
+            server.login(config.sender, config.password)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def send_email(subject: str, body: str, to_email: str, outbox=None) -> bool:
+    """Sends an email right away through the outbox and returns whether it went out.
+
+    A failed send is not dropped: it stays in the outbox with its error and is retried with backoff
+    by the next drain (the tracker daemon's sender, or python email_outbox.py).
+    """
+    from email_outbox import EmailOutbox, OutboxSender  # email_outbox builds on this module
+
+    config = SmtpConfig.from_env()
+    owned = outbox is None
+    outbox = outbox or EmailOutbox()
+    sender = OutboxSender(outbox, config)
+    try:
+        message_id = outbox.enqueue(subject, body, to_email)
+        sender.drain()
+        return outbox.status(message_id) == 'sent'
+    finally:
+        sender.disconnect()
+        if owned:
+            outbox.close()
@@ -0,0 +1,226 @@
+# email_outbox.py
+import os
+import json
+import time
+import sqlite3
+import smtplib
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from email_notifier import SmtpConfig, build_message, connect, parse_recipients
+
+DEFAULT_OUTBOX_PATH = os.path.join(os.path.dirname(__file__), 'output_files', 'email_outbox.db')
+
+
+@dataclass
+class OutboxMessage:
+    id: int
+    subject: str
+    body: str
+    recipients: List[str]
+    attempts: int
+
+
+class EmailOutbox:
+    """Persistent SQLite queue of outgoing emails, so reports survive SMTP outages and restarts.
+
+    Messages enqueued with the same coalesce_key replace each other while still pending: only the
+    newest summary is sent once the server is reachable again.
+    """
+
+    def __init__(self, path: str = DEFAULT_OUTBOX_PATH, max_attempts: int = 8,
+                 backoff_seconds: float = 30, max_backoff_seconds: float = 3600):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                coalesce_key TEXT,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                recipients TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at TEXT NOT NULL,
+                sent_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+        """)
+
+    def enqueue(self, subject: str, body: str, to_email: str, coalesce_key: Optional[str] = None) -> int:
+        """Adds a message to the queue, superseding pending messages with the same coalesce_key."""
+        recipients = json.dumps(parse_recipients(to_email))
+        with self._lock, self.conn:
+            if coalesce_key is not None:
+                self.conn.execute("UPDATE outbox SET status = 'superseded' WHERE status = 'pending' "
+                                  "AND coalesce_key = ? AND recipients = ?", (coalesce_key, recipients))
+            cursor = self.conn.execute(
+                'INSERT INTO outbox (coalesce_key, subject, body, recipients, next_attempt_at, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (coalesce_key, subject, body, recipients, time.time(), datetime.now().isoformat(timespec='seconds')),
+            )
+        return cursor.lastrowid
+
+    def due(self, limit: int = 50) -> List[OutboxMessage]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, subject, body, recipients, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        return [OutboxMessage(i, subject, body, json.loads(recipients), attempts)
+                for i, subject, body, recipients, attempts in rows]
+
+    def seconds_until_next(self) -> Optional[float]:
+        """Seconds until the next pending message is due (0 if one is due now), None when idle."""
+        with self._lock:
+            row = self.conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def mark_sent(self, message_id: int) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE outbox SET status = 'sent', attempts = attempts + 1, sent_at = ? WHERE id = ?",
+                              (datetime.now().isoformat(timespec='seconds'), message_id))
+
+    def mark_failed_attempt(self, message: OutboxMessage, error: str) -> str:
+        """Schedules a retry with exponential backoff, or gives up after max_attempts. Returns the new status."""
+        attempts = message.attempts + 1
+        status = 'failed' if attempts >= self.max_attempts else 'pending'
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (attempts - 1))
+        with self._lock, self.conn:
+            self.conn.execute('UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? '
+                              'WHERE id = ?', (status, attempts, time.time() + delay, error, message.id))
+        return status
+
+    def status(self, message_id: int) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute('SELECT status FROM outbox WHERE id = ?', (message_id,)).fetchone()
+        return row[0] if row else None
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self.conn.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall())
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class OutboxSender:
+    """Background thread that drains the outbox over one reused, authenticated SMTP connection.
+
+    The connection stays open between batches until it has been idle for idle_seconds. A failed send
+    drops the connection and stops the batch; the message is retried after its backoff.
+    """
+
+    def __init__(self, outbox: EmailOutbox, config: Optional[SmtpConfig] = None,
+                 poll_seconds: float = 30, idle_seconds: float = 60, batch_size: int = 50):
+        self.outbox = outbox
+        self.config = config or SmtpConfig.from_env()
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self.batch_size = batch_size
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def queue(self, subject: str, body: str, to_email: str, coalesce_key: Optional[str] = None) -> int:
+        message_id = self.outbox.enqueue(subject, body, to_email, coalesce_key)
+        print(f"📬 Email queued for: {to_email}")
+        self._wake.set()
+        return message_id
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_seconds:
+            self.disconnect()
+        if self._server is None:
+            self._server = connect(self.config)
+        return self._server
+
+    def disconnect(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+
+    def drain(self) -> int:
+        """Sends every message that is due. Returns the number sent."""
+        sent = 0
+        while True:
+            batch = self.outbox.due(self.batch_size)
+            if not batch:
+                return sent
+            for message in batch:
+                try:
+                    self._connection().send_message(
+                        build_message(message.subject, message.body, message.recipients, self.config.sender))
+                except Exception as e:
+                    self.disconnect()
+                    status = self.outbox.mark_failed_attempt(message, str(e))
+                    print(f"❌ Failed to send email '{message.subject}' (attempt {message.attempts + 1}, {status}): {e}")
+                    return sent
+                self._last_used = time.monotonic()
+                self.outbox.mark_sent(message.id)
+                sent += 1
+                print(f"📨 Email sent to: {', '.join(message.recipients)}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            self.drain()
+            if self._server is not None and time.monotonic() - self._last_used > self.idle_seconds:
+                self.disconnect()
+            next_due = self.outbox.seconds_until_next()
+            self._wake.wait(self.poll_seconds if next_due is None else min(self.poll_seconds, next_due))
+        self.drain()
+        self.disconnect()
+
+    def start(self) -> 'OutboxSender':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 30) -> None:
+        """Stops the sender after a last drain; anything still pending stays queued on disk."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_default_sender: Optional[OutboxSender] = None
+_default_lock = threading.Lock()
+
+
+def default_sender() -> OutboxSender:
+    """Process-wide sender over the default outbox, started on first use."""
+    global _default_sender
+    with _default_lock:
+        if _default_sender is None:
+            _default_sender = OutboxSender(EmailOutbox()).start()
+        return _default_sender
+
+
+def queue_email(subject: str, body: str, to_email: str, coalesce_key: Optional[str] = None) -> int:
+    """Non-blocking replacement for send_email: the message is persisted and sent in the background."""
+    return default_sender().queue(subject, body, to_email, coalesce_key)
+
+
+if __name__ == "__main__":
+    sender = OutboxSender(EmailOutbox())
+    print(f"📤 Sent {sender.drain()} queued email(s); outbox now: {sender.outbox.counts()}")
+    sender.disconnect()
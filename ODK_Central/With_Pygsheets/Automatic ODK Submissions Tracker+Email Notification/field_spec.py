@@ -0,0 +1,103 @@
+# field_spec.py
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Sequence
+
+import pandas as pd
+
+from typed_frames import narrow_integers
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """One submission field: where it lives in the OData record and the column it becomes."""
+    column: str
+    path: str
+    dtype: str = 'string'  # 'int' picks the smallest integer dtype that holds the values
+    default: Any = None
+
+    @property
+    def parts(self) -> List[str]:
+        return self.path.split('/')
+
+
+TRACKER_FIELDS = [
+    FieldSpec('instance_id', '__id'),
+    FieldSpec('submitter', '__system/submitterName', 'category', default='unknown'),
+    FieldSpec('today', 'today', 'datetime'),
+    FieldSpec('photo_count', 'photos/photoQuantity', 'int', default=0),
+    FieldSpec('duration', 'photos/photoSessionDuration', 'int', default=0),
+]
+
+PLOT_FIELDS = [
+    FieldSpec('submitter', '__system/submitterName', 'category'),
+    FieldSpec('plot_id', 'plot_id', 'category'),
+]
+
+# Needed by the local sync store to track its watermark
+SYNC_FIELDS = [
+    FieldSpec('submission_date', '__system/submissionDate'),
+    FieldSpec('updated_at', '__system/updatedAt'),
+]
+
+# Columns kept in the local warehouse; submitter, today and plot_id are also indexed there
+WAREHOUSE_FIELDS = TRACKER_FIELDS + [FieldSpec('plot_id', 'plot_id')] + SYNC_FIELDS
+
+
+def remap_fields(specs: Sequence[FieldSpec], paths: Dict[str, str]) -> List[FieldSpec]:
+    """The specs with some columns read from other OData paths, for forms that name their fields differently."""
+    unknown = set(paths) - {spec.column for spec in specs}
+    if unknown:
+        raise ValueError(f"Unknown field column(s): {', '.join(sorted(unknown))}")
+    return [replace(spec, path=paths.get(spec.column, spec.path)) for spec in specs]
+
+
+def select_clause(specs: Sequence[FieldSpec]) -> str:
+    """Builds the OData $select value that asks Central only for the given fields."""
+    paths = ['__id'] + [spec.path for spec in specs]
+    return ','.join(dict.fromkeys(paths))
+
+
+def _extract(records: Sequence[Dict], parts: List[str]) -> List[Any]:
+    if len(parts) == 1:
+        key = parts[0]
+        return [record.get(key) for record in records]
+    if len(parts) == 2:
+        outer, inner = parts
+        return [(record.get(outer) or {}).get(inner) for record in records]
+
+    values = []
+    for record in records:
+        value = record
+        for part in parts:
+            value = value.get(part) if isinstance(value, dict) else None
+        values.append(value)
+    return values
+
+
+def _typed(values: List[Any], spec: FieldSpec) -> pd.Series:
+    series = pd.Series(values, dtype=object)
+    if spec.dtype == 'category':
+        if spec.default is not None:
+            series = series.fillna(spec.default)
+        return series.astype('category')
+    if spec.dtype == 'int':
+        return narrow_integers(series, spec.default or 0)
+    if spec.dtype.startswith('int'):
+        return pd.to_numeric(series, errors='coerce').fillna(spec.default or 0).astype(spec.dtype)
+    if spec.dtype == 'datetime':
+        return pd.to_datetime(series, errors='coerce')
+    if spec.default is not None:
+        series = series.fillna(spec.default)
+    return series
+
+
+def project_frame(records: Sequence[Dict], specs: Sequence[FieldSpec]) -> pd.DataFrame:
+    """Flattens only the requested paths of the records straight into typed columns."""
+    return pd.DataFrame({spec.column: _typed(_extract(records, spec.parts), spec) for spec in specs})
+
+
+def normalized_frame(records: Sequence[Dict], specs: Sequence[FieldSpec]) -> pd.DataFrame:
+    """The same columns as pd.json_normalize builds them, untyped: what project_frame is measured against."""
+    flat = pd.json_normalize(records, sep='/')
+    missing = pd.Series([None] * len(flat), dtype=object)
+    return pd.DataFrame({spec.column: flat[spec.path] if spec.path in flat else missing for spec in specs})
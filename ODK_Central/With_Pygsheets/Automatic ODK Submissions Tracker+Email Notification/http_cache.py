@@ -0,0 +1,270 @@
+# http_cache.py
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'output_files', 'http_cache.db')
+# stores between eviction passes, so the size scan is not paid on every response
+EVICT_EVERY = 50
+# pyodk's own request timeout and retries, used when the adapter being replaced has none
+DEFAULT_TIMEOUT = 120
+DEFAULT_RETRIES = Retry(total=3, backoff_factor=2, status_forcelist=(429, 500, 502, 503, 504))
+
+# requests has already decoded the body, so these would describe the wire format, not what we store
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+
+class HttpCache:
+    """On-disk store of GET responses keyed by the full URL (path and query).
+
+    Responses younger than max_age are served without touching the network; older ones are
+    revalidated with If-None-Match/If-Modified-Since. Entries not refreshed for ttl seconds are dropped,
+    and the least recently used ones go once the bodies exceed max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_age: float = 0, ttl: float = 7 * 24 * 3600,
+                 max_bytes: int = 512 * 1024 * 1024):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_age = max_age
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evictions': 0, 'bytes_saved': 0}
+        self._stores = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_access ON responses (last_access);
+        """)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute('SELECT status, headers, body, stored_at FROM responses WHERE url = ?',
+                                    (url,)).fetchone()
+        if row is None:
+            return None
+        status, headers, body, stored_at = row
+        if time.time() - stored_at > self.ttl:
+            self.delete(url)
+            return None
+        return {'status': status, 'headers': json.loads(headers), 'body': body, 'stored_at': stored_at}
+
+    def store(self, url: str, response: requests.Response) -> None:
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        body = response.content
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              (url, response.status_code, json.dumps(headers), body, len(body), now, now))
+            self._stores += 1
+            due = self._stores % EVICT_EVERY == 1
+        if due:
+            self.evict()
+
+    def touch(self, url: str, revalidated: bool = False) -> None:
+        now = time.time()
+        column = 'stored_at = ?, last_access = ?' if revalidated else 'last_access = ?'
+        params = (now, now, url) if revalidated else (now, url)
+        with self._lock, self.conn:
+            self.conn.execute(f'UPDATE responses SET {column} WHERE url = ?', params)
+
+    def delete(self, url: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+
+    def evict(self) -> int:
+        """Drops expired entries, then the least recently used ones until the cache fits in max_bytes."""
+        evicted = 0
+        with self._lock, self.conn:
+            evicted += self.conn.execute('DELETE FROM responses WHERE stored_at < ?',
+                                         (time.time() - self.ttl,)).rowcount
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total > self.max_bytes:
+                for url, size in self.conn.execute('SELECT url, size FROM responses ORDER BY last_access').fetchall():
+                    self.conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                    evicted += 1
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self.stats['evictions'] += evicted
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM responses')
+
+    def count(self, stat: str, nbytes: int = 0) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+            self.stats['bytes_saved'] += nbytes
+
+    def hit_ratio(self) -> float:
+        served = self.stats['hits'] + self.stats['revalidated']
+        total = served + self.stats['misses']
+        return served / total if total else 0.0
+
+    def report(self) -> str:
+        s = self.stats
+        return (f"🗄️ HTTP cache: {s['hits']} hits, {s['revalidated']} revalidated (304), {s['misses']} misses, "
+                f"{s['evictions']} evicted, {s['bytes_saved'] / 1024:.0f} KiB not downloaded "
+                f"({self.hit_ratio():.0%} served from cache)")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def cacheable(url: str) -> bool:
+    """Whether a GET is worth caching: everything but OData submission pages.
+
+    Paged reads ($skip, $skiptoken) and filtered reads (watermark syncs) of .svc/Submissions
+    ask for a different URL nearly every run, so storing them is pure write overhead. $top=0
+    count probes and unfiltered whole-form reads repeat, and are kept.
+    """
+    parts = urlsplit(url)
+    if '.svc/Submissions' not in parts.path:
+        return True
+    query = parse_qs(parts.query)
+    if query.get('$top') == ['0']:
+        return True
+    return not any(key in query for key in ('$skip', '$skiptoken', '$filter'))
+
+
+def _cached_response(request: requests.PreparedRequest, entry: Dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.reason = 'OK'
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response._content = entry['body']
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.from_cache = True
+    return response
+
+
+class PoolAdapter(HTTPAdapter):
+    """HTTPAdapter with a default timeout for requests sent without one, as pyodk's session adapter has.
+
+    Built on requests' public adapter rather than pyodk's private one, so a pyodk upgrade cannot
+    break the pool resizing.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, blocksize: Optional[int] = None, **kwargs):
+        self.timeout = timeout
+        self.blocksize = blocksize
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.blocksize is not None:
+            kwargs.setdefault('blocksize', self.blocksize)
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class CachingAdapter(BaseAdapter):
+    """Transport adapter that answers GETs from an HttpCache and forwards everything else.
+
+    It wraps the adapter that was mounted before it, so that adapter's timeout, retries and pool
+    size apply to everything it forwards; mount_pool() keeps pyodk's timeout and retries when it
+    resizes the pool. Streamed and Range requests (attachment downloads) and OData submission
+    pages (see cacheable()) bypass it.
+    """
+
+    def __init__(self, cache: HttpCache, inner: BaseAdapter):
+        super().__init__()
+        self.cache = cache
+        self.inner = inner
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs) -> requests.Response:
+        if request.method != 'GET' or stream or 'Range' in request.headers or not cacheable(request.url):
+            return self.inner.send(request, stream=stream, **kwargs)
+
+        entry = self.cache.lookup(request.url)
+        if entry is not None and time.time() - entry['stored_at'] <= self.cache.max_age:
+            self.cache.touch(request.url)
+            self.cache.count('hits', len(entry['body']))
+            return _cached_response(request, entry)
+
+        if entry is not None:
+            # the caller's request stays as it was built; only the copy sent on carries the validators
+            request = request.copy()
+            headers = CaseInsensitiveDict(entry['headers'])
+            if 'ETag' in headers:
+                request.headers['If-None-Match'] = headers['ETag']
+            if 'Last-Modified' in headers:
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+        response = self.inner.send(request, stream=stream, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(request.url, revalidated=True)
+            self.cache.count('revalidated', len(entry['body']))
+            return _cached_response(request, entry)
+
+        self.cache.count('misses')
+        if response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', ''):
+            self.cache.store(request.url, response)
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def install_cache(client, cache: Optional[HttpCache] = None) -> HttpCache:
+    """Routes the client's Central requests through an on-disk cache and returns it.
+
+    ODK_CACHE_MAX_AGE (seconds, default 0: always revalidate) sets how long responses are reused
+    without asking Central.
+    """
+    cache = cache or HttpCache(max_age=float(os.getenv('ODK_CACHE_MAX_AGE', 0)))
+    base_url = client.config.central.base_url.rstrip('/')
+    current = client.session.get_adapter(base_url)
+    if isinstance(current, CachingAdapter):
+        current = current.inner
+    client.session.mount(base_url, CachingAdapter(cache, current))
+    return cache
+
+
+def mount_pool(session, base_url: str, pool_size: int) -> None:
+    """Mounts a connection pool of pool_size for base_url, keeping a cache installed on the session.
+
+    The new adapter is a PoolAdapter with the timeout and retries of the one it replaces (pyodk's
+    defaults if that one has none), so worker threads still give up on stalled sockets and retry
+    429 and 5xx responses.
+    """
+    current = session.get_adapter(base_url)
+    cache = current.cache if isinstance(current, CachingAdapter) else None
+    inner = current.inner if cache is not None else current
+    retries = inner.max_retries if isinstance(inner, HTTPAdapter) and inner.max_retries.total else DEFAULT_RETRIES
+    adapter = PoolAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries,
+                          timeout=getattr(inner, 'timeout', DEFAULT_TIMEOUT),
+                          blocksize=getattr(inner, 'blocksize', None) or getattr(session, 'blocksize', None))
+    session.mount(base_url, CachingAdapter(cache, adapter) if cache is not None else adapter)
+
+
+def installed_cache(client) -> Optional[HttpCache]:
+    """The cache installed on the client's session, if any."""
+    adapter = client.session.get_adapter(client.config.central.base_url.rstrip('/'))
+    return adapter.cache if isinstance(adapter, CachingAdapter) else None
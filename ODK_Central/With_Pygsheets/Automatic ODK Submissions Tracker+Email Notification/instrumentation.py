@@ -0,0 +1,164 @@
+# instrumentation.py
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+METRICS_DIR = os.getenv('TRACKER_METRICS_DIR', os.path.join(os.path.dirname(__file__), 'output_files', 'metrics'))
+RUNS_LOG_NAME = 'tracker_runs.jsonl'
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident memory of this process, or None where it cannot be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss
+        except ImportError:
+            return None
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    seconds: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+    status: str = 'ok'
+
+
+class RunMetrics:
+    """Per-stage wall time, rows, bytes transferred and peak memory of one tracker run.
+
+    Peak memory is the highest process RSS sampled while the stage ran, so stages that overlap in
+    time (the daemon's concurrent publish) share their peaks. finish() appends the run to a JSON
+    lines log and rewrites a Prometheus textfile for the job.
+    """
+
+    def __init__(self, job: str = 'main', metrics_dir: str = METRICS_DIR, sample_interval: float = 0.05):
+        self.job = job
+        self.metrics_dir = metrics_dir
+        self.sample_interval = sample_interval
+        self.started_at = datetime.now()
+        self.stages: List[StageMetrics] = []
+        self.status = 'running'
+        self.seconds = 0.0
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._active: List[StageMetrics] = []
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name='metrics-rss', daemon=True)
+        self._sampler.start()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            self._record_rss()
+
+    def _record_rss(self) -> None:
+        rss = current_rss_bytes()
+        if rss is None:
+            return
+        with self._lock:
+            for stage in self._active:
+                stage.peak_rss_bytes = max(stage.peak_rss_bytes or 0, rss)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Times a block; set .rows and .bytes on the yielded object to record them."""
+        stage = StageMetrics(name)
+        with self._lock:
+            self.stages.append(stage)
+            self._active.append(stage)
+        self._record_rss()
+        started = time.perf_counter()
+        try:
+            yield stage
+        except BaseException:
+            stage.status = 'error'
+            raise
+        finally:
+            stage.seconds = round(time.perf_counter() - started, 3)
+            self._record_rss()
+            with self._lock:
+                self._active.remove(stage)
+
+    def to_dict(self) -> dict:
+        return {
+            'job': self.job,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'status': self.status,
+            'seconds': self.seconds,
+            'peak_rss_bytes': max((s.peak_rss_bytes or 0 for s in self.stages), default=0) or None,
+            'stages': [asdict(stage) for stage in self.stages],
+        }
+
+    def prometheus_text(self) -> str:
+        labels = f'job="{self.job}"'
+        lines = [
+            '# HELP odk_tracker_run_seconds Wall time of the last tracker run.',
+            '# TYPE odk_tracker_run_seconds gauge',
+            f'odk_tracker_run_seconds{{{labels}}} {self.seconds}',
+            '# HELP odk_tracker_run_success Whether the last tracker run finished without errors (skipped runs count).',
+            '# TYPE odk_tracker_run_success gauge',
+            f'odk_tracker_run_success{{{labels}}} {0 if self.status == "error" else 1}',
+            '# HELP odk_tracker_run_timestamp_seconds When the last tracker run started.',
+            '# TYPE odk_tracker_run_timestamp_seconds gauge',
+            f'odk_tracker_run_timestamp_seconds{{{labels}}} {self.started_at.timestamp():.0f}',
+        ]
+        for metric, attribute, help_text in [
+            ('odk_tracker_stage_seconds', 'seconds', 'Wall time of each stage of the last run.'),
+            ('odk_tracker_stage_rows', 'rows', 'Rows handled by each stage of the last run.'),
+            ('odk_tracker_stage_bytes', 'bytes', 'Bytes transferred by each stage of the last run.'),
+            ('odk_tracker_stage_peak_rss_bytes', 'peak_rss_bytes', 'Peak process RSS during each stage of the last run.'),
+        ]:
+            samples = [(stage.name, getattr(stage, attribute)) for stage in self.stages
+                       if getattr(stage, attribute) is not None]
+            if samples:
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} gauge']
+                lines += [f'{metric}{{{labels},stage="{name}"}} {value}' for name, value in samples]
+        return '\n'.join(lines) + '\n'
+
+    def finish(self, status: str = 'ok') -> dict:
+        """Stops sampling and writes the run to the JSON lines log and the job's Prometheus textfile."""
+        self._stop.set()
+        self.seconds = round(time.perf_counter() - self._started, 3)
+        self.status = 'error' if any(s.status == 'error' for s in self.stages) else status
+        record = self.to_dict()
+
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        with open(os.path.join(self.metrics_dir, RUNS_LOG_NAME), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        prom_path = os.path.join(self.metrics_dir, f'tracker_{self.job}.prom')
+        # written then renamed so the node_exporter textfile collector never reads half a file
+        with open(prom_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(prom_path + '.tmp', prom_path)
+        return record
+
+    def footer(self) -> str:
+        """Plain-text stage table for the bottom of the summary email."""
+        lines = ["⏱️ Run metrics:"]
+        for stage in self.stages:
+            details = [f"{stage.seconds:.2f}s"]
+            if stage.rows is not None:
+                details.append(f"{stage.rows:,} rows")
+            if stage.bytes is not None:
+                details.append(f"{stage.bytes / 1024:,.0f} KiB")
+            if stage.peak_rss_bytes is not None:
+                details.append(f"peak {stage.peak_rss_bytes / 2 ** 20:,.0f} MiB")
+            lines.append(f"• {stage.name}: {', '.join(details)}")
+        lines.append(f"• total so far: {time.perf_counter() - self._started:.2f}s")
+        return "\n".join(lines)
+
+
+def measure(metrics: Optional[RunMetrics], name: str):
+    """metrics.stage(name), or a throwaway stage when the caller is not collecting metrics."""
+    return metrics.stage(name) if metrics is not None else nullcontext(StageMetrics(name))
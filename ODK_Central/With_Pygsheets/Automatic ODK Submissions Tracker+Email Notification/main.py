@@ -1,117 +1,185 @@
 import os
+import time
+import argparse
 import pandas as pd
-import pygsheets
 from pyodk.client import Client
 from dotenv import load_dotenv
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
+from sync_store import DEFAULT_STORE_PATH, SubmissionStore, WatermarkPass
+from submission_reader import SubmissionReader
+from submission_stats import SubmissionStats
+from field_spec import SYNC_FIELDS, TRACKER_FIELDS, FieldSpec, project_frame, select_clause
+from aggregation import assemble_rollups
+from rollup_store import RollupStore
+from sheet_sync import PygsheetsBackend, SheetSync, open_worksheet
+from change_probe import ChangeProbe
+from http_cache import install_cache, installed_cache
+from instrumentation import RunMetrics, measure
+
+FORM_ID = 'Image Safari Crop Scout (Phone Approach)'
+
+class DeadlineExceeded(Exception):
+    pass
+
+def check_deadline(deadline_at: Optional[float], stage: str) -> None:
+    """Raises DeadlineExceeded once time.monotonic() has passed deadline_at (None: no deadline)."""
+    if deadline_at is not None and time.monotonic() > deadline_at:
+        raise DeadlineExceeded(f"deadline passed before {stage}")
+
+@dataclass
+class TrackerSettings:
+    sheet_name: str
+    service_file: str
+    sheet_url: str
+    output_file: str
+    allowed_submitters: List[str]
+    store_path: str = DEFAULT_STORE_PATH
+    metrics_footer: bool = False
+    form_id: str = FORM_ID
+    project_id: Optional[int] = None
+    fields: List[FieldSpec] = field(default_factory=lambda: list(TRACKER_FIELDS))
+    worksheet_title: str = 'Summary'
+
+    @property
+    def publish_target(self) -> str:
+        """Where the summary is published; keys the change probe's fingerprint together with the form."""
+        return f"{self.sheet_name}!{self.worksheet_title}"
+
+@dataclass
+class TrackerResult:
+    pivot_combined: pd.DataFrame
+    weekly_avg: pd.DataFrame
+    weekly_total: pd.DataFrame
+    submitter_totals: pd.DataFrame
+    summary: str
+    watermark: Optional[str] = None
 
 def load_environment():
     load_dotenv()
     return os.getenv("SHEETNAME")
 
-def initialize_odk_client() -> Client:
-    return Client()
-
-def format_seconds_to_hhmmss(seconds: int) -> str:
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-    return f'{hours}:{minutes:02}:{secs:02}'
-
-def calculate_weekly_average(df: pd.DataFrame) -> pd.DataFrame:
-    df['week_start'] = df['today'].dt.to_period('W-SUN').apply(lambda r: r.start_time)
-    weekly_avg = df.groupby(['week_start', 'submitter'])['photo_count'].mean().reset_index()
-    return weekly_avg.pivot(index='week_start', columns='submitter', values='photo_count').fillna(0).round(2)
-
-def calculate_weekly_total(df: pd.DataFrame) -> pd.DataFrame:
-    df['week_start'] = df['today'].dt.to_period('W-SUN').apply(lambda r: r.start_time)
-    weekly_total = df.groupby(['week_start', 'submitter'])['photo_count'].sum().reset_index()
-    return weekly_total.pivot(index='week_start', columns='submitter', values='photo_count').fillna(0).astype(int)
-
-def calculate_submitter_totals(pivot_df: pd.DataFrame) -> pd.DataFrame:
-    counts = pivot_df[[col for col in pivot_df.columns if col.endswith('_count')]].sum()
-    submitter_totals = counts.to_frame(name='Total')
-    submitter_totals.index = [i.replace('_count', '') for i in submitter_totals.index]
-    return submitter_totals.T
-
-def fetch_and_process_data(client: Client, allowed_submitters: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    data = client.submissions.get_table(form_id='Image Safari Crop Scout (Phone Approach)')
-    records = data['value']
-    df = pd.json_normalize(records)
-
-    df['submitter'] = df['__system.submitterName'].fillna('unknown')
-    df = df[df['submitter'].isin(allowed_submitters)]
-
-    df['photo_count'] = df['photos.photoQuantity'].fillna(0).astype(int)
-    df['duration'] = df['photos.photoSessionDuration'].fillna(0).astype(int)
-    df['today'] = pd.to_datetime(df['today'])
-
-    grouped = df.groupby(['today', 'submitter'])[['photo_count', 'duration']].sum().reset_index()
-    pivot_counts = grouped.pivot(index='today', columns='submitter', values='photo_count').fillna(0).astype(int)
-    pivot_duration = grouped.pivot(index='today', columns='submitter', values='duration').fillna(0).astype(int)
-
-    pivot_duration = pivot_duration.applymap(format_seconds_to_hhmmss)
-    pivot_counts.columns = [f'{col}_count' for col in pivot_counts.columns]
-    pivot_duration.columns = [f'{col}_duration' for col in pivot_duration.columns]
-
-    pivot_combined = pd.concat([pivot_counts, pivot_duration], axis=1)
-    pivot_combined = pivot_combined.reindex(sorted(pivot_combined.columns), axis=1)
-
-    weekly_avg = calculate_weekly_average(grouped)
-    weekly_total = calculate_weekly_total(grouped)
-    submitter_totals = calculate_submitter_totals(pivot_combined)
+def load_settings() -> TrackerSettings:
+    sheet_name = load_environment()
+    allowed_submitters = os.getenv('ALLOWED_SUBMITTERS_LIST', '')
+    return TrackerSettings(
+        sheet_name=sheet_name,
+        service_file=os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE'),
+        sheet_url=os.getenv("SHEET_URL"),
+        output_file=os.path.join(os.path.dirname(__file__), 'output_files', 'pivoted_photo_summary5.csv'),
+        # only these submitters are tracked; an empty list leaves every submission out
+        allowed_submitters=[s.strip() for s in allowed_submitters.split(',') if s.strip()],
+        metrics_footer=os.getenv('EMAIL_METRICS_FOOTER', '').lower() in ('1', 'true', 'yes'),
+    )
 
-    return pivot_combined.sort_index(ascending=False), weekly_avg, weekly_total, submitter_totals
+def initialize_odk_client() -> Client:
+    client = Client()
+    install_cache(client)
+    return client
+
+def sync_submissions(client: Client, store: SubmissionStore, rollups: RollupStore, full_resync: bool = False,
+                     reader: Optional[SubmissionReader] = None, form_id: str = FORM_ID,
+                     fields: Sequence[FieldSpec] = TRACKER_FIELDS, project_id: Optional[int] = None,
+                     deadline_at: Optional[float] = None) -> int:
+    if full_resync:
+        print("♻️ Full resync requested, rebuilding the local submission store...")
+        store.reset(form_id)
+        rollups.reset(form_id)
+    elif not rollups.has_data(form_id) and store.count(form_id):
+        print("🧱 Building rollups from the local submission store...")
+        rollups.rebuild(form_id, (project_frame(batch, fields) for batch in store.iter_records(form_id)))
+
+    sync_pass = WatermarkPass(store.get_watermark(form_id))
+    reader = reader or SubmissionReader(client, form_id, project_id)
+    fetched = 0
+    select = select_clause(list(fields) + SYNC_FIELDS)
+    for page in reader.iter_pages(odata_filter=sync_pass.odata_filter(), select=select):
+        check_deadline(deadline_at, f"storing page {reader.pages_read}")
+        fetched += store.upsert(form_id, page)
+        sync_pass.see_records(page)
+        rollups.apply_delta(form_id, project_frame(page, fields))
+    # a pass that resumes after a crash can refetch only records already stored, and still has to advance
+    if sync_pass.watermark != sync_pass.start:
+        store.set_watermark(form_id, sync_pass.watermark)
+
+    since = f"since {sync_pass.start}" if sync_pass.start else "(full download)"
+    print(f"🔄 Synced {fetched} new/edited submissions {since} in {reader.pages_read} page(s), "
+          f"{reader.bytes_read / 1024:.0f} KiB; {store.count(form_id)} stored locally.")
+    check_deadline(deadline_at, "reconciling deletions")
+    reconcile_deletions(client, store, rollups, form_id, project_id, reader)
+    return fetched
+
+def reconcile_deletions(client: Client, store: SubmissionStore, rollups: RollupStore, form_id: str = FORM_ID,
+                        project_id: Optional[int] = None, reader: Optional[SubmissionReader] = None) -> int:
+    """Drops submissions deleted on Central from the store and the rollups; returns how many.
+
+    The incremental $filter never returns deleted submissions, so after a sync the form's $count is
+    compared with the store. Only when Central holds fewer are the live instance ids listed.
+    """
+    reader = reader or SubmissionReader(client, form_id, project_id)
+    total = SubmissionStats(client, form_id, project_id, session=reader.session).count_matching()
+    if store.count(form_id) <= total:
+        return 0
+    live = {record['__id'] for record in reader.iter_records(select='__id')}
+    deleted = [instance_id for instance_id in store.instance_ids(form_id) if instance_id not in live]
+    store.delete(form_id, deleted)
+    rollups.remove(form_id, deleted)
+    print(f"🗑️ Removed {len(deleted)} submission(s) deleted on Central from the local store.")
+    return len(deleted)
+
+def fetch_and_process_data(client: Client, allowed_submitters: List[str], store: SubmissionStore,
+                           rollups: RollupStore, full_resync: bool = False, metrics: Optional[RunMetrics] = None,
+                           form_id: str = FORM_ID, fields: Sequence[FieldSpec] = TRACKER_FIELDS,
+                           project_id: Optional[int] = None, deadline_at: Optional[float] = None
+                           ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    reader = SubmissionReader(client, form_id, project_id)
+    with measure(metrics, 'fetch') as stage:
+        stage.rows = sync_submissions(client, store, rollups, full_resync, reader, form_id, fields, project_id,
+                                      deadline_at)
+        stage.bytes = reader.bytes_read
+
+    with measure(metrics, 'aggregate') as stage:
+        daily, weekly = rollups.load(form_id, allowed_submitters)
+        tables = assemble_rollups(daily, weekly)
+        stage.rows = len(daily)
+
+    return tables.daily.sort_index(ascending=False), tables.weekly_avg, tables.weekly_total, tables.submitter_totals
 
 def save_to_csv(df: pd.DataFrame, output_path: str) -> None:
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     df.to_csv(output_path)
     print(f"Pivoted photo summary with durations saved to: {output_path}")
 
+def summary_blocks(df: pd.DataFrame, weekly_avg: pd.DataFrame, weekly_total: pd.DataFrame,
+                   totals: pd.DataFrame) -> list:
+    return [
+        ('A1', '📅 Daily Photo Summary'),
+        ('A2', df.reset_index()),
+        ('L1', '📊 Weekly Averages Table'),
+        ('L2', weekly_avg.reset_index()),
+        ('H1', '🧮 Weekly Totals Table'),
+        ('H2', weekly_total.reset_index()),
+        ('P1', '🔢 Totals Summary per Center'),
+        ('P2', totals.reset_index()),
+    ]
+
 def update_google_sheet(df: pd.DataFrame, sheet_name: str, service_file: str,
                         weekly_avg: pd.DataFrame, weekly_total: pd.DataFrame,
-                        totals: pd.DataFrame) -> None:
-    gc = pygsheets.authorize(service_file=service_file)
-    spreadsheet = gc.open(sheet_name)
-    worksheet = spreadsheet.worksheet_by_title('Summary')
-
-    worksheet.clear(start='A1')
-
-    worksheet.update_value('A1', '📅 Daily Photo Summary')
-    worksheet.set_dataframe(df.reset_index(), start='A2')
-
-    worksheet.update_value('L1', '📊 Weekly Averages Table')
-    worksheet.set_dataframe(weekly_avg.reset_index(), start='L2')
-
-    worksheet.update_value('H1', '🧮 Weekly Totals Table')
-    worksheet.set_dataframe(weekly_total.reset_index(), start='H2')
-
-    worksheet.update_value('P1', '🔢 Totals Summary per Center')
-    worksheet.set_dataframe(totals.reset_index(), start='P2')
+                        totals: pd.DataFrame, worksheet_title: str = 'Summary') -> int:
+    worksheet = open_worksheet(service_file, sheet_name, worksheet_title)
+    sync = SheetSync(PygsheetsBackend(worksheet))
 
-    print("✅ Google Sheets updated with all pivot tables and summaries.")
+    changed = sync.publish(summary_blocks(df, weekly_avg, weekly_total, totals))
 
+    print(f"✅ Google Sheets updated with all pivot tables and summaries ({changed} changed cells).")
+    return changed
 
 
-def main() -> str:
-    sheet_name = load_environment()
-    service_file = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE')
-    output_file = os.path.join(os.path.dirname(__file__), 'output_files', 'pivoted_photo_summary5.csv')
-    sheet_url = os.getenv("SHEET_URL")
-
-    allowed_submitters = os.getenv('ALLOWED_SUBMITTERS_LIST', '')
-    allowed_submitters = [s.strip() for s in allowed_submitters.split(',') if s.strip()]
-
-    print(f"📋 Working on sheet: {sheet_name}")
-
-    client = initialize_odk_client()
-    pivot_combined, weekly_avg, weekly_total, submitter_totals = fetch_and_process_data(client, allowed_submitters)
-
-    print(pivot_combined)
-    save_to_csv(pivot_combined, output_file)
-    update_google_sheet(pivot_combined, sheet_name, service_file, weekly_avg, weekly_total, submitter_totals)
 
+def build_summary_text(pivot_combined: pd.DataFrame, weekly_total: pd.DataFrame, sheet_url: str) -> str:
+    if pivot_combined.empty:
+        return f"No submissions from the tracked submitters yet.\n🔗 {sheet_url}"
     summary_lines = ["📸 Total Image Count Summary:\n"]
     for col in pivot_combined.columns:
         if col.endswith('_count'):
@@ -131,6 +199,88 @@ def main() -> str:
     summary_text = "\n".join(summary_lines)
     return f"{summary_text}\n\n✅ Summary updated and saved at:🔗 {sheet_url}"
 
-
-# if __name__ == "__main__":
-#     main()
+def collect_summary(client: Client, settings: TrackerSettings, full_resync: bool = False,
+                    metrics: Optional[RunMetrics] = None, deadline_at: Optional[float] = None) -> TrackerResult:
+    """Fetch stage: syncs submissions, updates the rollups and renders the tables and email text.
+
+    With deadline_at (a time.monotonic() value) the sync stops with DeadlineExceeded between pages.
+    """
+    store = SubmissionStore(settings.store_path)
+    rollups = RollupStore(store.path)
+    try:
+        pivot_combined, weekly_avg, weekly_total, submitter_totals = fetch_and_process_data(
+            client, settings.allowed_submitters, store, rollups, full_resync, metrics,
+            settings.form_id, settings.fields, settings.project_id, deadline_at)
+        watermark = store.get_watermark(settings.form_id)
+    finally:
+        rollups.close()
+        store.close()
+
+    summary = build_summary_text(pivot_combined, weekly_total, settings.sheet_url)
+    return TrackerResult(pivot_combined, weekly_avg, weekly_total, submitter_totals, summary, watermark)
+
+def publish_summary(result: TrackerResult, settings: TrackerSettings, metrics: Optional[RunMetrics] = None,
+                    deadline_at: Optional[float] = None) -> None:
+    """Publish stage: writes the CSV and the Google Sheet.
+
+    The deadline is checked before each write. A write that has started is not cut off half-way,
+    but every Sheets request gives up after sheet_sync.SHEETS_TIMEOUT seconds.
+    """
+    check_deadline(deadline_at, "saving the CSV")
+    with measure(metrics, 'save_csv') as stage:
+        save_to_csv(result.pivot_combined, settings.output_file)
+        stage.rows = len(result.pivot_combined)
+    check_deadline(deadline_at, "writing the Google Sheet")
+    with measure(metrics, 'update_google_sheet') as stage:
+        stage.rows = update_google_sheet(result.pivot_combined, settings.sheet_name, settings.service_file,
+                                         result.weekly_avg, result.weekly_total, result.submitter_totals,
+                                         settings.worksheet_title)
+
+def email_body(result: TrackerResult, settings: TrackerSettings, metrics: Optional[RunMetrics] = None) -> str:
+    """The summary text, with the run metrics appended when EMAIL_METRICS_FOOTER is set."""
+    if settings.metrics_footer and metrics is not None:
+        return f"{result.summary}\n\n{metrics.footer()}"
+    return result.summary
+
+def main(full_resync: bool = False, client: Optional[Client] = None, force: bool = False) -> Optional[str]:
+    settings = load_settings()
+
+    print(f"📋 Working on sheet: {settings.sheet_name}")
+
+    client = client or initialize_odk_client()
+    metrics = RunMetrics('main')
+    outcome = 'error'
+    try:
+        probe = ChangeProbe(client, settings.form_id, settings.project_id, target=settings.publish_target)
+        with metrics.stage('probe'):
+            status = probe.check()
+        if not (status.changed or force or full_resync):
+            probe.record_skip(status, 'main')
+            print(f"💤 Skipping update: {status.reason} ({status.total} submissions).")
+            outcome = 'skipped'
+            return None
+
+        result = collect_summary(client, settings, full_resync, metrics)
+
+        print(result.pivot_combined)
+        publish_summary(result, settings, metrics)
+        probe.mark_published(status, result.watermark)
+        outcome = 'ok'
+    finally:
+        metrics.finish(outcome)
+    cache = installed_cache(client)
+    if cache:
+        print(cache.report())
+    return email_body(result, settings, metrics)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the ODK image submissions summary.")
+    parser.add_argument('--full-resync', action='store_true',
+                        help="Discard the local submission store and rollups and download the whole form history again.")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild and publish the summary even if no submissions changed since the last run.")
+    args = parser.parse_args()
+    summary = main(full_resync=args.full_resync, force=args.force)
+    if summary:
+        print(summary)
@@ -0,0 +1,252 @@
+# multi_form_tracker.py
+import os
+import json
+import time
+import argparse
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, fields as dataclass_fields, replace
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+from pyodk.client import Client
+
+from main import (TrackerResult, TrackerSettings, build_summary_text, initialize_odk_client, load_settings,
+                  publish_summary, sync_submissions)
+from aggregation import assemble_rollups
+from change_probe import ChangeProbe
+from email_outbox import default_sender, queue_email
+from field_spec import TRACKER_FIELDS, remap_fields
+from http_cache import installed_cache, mount_pool
+from instrumentation import RunMetrics, measure
+from rollup_store import RollupStore
+from submission_reader import SubmissionReader
+from sync_store import SubmissionStore
+
+CONFIG_PATH = os.getenv('TRACKER_FORMS_CONFIG', os.path.join(os.path.dirname(__file__), 'tracker_forms.json'))
+FORMS_DIR = os.path.join(os.path.dirname(__file__), 'output_files', 'forms')
+DEFAULT_CONCURRENCY = 4
+
+
+class ConfigError(ValueError):
+    pass
+
+
+@dataclass
+class FormEntry:
+    """One tracked form from the config file.
+
+    fields maps TRACKER_FIELDS columns (submitter, today, photo_count, duration) to the OData paths
+    this form uses; missing ones keep the Image Safari paths. Unset sheet_name, allowed_submitters
+    and paths fall back to the .env settings and to files named after the project and form.
+    """
+    name: str
+    form_id: str
+    project_id: Optional[int] = None
+    sheet_tab: str = 'Summary'
+    sheet_name: Optional[str] = None
+    fields: Dict[str, str] = field(default_factory=dict)
+    allowed_submitters: Optional[List[str]] = None
+    store_path: Optional[str] = None
+    output_file: Optional[str] = None
+
+    def settings(self, base: TrackerSettings, default_project_id: int) -> TrackerSettings:
+        project_id = self.project_id or default_project_id
+        slug = quote(f"{project_id}_{self.form_id}", safe='')
+        return replace(
+            base,
+            form_id=self.form_id,
+            project_id=project_id,
+            fields=remap_fields(TRACKER_FIELDS, self.fields),
+            worksheet_title=self.sheet_tab,
+            sheet_name=self.sheet_name or base.sheet_name,
+            allowed_submitters=base.allowed_submitters if self.allowed_submitters is None else self.allowed_submitters,
+            # one store per form, so concurrent syncs never wait on each other's SQLite writes
+            store_path=self.store_path or os.path.join(FORMS_DIR, f"{slug}.db"),
+            output_file=self.output_file or os.path.join(FORMS_DIR, f"{slug}_summary.csv"),
+        )
+
+
+@dataclass
+class FormOutcome:
+    entry: FormEntry
+    status: str = 'error'
+    result: Optional[TrackerResult] = None
+    fetched: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def load_config(path: str = CONFIG_PATH) -> List[FormEntry]:
+    """Reads the form entries from a JSON list (or an object with a 'forms' list)."""
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    entries = config.get('forms') if isinstance(config, dict) else config
+    if not entries:
+        raise ConfigError(f"{path} lists no forms to track")
+    known = {f.name for f in dataclass_fields(FormEntry)}
+    forms = []
+    for i, entry in enumerate(entries):
+        unknown = set(entry) - known
+        if unknown:
+            raise ConfigError(f"Entry {i} of {path} has unknown key(s): {', '.join(sorted(unknown))}")
+        missing = {'name', 'form_id'} - set(entry)
+        if missing:
+            raise ConfigError(f"Entry {i} of {path} is missing {', '.join(sorted(missing))}")
+        try:
+            remap_fields(TRACKER_FIELDS, entry.get('fields', {}))
+        except ValueError as e:
+            raise ConfigError(f"Entry {i} of {path}: {e}") from None
+        forms.append(FormEntry(**entry))
+    return forms
+
+
+def aggregate_form(store_path: str, form_id: str, allowed_submitters: List[str], sheet_url: str) -> TrackerResult:
+    """Aggregate stage of one form, run in a worker process: rollups -> published tables and email text."""
+    store = SubmissionStore(store_path)
+    rollups = RollupStore(store_path)
+    try:
+        daily, weekly = rollups.load(form_id, allowed_submitters)
+        watermark = store.get_watermark(form_id)
+    finally:
+        rollups.close()
+        store.close()
+
+    tables = assemble_rollups(daily, weekly)
+    pivot_combined = tables.daily.sort_index(ascending=False)
+    summary = build_summary_text(pivot_combined, tables.weekly_total, sheet_url)
+    return TrackerResult(pivot_combined, tables.weekly_avg, tables.weekly_total, tables.submitter_totals,
+                         summary, watermark)
+
+
+def track_form(client: Client, entry: FormEntry, settings: TrackerSettings, aggregators: Executor,
+               metrics: Optional[RunMetrics] = None, force: bool = False, full_resync: bool = False) -> FormOutcome:
+    """Probe, sync, aggregate and publish one form; errors are recorded instead of stopping the other forms."""
+    outcome = FormOutcome(entry)
+    started = time.perf_counter()
+    try:
+        probe = ChangeProbe(client, settings.form_id, settings.project_id, target=settings.publish_target)
+        with measure(metrics, f'{entry.name}:probe'):
+            status = probe.check()
+        if not (status.changed or force or full_resync):
+            probe.record_skip(status, 'multi_form')
+            outcome.status = 'skipped'
+            return outcome
+
+        store = SubmissionStore(settings.store_path)
+        rollups = RollupStore(store.path)
+        reader = SubmissionReader(client, settings.form_id, settings.project_id)
+        try:
+            with measure(metrics, f'{entry.name}:fetch') as stage:
+                outcome.fetched = sync_submissions(client, store, rollups, full_resync, reader, settings.form_id,
+                                                   settings.fields, settings.project_id)
+                stage.rows, stage.bytes = outcome.fetched, reader.bytes_read
+        finally:
+            rollups.close()
+            store.close()
+
+        with measure(metrics, f'{entry.name}:aggregate') as stage:
+            outcome.result = aggregators.submit(aggregate_form, settings.store_path, settings.form_id,
+                                                settings.allowed_submitters, settings.sheet_url).result()
+            stage.rows = len(outcome.result.pivot_combined)
+        with measure(metrics, f'{entry.name}:publish'):
+            publish_summary(outcome.result, settings)
+        probe.mark_published(status, outcome.result.watermark)
+        outcome.status = 'ok'
+    except Exception as e:
+        outcome.error = str(e)
+        print(f"❌ {entry.name}: {e}")
+    finally:
+        outcome.seconds = time.perf_counter() - started
+    return outcome
+
+
+def run_all(entries: List[FormEntry], client: Optional[Client] = None, max_workers: int = DEFAULT_CONCURRENCY,
+            aggregation_workers: Optional[int] = None, force: bool = False, full_resync: bool = False,
+            metrics: Optional[RunMetrics] = None) -> List[FormOutcome]:
+    """Tracks every form at once over the client's pooled session; outcomes keep the config order.
+
+    Fetching runs on threads and the pandas aggregation on a process pool, so the run takes about as
+    long as the slowest form. Sheet writes take turns on sheet_sync's lock, since every thread
+    shares one pygsheets client.
+    """
+    if not entries:
+        raise ConfigError("No forms to track")
+    client = client or initialize_odk_client()
+    base = load_settings()
+    default_project_id = client.config.central.default_project_id
+    all_settings = [entry.settings(base, default_project_id) for entry in entries]
+
+    # listing the forms also authenticates the shared session before the workers start
+    client.forms.list(project_id=all_settings[0].project_id)
+    mount_pool(client.session, client.config.central.base_url.rstrip('/'), max_workers)
+
+    workers = min(max_workers, len(entries))
+    with ProcessPoolExecutor(max_workers=aggregation_workers or workers) as aggregators, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='form') as pool:
+        futures = [pool.submit(track_form, client, entry, settings, aggregators, metrics, force, full_resync)
+                   for entry, settings in zip(entries, all_settings)]
+        return [future.result() for future in futures]
+
+
+def combined_email(outcomes: List[FormOutcome], metrics: Optional[RunMetrics] = None,
+                   metrics_footer: bool = False) -> str:
+    sections = []
+    for outcome in outcomes:
+        header = f"📋 {outcome.entry.name} ({outcome.entry.form_id})"
+        if outcome.status == 'ok':
+            sections.append(f"{header}\n{outcome.result.summary}")
+        elif outcome.status == 'skipped':
+            sections.append(f"{header}\n💤 No new submissions since the last update.")
+        else:
+            sections.append(f"{header}\n❌ Update failed: {outcome.error}")
+    body = "\n\n────────────\n\n".join(sections)
+    if metrics_footer and metrics is not None:
+        body += f"\n\n{metrics.footer()}"
+    return body
+
+
+def main(config_path: str = CONFIG_PATH, force: bool = False, full_resync: bool = False,
+         max_workers: int = DEFAULT_CONCURRENCY, email: bool = False) -> Optional[str]:
+    entries = load_config(config_path)
+    print(f"📋 Tracking {len(entries)} form(s) from {config_path}")
+
+    client = initialize_odk_client()
+    metrics = RunMetrics('multi_form')
+    outcomes = []
+    try:
+        outcomes = run_all(entries, client, max_workers, force=force, full_resync=full_resync, metrics=metrics)
+    finally:
+        failed = not outcomes or any(o.status == 'error' for o in outcomes)
+        metrics.finish('error' if failed else 'ok')
+
+    for outcome in outcomes:
+        print(f"• {outcome.entry.name}: {outcome.status}, {outcome.fetched} fetched in {outcome.seconds:.1f}s")
+    cache = installed_cache(client)
+    if cache:
+        print(cache.report())
+
+    if all(outcome.status == 'skipped' for outcome in outcomes):
+        print("💤 No form changed since the last update.")
+        return None
+    body = combined_email(outcomes, metrics, load_settings().metrics_footer)
+    if email:
+        queue_email("📸 ODK forms summary", body, os.getenv('RECEIVER_EMAIL'), coalesce_key='multi_form')
+        # one last drain before exiting; an email that could not be sent stays queued on disk
+        default_sender().stop()
+    return body
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the summaries of every form listed in the tracker config.")
+    parser.add_argument('--config', default=CONFIG_PATH, help="JSON list of form entries")
+    parser.add_argument('--workers', type=int, default=DEFAULT_CONCURRENCY, help="Forms processed at once")
+    parser.add_argument('--force', action='store_true', help="Publish every form even if nothing changed.")
+    parser.add_argument('--full-resync', action='store_true', help="Download every form's history again.")
+    parser.add_argument('--email', action='store_true', help="Send the combined summary to RECEIVER_EMAIL.")
+    args = parser.parse_args()
+    try:
+        summary = main(args.config, args.force, args.full_resync, args.workers, args.email)
+    except ConfigError as e:
+        parser.exit(2, f"❌ {e}\n")
+    if summary:
+        print(summary)
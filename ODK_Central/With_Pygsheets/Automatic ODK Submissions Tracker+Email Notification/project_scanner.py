@@ -0,0 +1,63 @@
+# project_scanner.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from pyodk.client import Client
+
+from http_cache import mount_pool
+from submission_reader import SubmissionReader
+
+DEFAULT_CONCURRENCY = 4
+
+
+@dataclass
+class FormScan:
+    """Outcome of scanning one form's submissions."""
+    form_id: str
+    name: str
+    count: int = 0
+    seconds: float = 0.0
+    bytes_read: int = 0
+    pages: int = 0
+    preview: Optional[Dict] = None
+    error: Optional[str] = None
+
+
+def scan_form(client: Client, form_id: str, name: str, project_id: int,
+              preview_index: int = 0, page_size: int = 1000) -> FormScan:
+    """Streams a form's submissions, counting them and keeping only the record at preview_index."""
+    result = FormScan(form_id=form_id, name=name)
+    reader = SubmissionReader(client, form_id, project_id=project_id, page_size=page_size)
+    started = time.perf_counter()
+    try:
+        for page in reader.iter_pages():
+            if result.preview is None and result.count <= preview_index < result.count + len(page):
+                result.preview = page[preview_index - result.count]
+            result.count += len(page)
+    except Exception as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - started
+    result.bytes_read = reader.bytes_read
+    result.pages = reader.pages_read
+    return result
+
+
+def scan_project(client: Client, project_id: Optional[int] = None, max_workers: int = DEFAULT_CONCURRENCY,
+                 preview_index: int = 0) -> List[FormScan]:
+    """Scans every form of a project concurrently over the client's authenticated session.
+
+    At most max_workers forms are fetched at once; results keep the order of the form list.
+    """
+    project_id = project_id or client.config.central.default_project_id
+    # listing the forms also authenticates the shared session before the workers start
+    forms = client.forms.list(project_id=project_id)
+
+    # one pooled connection per worker; mount_pool keeps pyodk's timeout and 429/5xx retries
+    mount_pool(client.session, client.config.central.base_url.rstrip('/'), max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(scan_form, client, form.xmlFormId, form.name, project_id, preview_index)
+                   for form in forms]
+        return [future.result() for future in futures]
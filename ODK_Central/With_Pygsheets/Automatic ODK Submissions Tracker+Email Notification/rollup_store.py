@@ -0,0 +1,173 @@
+# rollup_store.py
+import sqlite3
+from typing import Iterable, List, Tuple
+
+import pandas as pd
+
+from aggregation import week_start
+from sync_store import DEFAULT_STORE_PATH
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rollup_contributions (
+        form_id TEXT NOT NULL,
+        instance_id TEXT NOT NULL,
+        day TEXT,
+        week_start TEXT,
+        submitter TEXT NOT NULL,
+        photo_count INTEGER NOT NULL,
+        duration INTEGER NOT NULL,
+        PRIMARY KEY (form_id, instance_id)
+    );
+    CREATE TABLE IF NOT EXISTS daily_rollup (
+        form_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        week_start TEXT NOT NULL,
+        submitter TEXT NOT NULL,
+        photo_count INTEGER NOT NULL,
+        duration INTEGER NOT NULL,
+        submissions INTEGER NOT NULL,
+        PRIMARY KEY (form_id, day, submitter)
+    );
+    CREATE TABLE IF NOT EXISTS weekly_rollup (
+        form_id TEXT NOT NULL,
+        week_start TEXT NOT NULL,
+        submitter TEXT NOT NULL,
+        photo_count INTEGER NOT NULL,
+        duration INTEGER NOT NULL,
+        submissions INTEGER NOT NULL,
+        PRIMARY KEY (form_id, week_start, submitter)
+    );
+"""
+
+# sign = -1 backs out the previous contribution of re-fetched submissions, sign = +1 adds the new one
+_APPLY_DAILY = """
+    INSERT INTO daily_rollup (form_id, day, week_start, submitter, photo_count, duration, submissions)
+    SELECT form_id, day, week_start, submitter, :sign * SUM(photo_count), :sign * SUM(duration), :sign * COUNT(*)
+    FROM {source} WHERE day IS NOT NULL {where}
+    GROUP BY form_id, day, week_start, submitter
+    ON CONFLICT (form_id, day, submitter) DO UPDATE SET
+        photo_count = photo_count + excluded.photo_count,
+        duration = duration + excluded.duration,
+        submissions = submissions + excluded.submissions
+"""
+
+_APPLY_WEEKLY = """
+    INSERT INTO weekly_rollup (form_id, week_start, submitter, photo_count, duration, submissions)
+    SELECT form_id, week_start, submitter, :sign * SUM(photo_count), :sign * SUM(duration), :sign * COUNT(*)
+    FROM {source} WHERE day IS NOT NULL {where}
+    GROUP BY form_id, week_start, submitter
+    ON CONFLICT (form_id, week_start, submitter) DO UPDATE SET
+        photo_count = photo_count + excluded.photo_count,
+        duration = duration + excluded.duration,
+        submissions = submissions + excluded.submissions
+"""
+
+_PREVIOUS = "AND instance_id IN (SELECT instance_id FROM rollup_delta) AND form_id = :form_id"
+
+
+class RollupStore:
+    """Materialized (day, submitter) and (week_start, submitter) rollups, maintained from submission deltas."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def _delta_rows(self, form_id: str, frame: pd.DataFrame) -> List[Tuple]:
+        frame = frame.drop_duplicates('instance_id', keep='last')
+        days = pd.to_datetime(frame['today'])
+        weeks = week_start(days)
+        return list(zip(
+            [form_id] * len(frame),
+            frame['instance_id'].astype(str).tolist(),
+            [d.strftime('%Y-%m-%d') if pd.notna(d) else None for d in days],
+            [w.strftime('%Y-%m-%d') if pd.notna(w) else None for w in weeks],
+            frame['submitter'].astype(str).tolist(),
+            frame['photo_count'].astype('int64').tolist(),
+            frame['duration'].astype('int64').tolist(),
+        ))
+
+    def apply_delta(self, form_id: str, frame: pd.DataFrame) -> int:
+        """Folds new or edited submissions (a TRACKER_FIELDS frame) into the rollups.
+
+        Edited submissions first have their previously recorded contribution subtracted, so an edit
+        that moves a submission to another day or submitter lands in the right rows.
+        """
+        rows = self._delta_rows(form_id, frame)
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS rollup_delta AS SELECT * FROM rollup_contributions WHERE 0')
+            self.conn.execute('DELETE FROM rollup_delta')
+            self.conn.executemany('INSERT INTO rollup_delta VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+            for statement in (_APPLY_DAILY, _APPLY_WEEKLY):
+                self.conn.execute(statement.format(source='rollup_contributions', where=_PREVIOUS),
+                                  {'sign': -1, 'form_id': form_id})
+                self.conn.execute(statement.format(source='rollup_delta', where=''), {'sign': 1})
+
+            self.conn.execute('INSERT OR REPLACE INTO rollup_contributions SELECT * FROM rollup_delta')
+            self.conn.execute('DELETE FROM daily_rollup WHERE submissions <= 0')
+            self.conn.execute('DELETE FROM weekly_rollup WHERE submissions <= 0')
+        return len(rows)
+
+    def remove(self, form_id: str, instance_ids: Iterable[str]) -> int:
+        """Backs submissions deleted on Central out of the rollups; returns how many had a contribution."""
+        with self.conn:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS rollup_delta AS SELECT * FROM rollup_contributions WHERE 0')
+            self.conn.execute('DELETE FROM rollup_delta')
+            self.conn.executemany(
+                'INSERT INTO rollup_delta SELECT * FROM rollup_contributions WHERE form_id = ? AND instance_id = ?',
+                [(form_id, instance_id) for instance_id in instance_ids])
+            removed = self.conn.execute('SELECT COUNT(*) FROM rollup_delta').fetchone()[0]
+
+            for statement in (_APPLY_DAILY, _APPLY_WEEKLY):
+                self.conn.execute(statement.format(source='rollup_contributions', where=_PREVIOUS),
+                                  {'sign': -1, 'form_id': form_id})
+
+            self.conn.execute('DELETE FROM rollup_contributions WHERE form_id = ? AND instance_id IN '
+                              '(SELECT instance_id FROM rollup_delta)', (form_id,))
+            self.conn.execute('DELETE FROM daily_rollup WHERE submissions <= 0')
+            self.conn.execute('DELETE FROM weekly_rollup WHERE submissions <= 0')
+        return removed
+
+    def rebuild(self, form_id: str, frames: Iterable[pd.DataFrame]) -> int:
+        """Recomputes a form's rollups from scratch out of TRACKER_FIELDS frames."""
+        self.reset(form_id)
+        return sum(self.apply_delta(form_id, frame) for frame in frames)
+
+    def reset(self, form_id: str) -> None:
+        with self.conn:
+            for table in ('rollup_contributions', 'daily_rollup', 'weekly_rollup'):
+                self.conn.execute(f'DELETE FROM {table} WHERE form_id = ?', (form_id,))
+
+    def has_data(self, form_id: str) -> bool:
+        row = self.conn.execute('SELECT 1 FROM rollup_contributions WHERE form_id = ? LIMIT 1', (form_id,)).fetchone()
+        return row is not None
+
+    def submitters(self, form_id: str) -> List[str]:
+        return [name for (name,) in self.conn.execute(
+            'SELECT DISTINCT submitter FROM daily_rollup WHERE form_id = ? ORDER BY submitter', (form_id,))]
+
+    def load(self, form_id: str, submitters: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Returns the daily and weekly rollup tables of a form for the given submitters."""
+        marks = ','.join('?' * len(submitters))
+        daily = pd.read_sql_query(
+            f"""SELECT day AS today, week_start, submitter, photo_count, duration
+                FROM daily_rollup WHERE form_id = ? AND submitter IN ({marks})
+                ORDER BY day""",
+            self.conn, params=[form_id, *submitters], parse_dates=['today', 'week_start'])
+        weekly = pd.read_sql_query(
+            f"""SELECT w.week_start, w.submitter, w.photo_count,
+                       CAST(w.photo_count AS REAL) / COUNT(d.day) AS avg_photo_count
+                FROM weekly_rollup w
+                JOIN daily_rollup d
+                  ON d.form_id = w.form_id AND d.week_start = w.week_start AND d.submitter = w.submitter
+                WHERE w.form_id = ? AND w.submitter IN ({marks})
+                GROUP BY w.week_start, w.submitter
+                ORDER BY w.week_start""",
+            self.conn, params=[form_id, *submitters], parse_dates=['week_start'])
+        return daily, weekly
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,211 @@
+# sheet_sync.py
+import os
+import re
+import json
+import math
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import pandas as pd
+
+Cell = Tuple[int, int]
+Grid = Dict[Cell, Any]
+Block = Tuple[str, Union[str, pd.DataFrame]]
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'output_files', 'sheet_cache')
+SHEETS_TIMEOUT = 120  # seconds per Sheets API request, so a stuck write fails instead of hanging its job
+
+_sheets_clients: Dict[str, Any] = {}
+_worksheets: Dict[Tuple[str, str, str], Any] = {}
+# The cached pygsheets client (httplib2 underneath) is not thread-safe, and each tab's JSON cache
+# must not be read and written by two publishes at once: jobs and form threads take turns here.
+sheets_lock = threading.RLock()
+
+
+def get_sheets_client(service_file: str):
+    """Authorizes with Google once per service account file and reuses the client afterwards."""
+    with sheets_lock:
+        if service_file not in _sheets_clients:
+            import httplib2
+            import pygsheets
+            _sheets_clients[service_file] = pygsheets.authorize(service_file=service_file,
+                                                               http=httplib2.Http(timeout=SHEETS_TIMEOUT))
+        return _sheets_clients[service_file]
+
+
+def open_worksheet(service_file: str, sheet_name: str, title: str):
+    """Opens a worksheet by spreadsheet and tab title, cached across runs in the same process."""
+    key = (service_file, sheet_name, title)
+    with sheets_lock:
+        if key not in _worksheets:
+            spreadsheet = get_sheets_client(service_file).open(sheet_name)
+            _worksheets[key] = spreadsheet.worksheet_by_title(title)
+        return _worksheets[key]
+
+
+def column_letter(col: int) -> str:
+    letters = ''
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def parse_a1(address: str) -> Cell:
+    match = re.fullmatch(r'([A-Z]+)(\d+)', address.upper())
+    if not match:
+        raise ValueError(f"Invalid A1 address: {address}")
+    col = 0
+    for char in match.group(1):
+        col = col * 26 + ord(char) - 64
+    return int(match.group(2)), col
+
+
+def cell_value(value: Any) -> Any:
+    """Converts a DataFrame value to what the Sheets API (and the JSON cache) accepts."""
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT:
+        return ''
+    if isinstance(value, datetime):
+        value = pd.Timestamp(value)
+        return value.strftime('%Y-%m-%d') if value == value.normalize() else value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return cell_value(value.item())
+    if isinstance(value, (int, float, str, bool)):
+        return value
+    return str(value)
+
+
+def build_grid(blocks: Sequence[Block]) -> Grid:
+    """Lays out titles and DataFrames (header row included) at their anchors; later blocks win on overlap."""
+    grid: Grid = {}
+    for anchor, content in blocks:
+        row, col = parse_a1(anchor)
+        if isinstance(content, pd.DataFrame):
+            rows = [list(content.columns)] + content.values.tolist()
+            for r, values in enumerate(rows):
+                for c, value in enumerate(values):
+                    grid[(row + r, col + c)] = cell_value(value)
+        else:
+            grid[(row, col)] = cell_value(content)
+    return grid
+
+
+def diff_grids(old: Grid, new: Grid) -> Grid:
+    """Cells whose value changed, including cells that must be blanked because they are gone."""
+    changed = {cell: value for cell, value in new.items() if old.get(cell) != value}
+    changed.update({cell: '' for cell in old if cell not in new and old[cell] != ''})
+    return changed
+
+
+def changed_ranges(changes: Grid) -> List[Tuple[Cell, List[List[Any]]]]:
+    """Groups changed cells into rectangles: contiguous runs per row, merged across consecutive rows."""
+    runs: List[Tuple[int, int, int, List[Any]]] = []
+    for row, col in sorted(changes):
+        if runs and runs[-1][0] == row and runs[-1][2] == col - 1:
+            r, start, _, values = runs[-1]
+            runs[-1] = (r, start, col, values + [changes[(row, col)]])
+        else:
+            runs.append((row, col, col, [changes[(row, col)]]))
+
+    rectangles: List[Tuple[int, int, int, List[List[Any]]]] = []
+    open_rects: Dict[Tuple[int, int], int] = {}
+    for row, start, end, values in runs:
+        index = open_rects.get((start, end))
+        if index is not None and rectangles[index][0] + len(rectangles[index][3]) == row:
+            rectangles[index][3].append(values)
+        else:
+            open_rects[(start, end)] = len(rectangles)
+            rectangles.append((row, start, end, [values]))
+    return [((row, start), values) for row, start, _, values in rectangles]
+
+
+def a1_range(title: str, start: Cell, values: List[List[Any]]) -> str:
+    row, col = start
+    end_row, end_col = row + len(values) - 1, col + len(values[0]) - 1
+    return f"'{title}'!{column_letter(col)}{row}:{column_letter(end_col)}{end_row}"
+
+
+class PygsheetsBackend:
+    """Sends all changed ranges of a worksheet in a single values.batchUpdate call."""
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.title = worksheet.title
+        self.cache_key = f'{worksheet.spreadsheet.id}_{worksheet.title}'
+
+    def clear(self) -> None:
+        self.worksheet.clear(start='A1')
+
+    def batch_update(self, ranges: List[Tuple[Cell, List[List[Any]]]]) -> None:
+        body = {
+            'valueInputOption': 'USER_ENTERED',
+            'data': [{'range': a1_range(self.title, start, values), 'majorDimension': 'ROWS', 'values': values}
+                     for start, values in ranges],
+        }
+        self.worksheet.client.sheet.values_batch_update(self.worksheet.spreadsheet.id, body)
+
+
+class FakeSheetBackend:
+    """In-memory stand-in for a worksheet, recording every request for offline checks."""
+
+    def __init__(self, title: str = 'Summary'):
+        self.title = title
+        self.cache_key = title
+        self.cells: Grid = {}
+        self.requests: List[Tuple[str, Any]] = []
+
+    def clear(self) -> None:
+        self.requests.append(('clear', None))
+        self.cells.clear()
+
+    def batch_update(self, ranges: List[Tuple[Cell, List[List[Any]]]]) -> None:
+        self.requests.append(('batch_update', [a1_range(self.title, start, values) for start, values in ranges]))
+        for (row, col), values in ranges:
+            for r, row_values in enumerate(values):
+                for c, value in enumerate(row_values):
+                    self.cells[(row + r, col + c)] = value
+        self.cells = {cell: value for cell, value in self.cells.items() if value != ''}
+
+
+class SheetSync:
+    """Publishes a worksheet layout by writing only the cells that changed since the last publish.
+
+    The last-written grid is kept in a local JSON file. Without it (first run, or after the file is
+    deleted) the worksheet is cleared and written in full once.
+    """
+
+    def __init__(self, backend, cache_path: str = None):
+        self.backend = backend
+        self.cache_path = cache_path or os.path.join(DEFAULT_CACHE_DIR, f'{backend.cache_key}.json')
+
+    def _load_cache(self) -> Union[Grid, None]:
+        if not os.path.exists(self.cache_path):
+            return None
+        with open(self.cache_path, encoding='utf-8') as f:
+            return {tuple(map(int, key.split(','))): value for key, value in json.load(f).items()}
+
+    def _save_cache(self, grid: Grid) -> None:
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        # A torn cache would make the next publish diff against cells that were never written
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({f'{row},{col}': value for (row, col), value in grid.items()}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def publish(self, blocks: Sequence[Block]) -> int:
+        """Writes the blocks and returns the number of cells sent; one publish at a time per process."""
+        grid = build_grid(blocks)
+        with sheets_lock:
+            previous = self._load_cache()
+            if previous is None:
+                self.backend.clear()
+                previous = {}
+
+            changes = diff_grids(previous, grid)
+            if changes:
+                self.backend.batch_update(changed_ranges(changes))
+            self._save_cache(grid)
+        return len(changes)
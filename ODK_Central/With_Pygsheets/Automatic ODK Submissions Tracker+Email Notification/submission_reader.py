@@ -0,0 +1,111 @@
+# submission_reader.py
+from typing import Dict, Iterator, List, Optional, Sequence
+from urllib.parse import quote
+
+import pandas as pd
+from pyodk.client import Client
+
+from field_spec import FieldSpec, normalized_frame, project_frame, select_clause
+
+DEFAULT_PAGE_SIZE = 1000
+
+
+def submissions_url(client: Client, form_id: str, project_id: Optional[int] = None) -> str:
+    """Returns the OData Submissions feed URL of a form."""
+    project_id = project_id or client.config.central.default_project_id
+    base_url = client.config.central.base_url.rstrip('/')
+    return f"{base_url}/v1/projects/{project_id}/forms/{quote(form_id, safe='')}.svc/Submissions"
+
+
+class SubmissionReader:
+    """Pages through a form's submissions so only one page is held in memory at a time.
+
+    Uses $top/$skip paging and follows @odata.nextLink whenever Central sends one.
+    """
+
+    def __init__(self, client: Client, form_id: str, project_id: Optional[int] = None,
+                 page_size: int = DEFAULT_PAGE_SIZE, session=None):
+        self.client = client
+        self.form_id = form_id
+        self.project_id = project_id or client.config.central.default_project_id
+        self.page_size = page_size
+        self.session = session or client.session
+        self.url = submissions_url(client, form_id, self.project_id)
+        self.bytes_read = 0
+        self.pages_read = 0
+
+    def _params(self, skip: int, odata_filter: Optional[str], select: Optional[str]) -> Dict[str, str]:
+        params = {'$top': str(self.page_size), '$skip': str(skip)}
+        if odata_filter:
+            params['$filter'] = odata_filter
+        if select:
+            params['$select'] = select
+        return params
+
+    def iter_pages(self, odata_filter: Optional[str] = None, select: Optional[str] = None,
+                   skip: int = 0) -> Iterator[List[Dict]]:
+        """Yields one list of submission records per page, starting after the first ``skip`` records."""
+        url = self.url
+        params = self._params(skip, odata_filter, select)
+        following_links = False
+        while True:
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            self.bytes_read += len(response.content)
+            self.pages_read += 1
+            payload = response.json()
+            records = payload.get('value', [])
+            if records:
+                yield records
+
+            next_link = payload.get('@odata.nextLink')
+            if next_link:
+                url, params, following_links = next_link, None, True
+            elif following_links or len(records) < self.page_size:
+                break
+            else:
+                skip += self.page_size
+                params = self._params(skip, odata_filter, select)
+
+    def iter_records(self, odata_filter: Optional[str] = None, select: Optional[str] = None) -> Iterator[Dict]:
+        """Yields submission records one at a time."""
+        for page in self.iter_pages(odata_filter, select):
+            yield from page
+
+    def iter_frames(self, odata_filter: Optional[str] = None, select: Optional[str] = None,
+                    fields: Optional[Sequence[FieldSpec]] = None,
+                    untyped: Optional[List[pd.DataFrame]] = None) -> Iterator[pd.DataFrame]:
+        """Yields one flattened DataFrame chunk per page.
+
+        With ``fields`` only those paths are requested via $select and flattened into typed columns;
+        otherwise every page goes through pd.json_normalize. A list passed as ``untyped`` also collects
+        each page as json_normalize would have flattened those fields, for memory reports.
+        """
+        if fields:
+            for page in self.iter_pages(odata_filter, select or select_clause(fields)):
+                if untyped is not None:
+                    untyped.append(normalized_frame(page, fields))
+                yield project_frame(page, fields)
+        else:
+            for page in self.iter_pages(odata_filter, select):
+                yield pd.json_normalize(page)
+
+
+def iter_submission_pages(client: Client, form_id: str, project_id: Optional[int] = None,
+                          page_size: int = DEFAULT_PAGE_SIZE, odata_filter: Optional[str] = None,
+                          select: Optional[str] = None) -> Iterator[List[Dict]]:
+    return SubmissionReader(client, form_id, project_id, page_size).iter_pages(odata_filter, select)
+
+
+def iter_submissions(client: Client, form_id: str, project_id: Optional[int] = None,
+                     page_size: int = DEFAULT_PAGE_SIZE, odata_filter: Optional[str] = None,
+                     select: Optional[str] = None) -> Iterator[Dict]:
+    return SubmissionReader(client, form_id, project_id, page_size).iter_records(odata_filter, select)
+
+
+def iter_submission_frames(client: Client, form_id: str, project_id: Optional[int] = None,
+                           page_size: int = DEFAULT_PAGE_SIZE, odata_filter: Optional[str] = None,
+                           select: Optional[str] = None, fields: Optional[Sequence[FieldSpec]] = None,
+                           untyped: Optional[List[pd.DataFrame]] = None) -> Iterator[pd.DataFrame]:
+    return SubmissionReader(client, form_id, project_id, page_size).iter_frames(odata_filter, select, fields,
+                                                                                untyped)
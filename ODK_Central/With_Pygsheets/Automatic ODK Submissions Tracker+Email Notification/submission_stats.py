@@ -0,0 +1,112 @@
+# submission_stats.py
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Union
+from urllib.parse import quote
+
+import pandas as pd
+from pyodk.client import Client
+
+from field_spec import FieldSpec
+from submission_reader import SubmissionReader, submissions_url
+
+DateLike = Union[str, date, datetime]
+
+DAILY_PHOTO_FIELDS = [
+    FieldSpec('today', 'today', 'datetime'),
+    FieldSpec('photo_count', 'photos/photoQuantity', 'int', default=0),
+]
+
+
+def _day(value: DateLike) -> str:
+    return value if isinstance(value, str) else value.strftime('%Y-%m-%d')
+
+
+def date_filter(start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> Optional[str]:
+    """$filter on the server-side submission date; start is inclusive, end exclusive (UTC days)."""
+    clauses = []
+    if start:
+        clauses.append(f"__system/submissionDate ge {_day(start)}T00:00:00.000Z")
+    if end:
+        clauses.append(f"__system/submissionDate lt {_day(end)}T00:00:00.000Z")
+    return ' and '.join(clauses) or None
+
+
+def submitter_filter(submitter_ids: List[int]) -> Optional[str]:
+    """$filter matching any of the given submitter actor ids (Central filters on ids, not names)."""
+    if not submitter_ids:
+        return None
+    return '(' + ' or '.join(f"__system/submitterId eq {i}" for i in submitter_ids) + ')'
+
+
+def combine_filters(*filters: Optional[str]) -> Optional[str]:
+    filters = [f for f in filters if f]
+    if len(filters) == 1:
+        return filters[0]
+    return ' and '.join(f'({f})' for f in filters) or None
+
+
+class SubmissionStats:
+    """Answers count-style questions with $count=true&$top=0 so no submission bodies are transferred.
+
+    Only questions that need row values (such as photo totals) stream rows, and then only the
+    columns they need.
+    """
+
+    def __init__(self, client: Client, form_id: str, project_id: Optional[int] = None, session=None):
+        self.client = client
+        self.form_id = form_id
+        self.project_id = project_id or client.config.central.default_project_id
+        self.session = session or client.session
+        self.url = submissions_url(client, form_id, self.project_id)
+        self._submitters: Optional[Dict[str, int]] = None
+
+    def submitters(self) -> Dict[str, int]:
+        """Maps submitter display names to the actor ids Central filters on."""
+        if self._submitters is None:
+            base_url = self.client.config.central.base_url.rstrip('/')
+            response = self.session.get(f"{base_url}/v1/projects/{self.project_id}/forms/"
+                                        f"{quote(self.form_id, safe='')}/submissions/submitters")
+            response.raise_for_status()
+            self._submitters = {actor['displayName']: actor['id'] for actor in response.json()}
+        return self._submitters
+
+    def filter_for(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                   submitter: Optional[str] = None) -> Optional[str]:
+        ids = None
+        if submitter is not None:
+            ids = [self.submitters()[submitter]] if submitter in self.submitters() else [-1]
+        return combine_filters(date_filter(start, end), submitter_filter(ids))
+
+    def count(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+              submitter: Optional[str] = None) -> int:
+        """Number of submissions matching the filters, without downloading any of them."""
+        return self.count_matching(self.filter_for(start, end, submitter))
+
+    def count_matching(self, odata_filter: Optional[str] = None) -> int:
+        """Number of submissions matching a raw OData $filter (all of them when None)."""
+        params = {'$top': '0', '$count': 'true'}
+        if odata_filter:
+            params['$filter'] = odata_filter
+        response = self.session.get(self.url, params=params)
+        response.raise_for_status()
+        return int(response.json()['@odata.count'])
+
+    def counts_by_submitter(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> pd.Series:
+        return pd.Series({name: self.count(start, end, name) for name in self.submitters()}, name='submissions',
+                         dtype='int64')
+
+    def counts_by_day(self, start: DateLike, end: DateLike, submitter: Optional[str] = None) -> pd.Series:
+        """Submissions received per day in [start, end), one $count request per day."""
+        days = pd.date_range(_day(start), pd.Timestamp(_day(end)) - timedelta(days=1), freq='D')
+        return pd.Series({day.date(): self.count(day, day + timedelta(days=1), submitter) for day in days},
+                         name='submissions', dtype='int64')
+
+    def photo_totals_by_day(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                            submitter: Optional[str] = None, page_size: int = 1000) -> pd.Series:
+        """Sum of photoQuantity per form 'today' date; this needs rows, so it streams only the two fields."""
+        reader = SubmissionReader(self.client, self.form_id, self.project_id, page_size, session=self.session)
+        partials = [frame.groupby('today')['photo_count'].sum()
+                    for frame in reader.iter_frames(self.filter_for(start, end, submitter), fields=DAILY_PHOTO_FIELDS)]
+        if not partials:
+            return pd.Series(dtype='int64', name='photo_count')
+        return pd.concat(partials).groupby(level='today').sum().astype('int64')
@@ -1,41 +1,44 @@
+import os
+import time
 from pyodk.client import Client
+from http_cache import install_cache
+from project_scanner import DEFAULT_CONCURRENCY, scan_project
 
 client = Client()
+cache = install_cache(client)
 
-def fetch_all_forms():
-    """Fetches all forms from the ODK Central server."""
-    project_id = client.config.central.default_project_id
-    forms = client.forms.list(project_id=project_id)
-    return forms
-
-def fetch_records(form_id):
-    """Fetches submission records from the ODK Central server."""
-    project_id = client.config.central.default_project_id
-    try:
-        records = client.submissions.get_table(project_id=project_id, form_id=form_id)['value']
-        return records
-    except Exception as e:
-        print(f"⚠️ Error fetching records for form '{form_id}': {e}")
-        return []
+# How many forms are fetched at the same time (SCAN_CONCURRENCY in the environment)
+max_workers = int(os.getenv('SCAN_CONCURRENCY', DEFAULT_CONCURRENCY))
+record_number = 6
 
 # Main script logic
-forms = fetch_all_forms()
+print(f"📥 Fetching submission records for every form ({max_workers} at a time)...")
+started = time.perf_counter()
+results = scan_project(client, max_workers=max_workers, preview_index=record_number)
+elapsed = time.perf_counter() - started
+
 print("📋 Available forms in the project:")
-for form in forms:
-    print(f"- {form.name} (ID: {form.xmlFormId})")
+for result in results:
+    print(f"- {result.name} (ID: {result.form_id})")
 
-print("\n📥 Fetching submission records for each form...")
-for form in forms:
-    form_id = form.xmlFormId
-    print(f"\n📄 Form: {form.name}")
-    records = fetch_records(form_id)
-    print(f"✅ Total records fetched: {len(records)}")
-    record_number = 6
-    if records:
+for result in results:
+    print(f"\n📄 Form: {result.name}")
+    if result.error:
+        print(f"⚠️ Error fetching records for form '{result.form_id}': {result.error}")
+        continue
+    print(f"✅ Total records fetched: {result.count} "
+          f"({result.seconds:.2f}s, {result.bytes_read / 1024:.0f} KiB in {result.pages} page(s))")
+    if result.preview is not None:
         print(f"🔍 Displaying record #{record_number} preview:")
-        print(records[record_number])
+        print(result.preview)
+    elif result.count:
+        print(f"⚠️ Only {result.count} records, no record #{record_number} to preview.")
     else:
         print("⚠️ No records found.")
+
+slowest = max((r.seconds for r in results), default=0.0)
+print(f"\n⏱️ Scanned {len(results)} forms in {elapsed:.2f}s (slowest form: {slowest:.2f}s)")
+print(cache.report())
 # Ensure the script runs only when executed directly
 if __name__ == "__main__":
-    print("\n✅ Script executed successfully.")
\ No newline at end of file
+    print("\n✅ Script executed successfully.")
@@ -0,0 +1,150 @@
+# sync_store.py
+import os
+import json
+import sqlite3
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(__file__), 'output_files', 'submissions_store.db')
+
+
+def record_watermark(record: Dict) -> Optional[str]:
+    """Returns the latest of submissionDate/updatedAt for a single submission."""
+    system = record.get('__system') or {}
+    stamps = [s for s in (system.get('submissionDate'), system.get('updatedAt')) if s]
+    return max(stamps) if stamps else None
+
+
+def incremental_filter(watermark: str) -> str:
+    """Builds the OData $filter that asks Central only for new or edited submissions.
+
+    It compares with ge, not gt: a submission stamped in the same millisecond as the watermark but
+    stored after the last sync would otherwise be missed. The price is that the newest record(s) of
+    the previous sync come back every time; SubmissionStore.upsert does not count them as changed.
+    """
+    return f"__system/submissionDate ge {watermark} or __system/updatedAt ge {watermark}"
+
+
+def later_watermark(current: Optional[str], candidate: Optional[str]) -> Optional[str]:
+    """The later of two watermarks (ISO timestamps); a stored watermark never moves back."""
+    if candidate and (current is None or candidate > current):
+        return candidate
+    return current
+
+
+class WatermarkPass:
+    """Tracks the watermark of one sync pass over a form's submissions.
+
+    Central pages submissions newest first, so a pass that stops part-way has stored the newest
+    records but not older ones. Callers feed every page to see() and only store ``watermark`` once
+    the last page is in; an interrupted pass keeps the old watermark and is fetched again next time.
+    """
+
+    def __init__(self, start: Optional[str]):
+        self.start = start
+        self.latest: Optional[str] = None
+
+    def odata_filter(self, build: Callable[[str], str] = incremental_filter) -> Optional[str]:
+        """The $filter of this pass: everything on the first sync, otherwise what changed since start."""
+        return build(self.start) if self.start else None
+
+    def see(self, stamps: Iterable[Optional[str]]) -> None:
+        for stamp in stamps:
+            self.latest = later_watermark(self.latest, stamp)
+
+    def see_records(self, records: Iterable[Dict]) -> None:
+        self.see(record_watermark(record) for record in records)
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """The watermark to store after a completed pass."""
+        return later_watermark(self.start, self.latest)
+
+
+class SubmissionStore:
+    """Local SQLite copy of fetched submissions plus the sync watermark of each form."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                form_id TEXT NOT NULL,
+                instance_id TEXT NOT NULL,
+                watermark TEXT,
+                record TEXT NOT NULL,
+                PRIMARY KEY (form_id, instance_id)
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                form_id TEXT PRIMARY KEY,
+                watermark TEXT,
+                synced_at TEXT
+            );
+        """)
+
+    def get_watermark(self, form_id: str) -> Optional[str]:
+        row = self.conn.execute('SELECT watermark FROM sync_state WHERE form_id = ?', (form_id,)).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, form_id: str, records: Iterable[Dict]) -> int:
+        """Inserts new records and replaces edited ones; returns how many were new or changed.
+
+        The form's watermark is left alone until the whole pass is in (see WatermarkPass).
+        """
+        rows = [(form_id, r['__id'], record_watermark(r), json.dumps(r)) for r in records]
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS incoming AS SELECT * FROM submissions WHERE 0')
+            self.conn.execute('DELETE FROM incoming')
+            self.conn.executemany('INSERT INTO incoming VALUES (?, ?, ?, ?)', rows)
+            changed = self.conn.execute(
+                """SELECT COUNT(DISTINCT i.instance_id) FROM incoming i
+                   LEFT JOIN submissions s ON s.form_id = i.form_id AND s.instance_id = i.instance_id
+                   WHERE s.record IS NULL OR s.record != i.record""").fetchone()[0]
+            self.conn.execute('INSERT OR REPLACE INTO submissions SELECT * FROM incoming')
+        return changed
+
+    def set_watermark(self, form_id: str, watermark: Optional[str]) -> None:
+        """Advances the form's watermark after a completed sync; it never moves back."""
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO sync_state (form_id, watermark, synced_at) VALUES (?, ?, ?)',
+                (form_id, later_watermark(self.get_watermark(form_id), watermark),
+                 datetime.now().isoformat(timespec='seconds')),
+            )
+
+    def delete(self, form_id: str, instance_ids: Iterable[str]) -> int:
+        """Removes submissions that no longer exist on Central; returns how many were stored."""
+        with self.conn:
+            cursor = self.conn.executemany('DELETE FROM submissions WHERE form_id = ? AND instance_id = ?',
+                                           [(form_id, instance_id) for instance_id in instance_ids])
+        return cursor.rowcount
+
+    def instance_ids(self, form_id: str) -> List[str]:
+        return [i for (i,) in self.conn.execute('SELECT instance_id FROM submissions WHERE form_id = ?', (form_id,))]
+
+    def reset(self, form_id: str) -> None:
+        """Drops every stored record and the watermark so the next sync rebuilds from scratch."""
+        with self.conn:
+            self.conn.execute('DELETE FROM submissions WHERE form_id = ?', (form_id,))
+            self.conn.execute('DELETE FROM sync_state WHERE form_id = ?', (form_id,))
+
+    def count(self, form_id: str) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM submissions WHERE form_id = ?', (form_id,)).fetchone()[0]
+
+    def iter_records(self, form_id: str, batch_size: int = 5000) -> Iterator[List[Dict]]:
+        """Yields the stored records of a form in batches."""
+        cursor = self.conn.execute('SELECT record FROM submissions WHERE form_id = ?', (form_id,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [json.loads(row[0]) for row in rows]
+
+    def all_records(self, form_id: str) -> List[Dict]:
+        return [record for batch in self.iter_records(form_id) for record in batch]
+
+    def close(self) -> None:
+        self.conn.close()
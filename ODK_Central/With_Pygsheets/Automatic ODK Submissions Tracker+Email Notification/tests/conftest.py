@@ -0,0 +1,22 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+# The tracker modules are plain scripts next to this folder, not an installed package; benchmarks holds the
+# mock Central and the legacy baselines some tests compare against
+TRACKER_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, TRACKER_DIR)
+sys.path.insert(1, os.path.join(TRACKER_DIR, 'benchmarks'))
+
+
+@pytest.fixture
+def local_central(tmp_path):
+    """benchmarks/mock_central.py with 300 submissions on a free localhost port, and a Client for it."""
+    pytest.importorskip('pyodk')
+    from mock_central import LocalCentral
+
+    central = LocalCentral(300, str(tmp_path))
+    yield central
+    central.close()
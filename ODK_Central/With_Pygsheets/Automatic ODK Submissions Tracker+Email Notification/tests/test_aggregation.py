@@ -0,0 +1,37 @@
+# test_aggregation.py
+import pandas as pd
+
+from aggregation import combine_partials, compute_rollups, format_hhmmss, group_daily, week_start
+from bench_aggregation import assert_same_rollups, legacy_rollups, shared_rollups, synthetic_submissions
+
+
+def test_shared_rollups_match_the_legacy_pivots():
+    df = synthetic_submissions(20_000, days=60)
+    assert_same_rollups(legacy_rollups(df), shared_rollups(df))
+
+
+def test_rollups_from_chunks_match_one_grouping():
+    df = synthetic_submissions(5_000, days=30)
+    whole = compute_rollups(group_daily(df).reset_index())
+    chunked = compute_rollups(combine_partials(group_daily(chunk) for chunk in (df[:1234], df[1234:])))
+    for old, new in zip(shared_rollups(df), (chunked.daily, chunked.weekly_avg, chunked.weekly_total,
+                                             chunked.submitter_totals)):
+        pd.testing.assert_frame_equal(old, new, check_dtype=False)
+    pd.testing.assert_frame_equal(whole.daily, chunked.daily, check_dtype=False)
+
+
+def test_empty_input_gives_empty_tables():
+    rollups = compute_rollups(combine_partials([]))
+    assert rollups.daily.empty
+    assert rollups.weekly_total.empty
+    assert rollups.submitter_totals.empty
+
+
+def test_format_hhmmss():
+    assert format_hhmmss([0, 59, 61, 3600, 36_061]).tolist() == ['0:00:00', '0:00:59', '0:01:01', '1:00:00',
+                                                                 '10:01:01']
+
+
+def test_week_starts_on_monday():
+    dates = pd.Series(pd.to_datetime(['2024-01-07 09:00', '2024-01-08 00:00', '2024-01-14 18:30']))
+    assert week_start(dates).dt.strftime('%Y-%m-%d').tolist() == ['2024-01-01', '2024-01-08', '2024-01-08']
@@ -0,0 +1,128 @@
+# test_email_outbox.py
+import socket
+import time
+
+import pytest
+
+pytest.importorskip('aiosmtpd')
+from aiosmtpd.controller import Controller
+
+from email_notifier import SmtpConfig, send_email
+from email_outbox import EmailOutbox, OutboxSender
+
+SENDER = 'tracker@example.org'
+
+
+class RecordingHandler:
+    """Keeps every delivered message and the SMTP session (connection) it arrived on."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((id(session), envelope.rcpt_tos, envelope.content.decode('utf-8', 'replace')))
+        return '250 Message accepted for delivery'
+
+    def subjects(self):
+        return [next(line for line in content.splitlines() if line.startswith('Subject:'))[len('Subject: '):]
+                for _, _, content in self.messages]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield handler, SmtpConfig(sender=SENDER, password=None, host='127.0.0.1', port=controller.port, starttls=False)
+    controller.stop()
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = EmailOutbox(str(tmp_path / 'outbox.db'), max_attempts=3, backoff_seconds=0.2)
+    yield box
+    box.close()
+
+
+def unreachable_config() -> SmtpConfig:
+    return SmtpConfig(sender=SENDER, password=None, host='127.0.0.1', port=free_port(), starttls=False, timeout=2)
+
+
+def test_drain_sends_a_batch_over_one_connection(smtp_server, outbox):
+    handler, config = smtp_server
+    for i in range(3):
+        outbox.enqueue(f"Summary {i}", f"body {i}", 'a@example.org, b@example.org')
+
+    sender = OutboxSender(outbox, config)
+    assert sender.drain() == 3
+    sender.disconnect()
+
+    assert handler.subjects() == ['Summary 0', 'Summary 1', 'Summary 2']
+    assert len({session for session, _, _ in handler.messages}) == 1
+    assert handler.messages[0][1] == ['a@example.org', 'b@example.org']
+    assert outbox.counts() == {'sent': 3}
+
+
+def test_failed_send_is_retried_after_backoff(smtp_server, outbox):
+    handler, config = smtp_server
+    message_id = outbox.enqueue("Summary", "body", 'a@example.org')
+
+    down = OutboxSender(outbox, unreachable_config())
+    assert down.drain() == 0
+    assert outbox.status(message_id) == 'pending'
+    assert outbox.due() == []  # waiting out its backoff
+
+    time.sleep(0.3)
+    up = OutboxSender(outbox, config)
+    assert up.drain() == 1
+    up.disconnect()
+    assert outbox.status(message_id) == 'sent'
+    assert handler.subjects() == ['Summary']
+
+
+def test_gives_up_after_max_attempts(outbox):
+    message_id = outbox.enqueue("Summary", "body", 'a@example.org')
+    sender = OutboxSender(outbox, unreachable_config())
+    for _ in range(outbox.max_attempts):
+        outbox.conn.execute('UPDATE outbox SET next_attempt_at = 0')  # skip the backoff
+        sender.drain()
+    assert outbox.status(message_id) == 'failed'
+    assert outbox.due() == []
+
+
+def test_newer_summary_replaces_a_queued_one(smtp_server, outbox):
+    handler, config = smtp_server
+    first = outbox.enqueue("Summary 10:00", "old", 'a@example.org', coalesce_key='hourly')
+    other = outbox.enqueue("Daily", "daily", 'a@example.org', coalesce_key='daily')
+    newest = outbox.enqueue("Summary 11:00", "new", 'a@example.org', coalesce_key='hourly')
+
+    sender = OutboxSender(outbox, config)
+    assert sender.drain() == 2
+    sender.disconnect()
+
+    assert handler.subjects() == ['Daily', 'Summary 11:00']
+    assert [outbox.status(i) for i in (first, other, newest)] == ['superseded', 'sent', 'sent']
+
+
+def test_send_email_reports_failures_through_the_outbox(smtp_server, outbox, monkeypatch):
+    handler, config = smtp_server
+    monkeypatch.setenv('EMAIL_ADDRESS', SENDER)
+    monkeypatch.delenv('EMAIL_PASSWORD', raising=False)
+    monkeypatch.setenv('SMTP_HOST', '127.0.0.1')
+    monkeypatch.setenv('SMTP_STARTTLS', '0')
+
+    monkeypatch.setenv('SMTP_PORT', str(unreachable_config().port))
+    assert send_email("Summary", "body", 'a@example.org', outbox) is False
+    assert outbox.counts() == {'pending': 1}
+
+    time.sleep(0.3)
+    monkeypatch.setenv('SMTP_PORT', str(config.port))
+    assert send_email("Later", "body", 'a@example.org', outbox) is True
+    assert handler.subjects() == ['Summary', 'Later']
+    assert outbox.counts() == {'sent': 2}
@@ -0,0 +1,63 @@
+# test_field_spec.py
+import pandas as pd
+import pytest
+
+from field_spec import (PLOT_FIELDS, TRACKER_FIELDS, FieldSpec, normalized_frame, project_frame, remap_fields,
+                        select_clause)
+
+RECORDS = [
+    {'__id': 'uuid:1', 'today': '2024-03-01',
+     'photos': {'photoQuantity': 12, 'photoSessionDuration': '95'},
+     '__system': {'submitterName': 'ann'}},
+    {'__id': 'uuid:2', 'today': 'not a date',
+     'photos': None,
+     '__system': {'submitterName': None}},
+    {'__id': 'uuid:3', 'today': None,
+     'photos': {'photoQuantity': None},
+     '__system': {}},
+]
+
+
+def test_select_clause_asks_only_for_the_fields():
+    assert select_clause(TRACKER_FIELDS) == \
+        '__id,__system/submitterName,today,photos/photoQuantity,photos/photoSessionDuration'
+    assert select_clause(PLOT_FIELDS) == '__id,__system/submitterName,plot_id'
+
+
+def test_project_frame_types_and_defaults():
+    df = project_frame(RECORDS, TRACKER_FIELDS)
+    assert list(df.columns) == ['instance_id', 'submitter', 'today', 'photo_count', 'duration']
+    assert df['submitter'].tolist() == ['ann', 'unknown', 'unknown']
+    assert isinstance(df['submitter'].dtype, pd.CategoricalDtype)
+    assert df['photo_count'].tolist() == [12, 0, 0]
+    assert df['duration'].tolist() == [95, 0, 0]
+    assert df['photo_count'].dtype.itemsize == 1
+    assert df['today'].iloc[0] == pd.Timestamp('2024-03-01')
+    assert df['today'].iloc[1:].isna().all()
+
+
+def test_project_frame_matches_json_normalize_values():
+    typed = project_frame(RECORDS, PLOT_FIELDS)
+    untyped = normalized_frame(RECORDS, PLOT_FIELDS)
+    assert typed['plot_id'].isna().all() and untyped['plot_id'].isna().all()
+    assert typed['submitter'].astype(object).fillna('-').tolist() == untyped['submitter'].fillna('-').tolist()
+
+
+def test_deeper_paths_are_followed():
+    spec = FieldSpec('lat', 'location/coords/lat')
+    records = [{'location': {'coords': {'lat': 1.5}}}, {'location': {'coords': None}}, {'location': 'n/a'}]
+    assert project_frame(records, [spec])['lat'].tolist()[:1] == [1.5]
+    assert project_frame(records, [spec])['lat'].iloc[1:].isna().all()
+
+
+def test_empty_input_keeps_the_columns():
+    df = project_frame([], TRACKER_FIELDS)
+    assert df.empty
+    assert list(df.columns) == [spec.column for spec in TRACKER_FIELDS]
+
+
+def test_remap_fields():
+    remapped = remap_fields(PLOT_FIELDS, {'plot_id': 'site/plot'})
+    assert [spec.path for spec in remapped] == ['__system/submitterName', 'site/plot']
+    with pytest.raises(ValueError, match='plot_code'):
+        remap_fields(PLOT_FIELDS, {'plot_code': 'site/plot'})
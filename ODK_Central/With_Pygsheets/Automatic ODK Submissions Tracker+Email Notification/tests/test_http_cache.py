@@ -0,0 +1,112 @@
+# test_http_cache.py
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.util.retry import Retry
+
+from http_cache import (DEFAULT_RETRIES, DEFAULT_TIMEOUT, CachingAdapter, HttpCache, PoolAdapter, cacheable,
+                        mount_pool)
+
+BASE_URL = 'https://central.test'
+FORM_URL = f'{BASE_URL}/v1/projects/1/forms/f1'
+
+
+class FakeCentral(BaseAdapter):
+    """Answers every GET with one body and ETag, and 304 when the request already carries that ETag."""
+
+    def __init__(self, body=b'{"xmlFormId": "f1"}', etag='"v1"'):
+        super().__init__()
+        self.body = body
+        self.etag = etag
+        self.sent = []
+
+    def send(self, request, stream=False, **kwargs):
+        self.sent.append(dict(request.headers))
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        if request.headers.get('If-None-Match') == self.etag:
+            response.status_code = 304
+            response._content = b''
+        else:
+            response.status_code = 200
+            response._content = self.body
+            response.headers['ETag'] = self.etag
+        return response
+
+    def close(self):
+        pass
+
+
+def prepared(url=FORM_URL):
+    return requests.Request('GET', url).prepare()
+
+
+def test_revalidates_without_touching_the_callers_request(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    central = FakeCentral()
+    adapter = CachingAdapter(cache, central)
+
+    assert adapter.send(prepared()).content == central.body
+    request = prepared()
+    response = adapter.send(request)
+
+    assert response.content == central.body
+    assert response.from_cache
+    assert central.sent[1]['If-None-Match'] == '"v1"'
+    assert 'If-None-Match' not in request.headers
+    assert cache.stats['misses'] == 1 and cache.stats['revalidated'] == 1
+    cache.close()
+
+
+def test_changed_resource_replaces_the_cached_body(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    central = FakeCentral()
+    adapter = CachingAdapter(cache, central)
+    adapter.send(prepared())
+
+    central.body, central.etag = b'{"xmlFormId": "f1", "version": "2"}', '"v2"'
+    assert adapter.send(prepared()).content == central.body
+    assert cache.lookup(FORM_URL)['body'] == central.body
+    cache.close()
+
+
+def test_submission_pages_are_not_cached():
+    svc = f'{FORM_URL}.svc/Submissions'
+    assert cacheable(FORM_URL)
+    assert cacheable(f'{svc}?%24top=0&%24count=true')
+    assert not cacheable(f'{svc}?%24skip=250')
+    assert not cacheable(f'{svc}?%24filter=__system%2FsubmissionDate+ge+2024-01-01')
+
+
+def test_pool_adapter_applies_its_timeout_when_none_is_given(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(HTTPAdapter, 'send', lambda self, request, **kwargs: seen.update(kwargs))
+    PoolAdapter(timeout=7).send(prepared())
+    assert seen['timeout'] == 7
+    PoolAdapter(timeout=7).send(prepared(), timeout=3)
+    assert seen['timeout'] == 3
+
+
+def test_mount_pool_keeps_timeout_retries_and_cache(tmp_path):
+    session = requests.Session()
+    retries = Retry(total=5, backoff_factor=1, status_forcelist=(503,))
+    inner = PoolAdapter(timeout=30, max_retries=retries)
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    session.mount(BASE_URL, CachingAdapter(cache, inner))
+
+    mount_pool(session, BASE_URL, 16)
+    adapter = session.get_adapter(FORM_URL)
+    assert isinstance(adapter, CachingAdapter) and adapter.cache is cache
+    assert adapter.inner.timeout == 30
+    assert adapter.inner.max_retries.total == 5
+    assert adapter.inner._pool_maxsize == 16
+    cache.close()
+
+
+def test_mount_pool_falls_back_to_pyodk_defaults():
+    session = requests.Session()
+    mount_pool(session, BASE_URL, 4)
+    adapter = session.get_adapter(FORM_URL)
+    assert isinstance(adapter, PoolAdapter)
+    assert adapter.timeout == DEFAULT_TIMEOUT
+    assert adapter.max_retries.total == DEFAULT_RETRIES.total
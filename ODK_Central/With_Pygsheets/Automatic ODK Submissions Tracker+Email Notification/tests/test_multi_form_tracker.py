@@ -0,0 +1,77 @@
+# test_multi_form_tracker.py
+import json
+import os
+
+import pytest
+
+from field_spec import TRACKER_FIELDS
+from main import TrackerSettings
+from multi_form_tracker import FORMS_DIR, ConfigError, FormEntry, FormOutcome, combined_email, load_config
+
+EXAMPLE_CONFIG = os.path.join(os.path.dirname(__file__), '..', 'tracker_forms.example.json')
+
+
+def write_config(tmp_path, config):
+    path = tmp_path / 'forms.json'
+    path.write_text(json.dumps(config), encoding='utf-8')
+    return str(path)
+
+
+def base_settings():
+    return TrackerSettings(sheet_name='Tracker', service_file='service.json', sheet_url='https://sheet',
+                           output_file='summary.csv', allowed_submitters=['ann', 'bob'])
+
+
+def test_example_config_loads():
+    entries = load_config(EXAMPLE_CONFIG)
+    assert [entry.name for entry in entries] == ['Image Safari', 'Crop Scout Tablets']
+    assert entries[1].project_id == 3
+
+
+def test_plain_list_and_forms_object_read_the_same(tmp_path):
+    forms = [{'name': 'A', 'form_id': 'a'}]
+    assert load_config(write_config(tmp_path, forms)) == load_config(write_config(tmp_path, {'forms': forms}))
+
+
+@pytest.mark.parametrize('config, message', [
+    ([], 'lists no forms'),
+    ({'forms': []}, 'lists no forms'),
+    ({'form': [{'name': 'A', 'form_id': 'a'}]}, 'lists no forms'),
+    ([{'name': 'A', 'form_id': 'a', 'sheet': 'x'}], "Entry 0 .* unknown key\\(s\\): sheet"),
+    ([{'name': 'A', 'form_id': 'a'}, {'name': 'B'}], 'Entry 1 .* missing form_id'),
+    ([{'name': 'A', 'form_id': 'a', 'fields': {'photos': 'images/count'}}], 'Entry 0 .* Unknown field column'),
+])
+def test_bad_configs_are_rejected(tmp_path, config, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config(write_config(tmp_path, config))
+
+
+def test_entry_falls_back_to_the_env_settings():
+    settings = FormEntry(name='A', form_id='Crop Scout').settings(base_settings(), default_project_id=7)
+    assert settings.project_id == 7
+    assert settings.sheet_name == 'Tracker'
+    assert settings.allowed_submitters == ['ann', 'bob']
+    assert settings.fields == TRACKER_FIELDS
+    assert settings.store_path == os.path.join(FORMS_DIR, '7_Crop%20Scout.db')
+
+
+def test_entry_overrides_and_field_remapping():
+    entry = FormEntry(name='B', form_id='b', project_id=3, sheet_tab='Tablets', allowed_submitters=[],
+                      fields={'photo_count': 'images/imageCount'})
+    settings = entry.settings(base_settings(), default_project_id=7)
+    assert settings.project_id == 3
+    assert settings.publish_target == 'Tracker!Tablets'
+    # an explicit empty list tracks nobody rather than falling back
+    assert settings.allowed_submitters == []
+    paths = {spec.column: spec.path for spec in settings.fields}
+    assert paths['photo_count'] == 'images/imageCount'
+    assert paths['submitter'] == next(spec.path for spec in TRACKER_FIELDS if spec.column == 'submitter')
+
+
+def test_combined_email_has_a_section_per_form():
+    skipped = FormOutcome(FormEntry(name='A', form_id='a'), status='skipped')
+    failed = FormOutcome(FormEntry(name='B', form_id='b'), error='HTTP 503')
+    body = combined_email([skipped, failed])
+    first, second = body.split('\n\n────────────\n\n')
+    assert first.startswith('📋 A (a)') and 'No new submissions' in first
+    assert second.startswith('📋 B (b)') and 'Update failed: HTTP 503' in second
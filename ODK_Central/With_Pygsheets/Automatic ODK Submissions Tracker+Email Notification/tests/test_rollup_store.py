@@ -0,0 +1,113 @@
+# test_rollup_store.py
+import pandas as pd
+import pytest
+
+from aggregation import assemble_rollups, compute_rollups, group_daily
+from bench_aggregation import synthetic_submissions
+from rollup_store import RollupStore
+
+
+def delta(rows):
+    """A TRACKER_FIELDS frame from (instance_id, today, submitter, photo_count, duration) tuples."""
+    return pd.DataFrame(rows, columns=['instance_id', 'today', 'submitter', 'photo_count', 'duration'])
+
+
+@pytest.fixture
+def rollups(tmp_path):
+    store = RollupStore(str(tmp_path / 'store.db'))
+    yield store
+    store.close()
+
+
+def daily_rows(rollups, form_id='f'):
+    daily, _ = rollups.load(form_id, rollups.submitters(form_id))
+    return [(row.today.strftime('%Y-%m-%d'), row.submitter, row.photo_count, row.duration)
+            for row in daily.itertuples()]
+
+
+def weekly_rows(rollups, form_id='f'):
+    _, weekly = rollups.load(form_id, rollups.submitters(form_id))
+    return [(row.week_start.strftime('%Y-%m-%d'), row.submitter, row.photo_count, row.avg_photo_count)
+            for row in weekly.itertuples()]
+
+
+def test_apply_delta_adds_up_per_day_and_week(rollups):
+    rollups.apply_delta('f', delta([('a', '2024-01-01', 'ann', 5, 60), ('b', '2024-01-01', 'ann', 3, 30),
+                                    ('c', '2024-01-02', 'ann', 4, 10), ('d', '2024-01-02', 'bob', 1, 5)]))
+    assert daily_rows(rollups) == [('2024-01-01', 'ann', 8, 90), ('2024-01-02', 'ann', 4, 10),
+                                   ('2024-01-02', 'bob', 1, 5)]
+    # average over the days the submitter sent anything that week
+    assert weekly_rows(rollups) == [('2024-01-01', 'ann', 12, 6.0), ('2024-01-01', 'bob', 1, 1.0)]
+
+
+def test_reapplying_the_same_submissions_changes_nothing(rollups):
+    frame = delta([('a', '2024-01-01', 'ann', 5, 60), ('b', '2024-01-02', 'ann', 3, 30)])
+    rollups.apply_delta('f', frame)
+    before = daily_rows(rollups)
+    rollups.apply_delta('f', frame)
+    assert daily_rows(rollups) == before
+
+
+def test_edit_moves_a_submission_to_another_day_and_submitter(rollups):
+    rollups.apply_delta('f', delta([('a', '2024-01-01', 'ann', 5, 60), ('b', '2024-01-01', 'ann', 3, 30)]))
+    rollups.apply_delta('f', delta([('a', '2024-01-09', 'bob', 7, 20)]))
+
+    assert daily_rows(rollups) == [('2024-01-01', 'ann', 3, 30), ('2024-01-09', 'bob', 7, 20)]
+    assert weekly_rows(rollups) == [('2024-01-01', 'ann', 3, 3.0), ('2024-01-08', 'bob', 7, 7.0)]
+    assert rollups.submitters('f') == ['ann', 'bob']
+
+
+def test_edit_that_empties_a_row_drops_it(rollups):
+    rollups.apply_delta('f', delta([('a', '2024-01-01', 'ann', 5, 60)]))
+    rollups.apply_delta('f', delta([('a', '2024-01-02', 'ann', 5, 60)]))
+    assert daily_rows(rollups) == [('2024-01-02', 'ann', 5, 60)]
+
+
+def test_remove_backs_submissions_out(rollups):
+    rollups.apply_delta('f', delta([('a', '2024-01-01', 'ann', 5, 60), ('b', '2024-01-01', 'ann', 3, 30),
+                                    ('c', '2024-01-02', 'bob', 1, 5)]))
+    assert rollups.remove('f', ['a', 'c', 'never-stored']) == 2
+    assert daily_rows(rollups) == [('2024-01-01', 'ann', 3, 30)]
+    assert rollups.remove('f', []) == 0
+
+
+def test_undated_submissions_are_kept_out_of_the_tables(rollups):
+    rollups.apply_delta('f', delta([('a', None, 'ann', 5, 60), ('b', '2024-01-01', 'ann', 3, 30)]))
+    assert daily_rows(rollups) == [('2024-01-01', 'ann', 3, 30)]
+    assert rollups.has_data('f')
+
+
+def test_empty_delta_and_empty_form(rollups):
+    assert rollups.apply_delta('f', delta([])) == 0
+    assert not rollups.has_data('f')
+    daily, weekly = rollups.load('f', [])
+    assert daily.empty and weekly.empty
+
+
+def test_forms_do_not_share_rows(rollups):
+    rollups.apply_delta('f', delta([('a', '2024-01-01', 'ann', 5, 60)]))
+    rollups.apply_delta('g', delta([('a', '2024-01-01', 'ann', 2, 10)]))
+    rollups.apply_delta('g', delta([('a', '2024-01-01', 'ann', 4, 10)]))
+    assert daily_rows(rollups, 'f') == [('2024-01-01', 'ann', 5, 60)]
+    assert daily_rows(rollups, 'g') == [('2024-01-01', 'ann', 4, 10)]
+
+
+def test_incremental_rollups_match_a_rebuild(rollups):
+    df = synthetic_submissions(3_000, submitters=5, days=40)
+    df.insert(0, 'instance_id', [f'uuid:{i}' for i in range(len(df))])
+    for start in range(0, len(df), 700):
+        rollups.apply_delta('f', df[start:start + 700])
+    edits = df.sample(200, random_state=1).assign(photo_count=lambda d: d['photo_count'] + 1)
+    rollups.apply_delta('f', edits)
+    df.loc[edits.index, 'photo_count'] += 1
+
+    daily, weekly = rollups.load('f', rollups.submitters('f'))
+    actual = assemble_rollups(daily, weekly)
+    expected = compute_rollups(group_daily(df).reset_index())
+    for table in ('daily', 'weekly_avg', 'weekly_total', 'submitter_totals'):
+        pd.testing.assert_frame_equal(getattr(actual, table), getattr(expected, table), check_dtype=False,
+                                      check_index_type=False, check_freq=False, check_names=False, obj=table)
+
+    assert rollups.rebuild('g', [df[:1000], df[1000:]]) == len(df)
+    assert daily_rows(rollups, 'g') == daily_rows(rollups, 'f')
+    assert weekly_rows(rollups, 'g') == weekly_rows(rollups, 'f')
@@ -0,0 +1,101 @@
+# test_sheet_sync.py
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from sheet_sync import FakeSheetBackend, SheetSync, build_grid
+
+
+def summary_blocks(counts: dict):
+    """A title and one table, laid out like the tracker's summary tab."""
+    table = pd.DataFrame({'submitter': list(counts), 'photos': list(counts.values())})
+    return [('A1', 'Summary'), ('A3', table)]
+
+
+def shown(blocks):
+    return {cell: value for cell, value in build_grid(blocks).items() if value != ''}
+
+
+@pytest.fixture
+def backend():
+    return FakeSheetBackend()
+
+
+@pytest.fixture
+def sync(backend, tmp_path):
+    return SheetSync(backend, cache_path=str(tmp_path / 'cache' / 'Summary.json'))
+
+
+def test_first_publish_clears_and_writes_everything(sync, backend):
+    blocks = summary_blocks({'is_site_01': 10, 'is_site_02': 20, 'is_site_03': 30})
+    assert sync.publish(blocks) == 9
+    assert backend.requests == [('clear', None), ('batch_update', ["'Summary'!A1:A1", "'Summary'!A3:B6"])]
+    assert backend.cells == shown(blocks)
+
+
+def test_republish_sends_only_changed_cells(sync, backend):
+    sync.publish(summary_blocks({'is_site_01': 10, 'is_site_02': 20, 'is_site_03': 30}))
+    backend.requests.clear()
+
+    blocks = summary_blocks({'is_site_01': 10, 'is_site_02': 25, 'is_site_03': 30})
+    assert sync.publish(blocks) == 1
+    assert backend.requests == [('batch_update', ["'Summary'!B5:B5"])]
+    assert backend.cells == shown(blocks)
+
+
+def test_shrinking_table_blanks_the_rows_it_leaves(sync, backend):
+    sync.publish(summary_blocks({'is_site_01': 10, 'is_site_02': 25, 'is_site_03': 30}))
+    backend.requests.clear()
+
+    blocks = summary_blocks({'is_site_01': 10, 'is_site_02': 25})
+    assert sync.publish(blocks) == 2
+    assert backend.requests == [('batch_update', ["'Summary'!A6:B6"])]
+    assert backend.cells == shown(blocks)
+
+
+def test_unchanged_layout_sends_nothing(sync, backend):
+    blocks = summary_blocks({'is_site_01': 10})
+    sync.publish(blocks)
+    backend.requests.clear()
+
+    assert sync.publish(blocks) == 0
+    assert backend.requests == []
+
+
+def test_missing_cache_falls_back_to_a_full_rewrite(sync, backend):
+    blocks = summary_blocks({'is_site_01': 10, 'is_site_02': 20})
+    sync.publish(blocks)
+    os.remove(sync.cache_path)
+    backend.requests.clear()
+
+    assert sync.publish(blocks) == 7
+    assert backend.requests[0] == ('clear', None)
+    assert backend.cells == shown(blocks)
+
+
+def test_cache_is_replaced_whole(sync):
+    sync.publish(summary_blocks({'is_site_01': 10}))
+    sync.publish(summary_blocks({'is_site_01': 11}))
+
+    assert not os.path.exists(sync.cache_path + '.tmp')
+    with open(sync.cache_path, encoding='utf-8') as f:
+        assert json.load(f)['4,2'] == 11
+
+
+def test_failed_cache_write_keeps_the_previous_cache(sync, backend, monkeypatch):
+    sync.publish(summary_blocks({'is_site_01': 10}))
+    with open(sync.cache_path, encoding='utf-8') as f:
+        before = f.read()
+
+    def torn_dump(obj, f):
+        f.write('{"0,0": ')
+        raise OSError('disk full')
+
+    monkeypatch.setattr('sheet_sync.json.dump', torn_dump)
+    with pytest.raises(OSError):
+        sync.publish(summary_blocks({'is_site_01': 11}))
+
+    with open(sync.cache_path, encoding='utf-8') as f:
+        assert f.read() == before
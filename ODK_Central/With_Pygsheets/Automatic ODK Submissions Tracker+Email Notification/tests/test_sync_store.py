@@ -0,0 +1,166 @@
+# test_sync_store.py
+import pytest
+
+from main import FORM_ID, sync_submissions
+from rollup_store import RollupStore
+from submission_reader import SubmissionReader
+from sync_store import SubmissionStore, WatermarkPass, incremental_filter, later_watermark, record_watermark
+
+
+def submission(instance_id, submitted, updated=None, photos=1):
+    return {'__id': instance_id, 'today': submitted[:10], 'photos': {'photoQuantity': photos},
+            '__system': {'submissionDate': submitted, 'updatedAt': updated, 'submitterName': 'ann'}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SubmissionStore(str(tmp_path / 'store.db'))
+    yield store
+    store.close()
+
+
+def test_record_watermark_takes_the_later_stamp():
+    assert record_watermark(submission('a', '2024-01-02T00:00:00.000Z')) == '2024-01-02T00:00:00.000Z'
+    assert record_watermark(submission('a', '2024-01-02T00:00:00.000Z', '2024-01-05T00:00:00.000Z')) == \
+        '2024-01-05T00:00:00.000Z'
+    assert record_watermark({'__id': 'a'}) is None
+
+
+def test_watermark_never_moves_back():
+    assert later_watermark(None, '2024-01-02') == '2024-01-02'
+    assert later_watermark('2024-01-02', '2024-01-01') == '2024-01-02'
+    assert later_watermark('2024-01-02', None) == '2024-01-02'
+
+
+def test_watermark_pass_covers_the_whole_pass():
+    first = WatermarkPass(None)
+    assert first.odata_filter() is None
+    assert first.watermark is None
+
+    # newest page first, as Central sends them
+    first.see_records([submission('b', '2024-01-03T00:00:00.000Z')])
+    first.see_records([submission('a', '2024-01-01T00:00:00.000Z', '2024-01-04T00:00:00.000Z')])
+    assert first.watermark == '2024-01-04T00:00:00.000Z'
+
+    later = WatermarkPass(first.watermark)
+    assert later.odata_filter() == incremental_filter(first.watermark)
+    later.see([None, '2024-01-02T00:00:00.000Z'])
+    assert later.watermark == first.watermark
+
+
+def test_upsert_counts_only_new_or_changed_records(store):
+    records = [submission('a', '2024-01-01T00:00:00.000Z'), submission('b', '2024-01-02T00:00:00.000Z')]
+    assert store.upsert('f', records) == 2
+    # the ge filter hands the newest record back on the next sync
+    assert store.upsert('f', records[1:]) == 0
+    assert store.upsert('f', [submission('b', '2024-01-02T00:00:00.000Z', '2024-01-03T00:00:00.000Z', 5)]) == 1
+    assert store.upsert('f', []) == 0
+
+    assert store.count('f') == 2
+    stored = {r['__id']: r for r in store.all_records('f')}
+    assert stored['b']['photos']['photoQuantity'] == 5
+
+
+def test_forms_are_kept_apart(store):
+    store.upsert('f', [submission('a', '2024-01-01T00:00:00.000Z')])
+    store.upsert('g', [submission('a', '2024-01-01T00:00:00.000Z')])
+    store.set_watermark('f', '2024-01-01T00:00:00.000Z')
+    assert store.get_watermark('g') is None
+
+    assert store.delete('f', ['a', 'missing']) == 1
+    assert store.instance_ids('f') == []
+    assert store.instance_ids('g') == ['a']
+
+
+def test_set_watermark_keeps_the_later_one(store):
+    store.set_watermark('f', '2024-01-05T00:00:00.000Z')
+    store.set_watermark('f', '2024-01-01T00:00:00.000Z')
+    assert store.get_watermark('f') == '2024-01-05T00:00:00.000Z'
+    store.reset('f')
+    assert store.get_watermark('f') is None
+
+
+@pytest.fixture
+def synced(local_central, tmp_path):
+    """Runs main.sync_submissions against the local Central; returns (sync, store, rollups)."""
+    path = str(tmp_path / 'store.db')
+    store, rollups = SubmissionStore(path), RollupStore(path)
+
+    def sync(page_size=100):
+        reader = SubmissionReader(local_central.client, FORM_ID, page_size=page_size)
+        return sync_submissions(local_central.client, store, rollups, reader=reader)
+
+    yield sync, store, rollups
+    store.close()
+    rollups.close()
+
+
+def stored_photos(store):
+    return sum(record['photos']['photoQuantity'] for record in store.all_records(FORM_ID))
+
+
+def rollup_photos(rollups):
+    daily, _ = rollups.load(FORM_ID, rollups.submitters(FORM_ID))
+    return int(daily['photo_count'].sum())
+
+
+def test_second_sync_counts_nothing(synced, local_central):
+    sync, store, rollups = synced
+    assert sync() == 300
+    watermark = store.get_watermark(FORM_ID)
+
+    assert sync() == 0
+    assert store.get_watermark(FORM_ID) == watermark
+    assert store.count(FORM_ID) == 300
+    assert rollup_photos(rollups) == int(local_central.form.photo_quantity.sum())
+
+
+def test_edited_submission_is_resynced(synced, local_central):
+    sync, store, rollups = synced
+    sync()
+
+    local_central.edit(10, photo_quantity=local_central.form.photo_quantity[10] + 7)
+    assert sync() == 1
+    assert store.count(FORM_ID) == 300
+    assert stored_photos(store) == rollup_photos(rollups) == int(local_central.form.photo_quantity.sum())
+    assert store.get_watermark(FORM_ID) == record_watermark(local_central.form.record(10))
+
+
+def test_interrupted_sync_keeps_the_old_watermark(synced, local_central, monkeypatch):
+    sync, store, rollups = synced
+    pages = []
+    apply_delta = rollups.apply_delta
+
+    def crash_on_third_page(form_id, frame):
+        pages.append(len(frame))
+        if len(pages) == 3:
+            raise ConnectionError('connection reset')
+        return apply_delta(form_id, frame)
+
+    monkeypatch.setattr(rollups, 'apply_delta', crash_on_third_page)
+    with pytest.raises(ConnectionError):
+        sync()
+    assert store.get_watermark(FORM_ID) is None
+    monkeypatch.undo()
+
+    # the crashed page was stored before its rollups were applied, so the store is already complete
+    assert store.count(FORM_ID) == 300
+    assert sync() == 0
+    assert rollup_photos(rollups) == int(local_central.form.photo_quantity.sum())
+    watermark = store.get_watermark(FORM_ID)
+    assert watermark == max(record_watermark(r) for r in local_central.form.records(range(300)))
+
+    assert sync() == 0
+    assert store.get_watermark(FORM_ID) == watermark
+
+
+def test_submissions_deleted_on_central_are_dropped(synced, local_central):
+    sync, store, rollups = synced
+    sync()
+
+    deleted = local_central.form.instance_id(len(local_central.form) - 1)
+    local_central.delete_newest(1)
+    sync()
+    assert store.count(FORM_ID) == 299
+    assert deleted not in store.instance_ids(FORM_ID)
+    assert rollup_photos(rollups) == int(local_central.form.photo_quantity.sum())
@@ -0,0 +1,52 @@
+# test_typed_frames.py
+import pandas as pd
+
+from field_spec import PLOT_FIELDS, normalized_frame, project_frame
+from typed_frames import concat_frames, memory_report, narrow_integers
+
+RECORDS = [
+    {'__id': 'uuid:1', 'plot_id': 'p1', '__system': {'submitterName': 'ann'}},
+    {'__id': 'uuid:2', 'plot_id': 'p1', '__system': {'submitterName': 'ann'}},
+    {'__id': 'uuid:3', '__system': {'submitterName': 'bob'}},
+]
+
+
+def test_narrow_integers():
+    assert narrow_integers(pd.Series(['3', None, '120'])).tolist() == [3, 0, 120]
+    assert narrow_integers(pd.Series([1, 2])).dtype == 'int8'
+    assert narrow_integers(pd.Series([1.5, 2])).tolist() == [1.5, 2.0]
+    assert narrow_integers(pd.Series([], dtype=object)).empty
+
+
+def test_concat_keeps_categoricals_across_chunks():
+    chunks = [project_frame(RECORDS[:2], PLOT_FIELDS), project_frame(RECORDS[2:], PLOT_FIELDS)]
+    df = concat_frames(chunks)
+    assert isinstance(df['submitter'].dtype, pd.CategoricalDtype)
+    assert df['submitter'].tolist() == ['ann', 'ann', 'bob']
+    assert set(df['submitter'].cat.categories) == {'ann', 'bob'}
+
+
+def test_concat_of_no_chunks_keeps_the_columns():
+    df = concat_frames([pd.DataFrame()], columns=['submitter', 'plot_id'])
+    assert df.empty and list(df.columns) == ['submitter', 'plot_id']
+
+
+def test_normalized_frame_matches_json_normalize():
+    before = normalized_frame(RECORDS, PLOT_FIELDS)
+    assert list(before.columns) == ['submitter', 'plot_id']
+    assert before['submitter'].tolist() == ['ann', 'ann', 'bob']
+    assert before['plot_id'].tolist()[:2] == ['p1', 'p1'] and pd.isna(before['plot_id'][2])
+    assert before['submitter'].dtype == object
+    assert normalized_frame([], PLOT_FIELDS).empty
+
+
+def test_memory_report_compares_the_real_frames():
+    records = [dict(RECORDS[i % 2], __id=f'uuid:{i}') for i in range(1000)]
+    before, after = normalized_frame(records, PLOT_FIELDS), project_frame(records, PLOT_FIELDS)
+    report = memory_report(before, after)
+
+    assert report.loc['submitter', 'dtype_before'] == 'object'
+    assert report.loc['submitter', 'dtype_after'] == 'category'
+    assert report.loc['total', 'bytes_before'] == before.memory_usage(deep=True, index=False).sum()
+    assert report.loc['total', 'bytes_after'] == after.memory_usage(deep=True, index=False).sum()
+    assert report.loc['total', 'saved_pct'] > 50
@@ -0,0 +1,136 @@
+# test_warehouse.py
+import os
+from functools import partial
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import warehouse as warehouse_module
+from odk_payloads import FORM_ID
+from submission_reader import SubmissionReader
+from sync_store import record_watermark
+from warehouse import NO_DATE_PARTITION, Warehouse
+
+
+def rows(*items):
+    """A WAREHOUSE_FIELDS-shaped frame from (instance_id, submitter, today, plot_id, photo_count) tuples."""
+    frame = pd.DataFrame(items, columns=['instance_id', 'submitter', 'today', 'plot_id', 'photo_count'])
+    frame['today'] = pd.to_datetime(frame['today'])
+    frame['submitter'] = frame['submitter'].astype('category')
+    return frame
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    warehouse = Warehouse(str(tmp_path / 'warehouse'))
+    yield warehouse
+    warehouse.close()
+
+
+def partition_ids(warehouse, form_id, partition):
+    path = warehouse.partition_path(form_id, partition)
+    return sorted(pd.read_parquet(path)['instance_id']) if os.path.exists(path) else []
+
+
+def test_ingest_writes_one_partition_per_day(warehouse):
+    assert warehouse.ingest('f', rows(('a', 'ann', '2024-01-01', 'p1', 1), ('b', 'bob', '2024-01-01', 'p2', 2),
+                                      ('c', 'ann', '2024-01-02', 'p1', 3))) == 3
+    assert warehouse.partitions('f') == ['2024-01-01', '2024-01-02']
+    assert partition_ids(warehouse, 'f', '2024-01-01') == ['a', 'b']
+    assert warehouse.count('f') == 3
+
+
+def test_edit_moves_a_row_between_partitions(warehouse):
+    warehouse.ingest('f', rows(('a', 'ann', '2024-01-01', 'p1', 1), ('b', 'ann', '2024-01-01', 'p1', 2),
+                               ('c', 'ann', '2024-01-05', 'p2', 3)))
+    warehouse.ingest('f', rows(('a', 'ann', '2024-01-05', 'p1', 9), ('c', 'bob', '2024-01-09', 'p3', 3)))
+
+    assert partition_ids(warehouse, 'f', '2024-01-01') == ['b']
+    assert partition_ids(warehouse, 'f', '2024-01-05') == ['a']
+    assert partition_ids(warehouse, 'f', '2024-01-09') == ['c']
+    assert warehouse.count('f') == 3
+    assert warehouse.query('f', ['instance_id', 'photo_count'], start='2024-01-05', end='2024-01-06') \
+        .values.tolist() == [['a', 9]]
+
+
+def test_partition_left_empty_is_removed(warehouse):
+    warehouse.ingest('f', rows(('a', 'ann', '2024-01-01', 'p1', 1)))
+    warehouse.ingest('f', rows(('a', 'ann', '2024-01-02', 'p1', 1)))
+    assert not os.path.exists(warehouse.partition_path('f', '2024-01-01'))
+    assert warehouse.partitions('f') == ['2024-01-02']
+
+
+def test_later_duplicate_in_one_batch_wins(warehouse):
+    warehouse.ingest('f', rows(('a', 'ann', '2024-01-01', 'p1', 1), ('a', 'ann', '2024-01-01', 'p1', 4)))
+    assert warehouse.query('f', ['instance_id', 'photo_count']).values.tolist() == [['a', 4]]
+
+
+def test_undated_rows_get_their_own_partition(warehouse):
+    warehouse.ingest('f', rows(('a', 'ann', None, 'p1', 1)))
+    assert warehouse.partitions('f') == [NO_DATE_PARTITION]
+    assert warehouse.query('f', ['instance_id'])['instance_id'].tolist() == ['a']
+
+
+def test_empty_input(warehouse):
+    assert warehouse.ingest('f', rows()) == 0
+    assert warehouse.count('f') == 0
+    assert list(warehouse.query('f', ['instance_id', 'plot_id']).columns) == ['instance_id', 'plot_id']
+
+
+def test_queries_prune_partitions_through_the_index(warehouse):
+    warehouse.ingest('f', rows(('a', 'ann', '2024-01-01', 'p1', 1), ('b', 'bob', '2024-01-02', 'p2', 2),
+                               ('c', 'ann', '2024-01-03', 'p2', 3), ('d', 'ann', '2024-01-03', 'p3', 4)))
+    assert warehouse.partitions('f', submitters=['bob']) == ['2024-01-02']
+    assert warehouse.partitions('f', start='2024-01-02', end='2024-01-03') == ['2024-01-02']
+    assert warehouse.query('f', ['instance_id'], plot_ids=['p2'], submitters=['ann'])['instance_id'].tolist() == ['c']
+    assert warehouse.unique_plots_per_submitter('f').to_dict() == {'ann': 3, 'bob': 1}
+    assert warehouse.unique_plots_per_submitter('f', start='2024-01-03').to_dict() == {'ann': 2}
+
+
+def test_reset_drops_the_form(warehouse):
+    warehouse.ingest('f', rows(('a', 'ann', '2024-01-01', 'p1', 1)))
+    warehouse.ingest('g', rows(('a', 'ann', '2024-01-01', 'p1', 1)))
+    warehouse.reset('f')
+    assert warehouse.count('f') == 0 and warehouse.partitions('f') == []
+    assert partition_ids(warehouse, 'g', '2024-01-01') == ['a']
+
+
+def test_sync_pulls_only_changes(warehouse, local_central):
+    assert warehouse.sync(local_central.client, FORM_ID) == 300
+    watermark = warehouse.get_watermark(FORM_ID)
+    assert warehouse.count(FORM_ID) == 300
+
+    warehouse.sync(local_central.client, FORM_ID)
+    assert warehouse.get_watermark(FORM_ID) == watermark
+
+    local_central.edit(42, photo_quantity=999)
+    warehouse.sync(local_central.client, FORM_ID)
+    edited = warehouse.query(FORM_ID, ['instance_id', 'photo_count'])
+    assert edited.loc[edited['instance_id'] == local_central.form.instance_id(42), 'photo_count'].tolist() == [999]
+    assert warehouse.count(FORM_ID) == 300
+    assert warehouse.get_watermark(FORM_ID) == record_watermark(local_central.form.record(42))
+
+
+def test_interrupted_sync_writes_nothing(warehouse, local_central, monkeypatch):
+    monkeypatch.setattr(warehouse_module, 'SubmissionReader', partial(SubmissionReader, page_size=100))
+    seen = []
+    iter_pages = SubmissionReader.iter_pages
+
+    def drop_after_two_pages(self, *args, **kwargs):
+        for page in iter_pages(self, *args, **kwargs):
+            if len(seen) == 2:
+                raise ConnectionError('connection reset')
+            seen.append(page)
+            yield page
+
+    monkeypatch.setattr(SubmissionReader, 'iter_pages', drop_after_two_pages)
+    with pytest.raises(ConnectionError):
+        warehouse.sync(local_central.client, FORM_ID)
+    assert warehouse.count(FORM_ID) == 0
+    assert warehouse.partitions(FORM_ID) == []
+    assert warehouse.get_watermark(FORM_ID) is None
+
+    monkeypatch.undo()
+    assert warehouse.sync(local_central.client, FORM_ID) == 300
@@ -0,0 +1,203 @@
+# tracker_daemon.py
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from dotenv import load_dotenv
+
+from main import (DeadlineExceeded, collect_summary, email_body, initialize_odk_client, load_settings,
+                  publish_summary)
+from change_probe import ChangeProbe
+from http_cache import installed_cache
+from instrumentation import RunMetrics
+from email_outbox import OutboxSender, default_sender
+
+
+def every(hours: float = 0, minutes: float = 0) -> Callable[[datetime], datetime]:
+    """Cadence that fires at a fixed interval."""
+    interval = timedelta(hours=hours, minutes=minutes)
+    return lambda previous: previous + interval
+
+
+def daily_at(clock: str) -> Callable[[datetime], datetime]:
+    """Cadence that fires once a day at HH:MM local time."""
+    hour, minute = (int(part) for part in clock.split(':'))
+
+    def next_run(previous: datetime) -> datetime:
+        candidate = previous.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return candidate if candidate > previous else candidate + timedelta(days=1)
+    return next_run
+
+
+@dataclass
+class TrackerContext:
+    """State kept warm across runs: the ODK client (and its session), settings, recipients and the
+    email outbox sender.
+
+    The Google Sheets client is cached by sheet_sync.
+    """
+    client: object
+    settings: object
+    receiver_email: str
+    outbox: OutboxSender
+    fetch_lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def create(cls) -> 'TrackerContext':
+        load_dotenv()
+        # starting the sender also flushes anything a previous run left in the outbox
+        return cls(client=initialize_odk_client(), settings=load_settings(),
+                   receiver_email=os.getenv('RECEIVER_EMAIL'), outbox=default_sender())
+
+
+@dataclass
+class Job:
+    name: str
+    cadence: Callable[[datetime], datetime]
+    run: Callable[[TrackerContext, float], None]
+    deadline: float
+    run_immediately: bool = True
+    next_run: Optional[datetime] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    started_at: Optional[float] = None
+    overrun_reported: bool = False
+
+
+def summary_job(subject: str, skip_unchanged: bool = True,
+                metrics_job: str = 'summary') -> Callable[[TrackerContext, float], None]:
+    """Builds a job that fetches once, writes the sheet and then queues the email.
+
+    The three stages run one after another in the job's thread. They are not pipelined: the sheet
+    and the email show totals over the whole form, so nothing can be written until the fetch has
+    finished. The deadline is checked between fetched pages and before each write (see
+    main.publish_summary).
+
+    With skip_unchanged the run stops after the change probe when no submission was added, edited
+    or deleted since the last successful publish, and the skip is logged. Every run, skipped or
+    not, is recorded by instrumentation.RunMetrics under metrics_job.
+    """
+    def run(context: TrackerContext, deadline_at: float) -> None:
+        metrics = RunMetrics(metrics_job)
+        outcome = 'error'
+        try:
+            probe = ChangeProbe(context.client, context.settings.form_id, context.settings.project_id,
+                                target=context.settings.publish_target)
+            with metrics.stage('probe'):
+                status = probe.check()
+            if skip_unchanged and not status.changed:
+                probe.record_skip(status, subject)
+                print(f"💤 Nothing changed since the last update ({status.total} submissions), skipping.")
+                outcome = 'skipped'
+                return
+
+            print(f"🔁 Updating Image submissions summary ({status.reason})...")
+            # only one fetch stage at a time; a second job's publish/email may overlap with it
+            with context.fetch_lock:
+                result = collect_summary(context.client, context.settings, metrics=metrics, deadline_at=deadline_at)
+
+            # published in this thread, so the job keeps its lock until the sheet write has really finished
+            publish_summary(result, context.settings, metrics, deadline_at)
+
+            # only a published summary is announced; the outbox sends in the background and a newer
+            # summary replaces one still waiting to be sent
+            body = email_body(result, context.settings, metrics)
+            with metrics.stage('queue_email'):
+                context.outbox.queue(subject, body, context.receiver_email, coalesce_key=subject)
+            probe.mark_published(status, result.watermark)
+            outcome = 'ok'
+        finally:
+            metrics.finish(outcome)
+        cache = installed_cache(context.client)
+        if cache:
+            print(cache.report())
+    return run
+
+
+class TrackerDaemon:
+    """Runs several jobs on their own cadences in one long-lived process.
+
+    A job never overlaps with itself: if it is still running when it comes due again, that slot is
+    skipped. Slots are computed from the schedule, not from when the last run finished, so a slow run
+    does not push later runs back. Deadlines are checked between fetched pages and before each write;
+    a sheet write already under way is not interrupted, but each Sheets request times out after
+    sheet_sync.SHEETS_TIMEOUT seconds. The job keeps its lock until it returns, and the watchdog
+    reports any overrun.
+    """
+
+    def __init__(self, jobs: List[Job], context: Optional[TrackerContext] = None, poll_seconds: float = 5):
+        self.jobs = jobs
+        self.context = context or TrackerContext.create()
+        self.poll_seconds = poll_seconds
+        self.stop_event = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='tracker-job')
+
+    def _execute(self, job: Job) -> None:
+        job.started_at = time.monotonic()
+        job.overrun_reported = False
+        try:
+            job.run(self.context, job.started_at + job.deadline)
+            print(f"✅ {job.name} finished in {time.monotonic() - job.started_at:.1f}s")
+        except DeadlineExceeded as e:
+            print(f"⏰ {job.name} stopped: {e}")
+        except Exception as e:
+            print(f"❌ {job.name} failed: {e}")
+        finally:
+            job.started_at = None
+            job.lock.release()
+
+    def _dispatch(self, job: Job, now: datetime) -> None:
+        if job.lock.acquire(blocking=False):
+            self.pool.submit(self._execute, job)
+        else:
+            print(f"⏭️ {job.name} is still running, skipping the {now:%H:%M} slot")
+
+        next_run = job.cadence(job.next_run or now)
+        while next_run <= now:
+            next_run = job.cadence(next_run)
+        job.next_run = next_run
+
+    def _watchdog(self) -> None:
+        for job in self.jobs:
+            started = job.started_at
+            if started is not None and not job.overrun_reported and time.monotonic() - started > job.deadline:
+                job.overrun_reported = True
+                print(f"⚠️ {job.name} has been running for {time.monotonic() - started:.0f}s, "
+                      f"past its {job.deadline:.0f}s deadline")
+
+    def run_forever(self) -> None:
+        now = datetime.now()
+        for job in self.jobs:
+            job.next_run = now if job.run_immediately else job.cadence(now)
+            print(f"🕒 {job.name}: next run at {job.next_run:%Y-%m-%d %H:%M}")
+
+        try:
+            while not self.stop_event.is_set():
+                now = datetime.now()
+                for job in self.jobs:
+                    if job.next_run <= now:
+                        self._dispatch(job, now)
+                self._watchdog()
+                soonest = min(job.next_run for job in self.jobs)
+                self.stop_event.wait(min(self.poll_seconds, max(0.0, (soonest - datetime.now()).total_seconds())))
+        finally:
+            self.pool.shutdown(wait=True)
+            self.context.outbox.stop()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+
+HOURLY_JOB = dict(name='hourly summary', cadence=every(hours=1), deadline=45 * 60,
+                  run=summary_job("✅ ODK Summary Update", metrics_job='hourly'))
+DAILY_JOB = dict(name='daily summary', cadence=daily_at('17:30'), deadline=45 * 60,
+                 run=summary_job("✅Image Safari Photo Count Update", skip_unchanged=False, metrics_job='daily'),
+                 run_immediately=False)
+
+
+if __name__ == "__main__":
+    print("🕒 Tracker daemon started: hourly summary plus daily summary at 5:30 PM...")
+    TrackerDaemon([Job(**HOURLY_JOB), Job(**DAILY_JOB)]).run_forever()
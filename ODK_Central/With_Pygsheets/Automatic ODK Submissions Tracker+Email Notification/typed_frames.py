@@ -0,0 +1,58 @@
+# typed_frames.py
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+def narrow_integers(series: pd.Series, default: int = 0) -> pd.Series:
+    """Numeric values as the smallest integer dtype that holds all of them; missing ones become default."""
+    values = pd.to_numeric(series, errors='coerce').fillna(default)
+    if len(values) and (values % 1 != 0).any():
+        return values
+    return pd.to_numeric(values.astype('int64'), downcast='integer')
+
+
+def concat_frames(frames: Iterable[pd.DataFrame], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """pd.concat that keeps categoricals categorical when the chunks saw different categories."""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=list(columns or []))
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+
+    first = frames[0]
+    combined = {}
+    for column in first.columns:
+        parts = [frame[column] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            combined[column] = pd.Series(union_categoricals([part.array for part in parts]), name=column)
+        else:
+            combined[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(combined)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Per-column dtype and deep memory use of the same columns as json_normalize built them and as typed."""
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': before_bytes,
+        'dtype_after': after.dtypes.reindex(before.columns).astype(str),
+        'bytes_after': after_bytes.reindex(before.columns),
+    })
+    report.loc['total'] = ['', before_bytes.sum(), '', after_bytes.sum()]
+    report['saved_pct'] = (100 * (1 - report['bytes_after'] / report['bytes_before'].where(report['bytes_before'] > 0))
+                           ).round(1).fillna(0.0)
+    return report
+
+
+def print_memory_report(before: pd.DataFrame, after: pd.DataFrame) -> None:
+    report = memory_report(before, after)
+    total = report.loc['total']
+    print(f"🧠 Frame memory: {total['bytes_before'] / 2 ** 20:,.1f} MiB -> {total['bytes_after'] / 2 ** 20:,.1f} MiB "
+          f"({total['saved_pct']:.0f}% saved, {len(after):,} rows)")
+    for column, row in report.drop(index='total').iterrows():
+        print(f"  • {column}: {row['dtype_before']} {row['bytes_before'] / 1024:,.0f} KiB -> "
+              f"{row['dtype_after']} {row['bytes_after'] / 1024:,.0f} KiB")
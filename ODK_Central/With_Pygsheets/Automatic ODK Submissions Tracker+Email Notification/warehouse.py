@@ -0,0 +1,258 @@
+# warehouse.py
+import os
+import sqlite3
+import argparse
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+from urllib.parse import quote
+
+import pandas as pd
+from pyodk.client import Client
+
+from field_spec import WAREHOUSE_FIELDS
+from submission_reader import SubmissionReader
+from sync_store import WatermarkPass, later_watermark
+
+DEFAULT_WAREHOUSE_DIR = os.getenv('ODK_WAREHOUSE_DIR', os.path.join(os.path.dirname(__file__), 'output_files', 'warehouse'))
+INDEX_NAME = 'index.db'
+NO_DATE_PARTITION = 'unknown'
+INDEXED_COLUMNS = ['submitter', 'today', 'plot_id']
+
+
+def _day(value) -> str:
+    return value if isinstance(value, str) else pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def _in_clause(column: str, values: Sequence) -> str:
+    return f"{column} IN ({', '.join('?' * len(values))})"
+
+
+class Warehouse:
+    """Local columnar copy of submissions: one Parquet file per form and 'today' date, plus a SQLite
+    index of instance_id -> submitter, today, plot_id and partition.
+
+    Count-style questions are answered from the index alone; column reads only open the partitions
+    the index says can match.
+    """
+
+    def __init__(self, root: str = DEFAULT_WAREHOUSE_DIR):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.conn = sqlite3.connect(os.path.join(root, INDEX_NAME))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                form_id TEXT NOT NULL,
+                instance_id TEXT NOT NULL,
+                submitter TEXT,
+                today TEXT,
+                plot_id TEXT,
+                partition TEXT NOT NULL,
+                PRIMARY KEY (form_id, instance_id)
+            );
+            CREATE INDEX IF NOT EXISTS submissions_submitter ON submissions (form_id, submitter);
+            CREATE INDEX IF NOT EXISTS submissions_today ON submissions (form_id, today);
+            CREATE INDEX IF NOT EXISTS submissions_plot ON submissions (form_id, plot_id);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                form_id TEXT PRIMARY KEY,
+                watermark TEXT,
+                synced_at TEXT
+            );
+        """)
+
+    def partition_path(self, form_id: str, partition: str) -> str:
+        return os.path.join(self.root, quote(form_id, safe=''), f"today={partition}", 'part.parquet')
+
+    def get_watermark(self, form_id: str) -> Optional[str]:
+        row = self.conn.execute('SELECT watermark FROM sync_state WHERE form_id = ?', (form_id,)).fetchone()
+        return row[0] if row else None
+
+    def _set_watermark(self, form_id: str, latest: Optional[str]) -> None:
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO sync_state (form_id, watermark, synced_at) VALUES (?, ?, ?)',
+                              (form_id, later_watermark(self.get_watermark(form_id), latest),
+                               datetime.now().isoformat(timespec='seconds')))
+
+    def _write_partition(self, form_id: str, partition: str, frame: pd.DataFrame) -> None:
+        path = self.partition_path(form_id, partition)
+        if frame.empty:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            frame.to_parquet(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def ingest(self, form_id: str, frame: pd.DataFrame) -> int:
+        """Upserts rows projected with WAREHOUSE_FIELDS; every touched partition is rewritten once.
+
+        Each call rewrites whole partitions, so callers pass everything they have in one call rather
+        than batch by batch. The partitions are written (and synced to disk) before the index is
+        committed. The watermark is left to sync().
+        """
+        if frame.empty:
+            return 0
+        frame = frame.drop_duplicates('instance_id', keep='last').copy()
+        frame['submitter'] = frame['submitter'].astype(str)
+        partitions = frame['today'].dt.strftime('%Y-%m-%d').fillna(NO_DATE_PARTITION)
+
+        ids = frame['instance_id'].tolist()
+        self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS incoming (instance_id TEXT PRIMARY KEY)')
+        self.conn.execute('DELETE FROM incoming')
+        self.conn.executemany('INSERT INTO incoming VALUES (?)', [(i,) for i in ids])
+        previous = {p for (p,) in self.conn.execute(
+            'SELECT DISTINCT s.partition FROM submissions s JOIN incoming USING (instance_id) WHERE s.form_id = ?',
+            (form_id,))}
+
+        incoming_ids = set(ids)
+        for partition in sorted(previous | set(partitions)):
+            path = self.partition_path(form_id, partition)
+            parts = []
+            if os.path.exists(path):
+                existing = pd.read_parquet(path)
+                parts.append(existing[~existing['instance_id'].isin(incoming_ids)])
+            parts.append(frame[partitions == partition])
+            self._write_partition(form_id, partition, pd.concat(parts, ignore_index=True))
+
+        today = frame['today'].dt.strftime('%Y-%m-%d')
+        rows = zip([form_id] * len(frame), ids, frame['submitter'], today.where(today.notna(), None),
+                   frame['plot_id'].where(frame['plot_id'].notna(), None), partitions)
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO submissions VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return len(frame)
+
+    def sync(self, client: Client, form_id: str, project_id: Optional[int] = None, full: bool = False) -> int:
+        """Pulls new and edited submissions since the last sync (everything when full) into the warehouse.
+
+        The projected pages are kept in memory and ingested together once the pass is complete, so
+        each partition is written once per sync however many pages touch its day. An interrupted
+        sync writes nothing and keeps the old watermark (see WatermarkPass).
+        """
+        if full:
+            self.reset(form_id)
+        sync_pass = WatermarkPass(self.get_watermark(form_id))
+        reader = SubmissionReader(client, form_id, project_id)
+        frames = []
+        for frame in reader.iter_frames(sync_pass.odata_filter(), fields=WAREHOUSE_FIELDS):
+            sync_pass.see(pd.concat([frame['submission_date'], frame['updated_at']]).dropna())
+            frames.append(frame)
+        synced = self.ingest(form_id, pd.concat(frames, ignore_index=True)) if frames else 0
+        if synced:
+            self._set_watermark(form_id, sync_pass.watermark)
+        print(f"🏬 Warehouse: {synced} new/edited submissions of '{form_id}' synced, "
+              f"{self.count(form_id)} stored ({reader.bytes_read / 1024:.0f} KiB downloaded).")
+        return synced
+
+    def reset(self, form_id: str) -> None:
+        for partition in self.partitions(form_id):
+            self._write_partition(form_id, partition, pd.DataFrame())
+        with self.conn:
+            self.conn.execute('DELETE FROM submissions WHERE form_id = ?', (form_id,))
+            self.conn.execute('DELETE FROM sync_state WHERE form_id = ?', (form_id,))
+
+    def count(self, form_id: str) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM submissions WHERE form_id = ?', (form_id,)).fetchone()[0]
+
+    def partitions(self, form_id: str, start=None, end=None, submitters: Optional[Sequence[str]] = None,
+                   plot_ids: Optional[Sequence[str]] = None) -> List[str]:
+        """Partitions that can hold matching rows, found through the index; start inclusive, end exclusive."""
+        clauses, params = ['form_id = ?'], [form_id]
+        if start is not None:
+            clauses.append('today >= ?')
+            params.append(_day(start))
+        if end is not None:
+            clauses.append('today < ?')
+            params.append(_day(end))
+        if submitters:
+            clauses.append(_in_clause('submitter', submitters))
+            params.extend(submitters)
+        if plot_ids:
+            clauses.append(_in_clause('plot_id', plot_ids))
+            params.extend(plot_ids)
+        rows = self.conn.execute(f"SELECT DISTINCT partition FROM submissions WHERE {' AND '.join(clauses)} "
+                                 f"ORDER BY partition", params)
+        return [partition for (partition,) in rows]
+
+    def query(self, form_id: str, columns: Optional[Iterable[str]] = None, start=None, end=None,
+              submitters: Optional[Sequence[str]] = None, plot_ids: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Reads the requested columns of the matching rows from the pruned set of partitions."""
+        wanted = list(columns) if columns else [spec.column for spec in WAREHOUSE_FIELDS]
+        read = list(dict.fromkeys(wanted + INDEXED_COLUMNS))
+        paths = [self.partition_path(form_id, p) for p in self.partitions(form_id, start, end, submitters, plot_ids)]
+        paths = [path for path in paths if os.path.exists(path)]
+        if not paths:
+            return pd.DataFrame(columns=wanted)
+
+        frame = pd.concat([pd.read_parquet(path, columns=read) for path in paths], ignore_index=True)
+        mask = pd.Series(True, index=frame.index)
+        if start is not None:
+            mask &= frame['today'] >= pd.Timestamp(_day(start))
+        if end is not None:
+            mask &= frame['today'] < pd.Timestamp(_day(end))
+        if submitters:
+            mask &= frame['submitter'].isin(submitters)
+        if plot_ids:
+            mask &= frame['plot_id'].isin(plot_ids)
+        frame = frame.loc[mask, wanted].reset_index(drop=True)
+        for column in ('submitter', 'plot_id'):
+            if column in frame:
+                frame[column] = frame[column].astype('category')
+        return frame
+
+    def sql(self, query: str, params: Sequence = ()) -> pd.DataFrame:
+        """Runs an ad-hoc query against the index table 'submissions'."""
+        return pd.read_sql_query(query, self.conn, params=list(params))
+
+    def unique_plots_per_submitter(self, form_id: str, start=None, end=None) -> pd.Series:
+        """Distinct plot_ids per submitter, answered from the index without reading any Parquet."""
+        clauses, params = ['form_id = ?', 'plot_id IS NOT NULL'], [form_id]
+        if start is not None:
+            clauses.append('today >= ?')
+            params.append(_day(start))
+        if end is not None:
+            clauses.append('today < ?')
+            params.append(_day(end))
+        frame = self.sql(f"SELECT submitter, COUNT(DISTINCT plot_id) AS unique_plots FROM submissions "
+                         f"WHERE {' AND '.join(clauses)} GROUP BY submitter ORDER BY unique_plots DESC", params)
+        return frame.set_index('submitter')['unique_plots']
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def add_warehouse_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--warehouse', action='store_true',
+                        help="Read from the local warehouse after syncing only new/edited submissions into it.")
+    parser.add_argument('--offline', action='store_true',
+                        help="Read from the local warehouse without contacting Central.")
+
+
+def warehouse_frame(form_id: str, columns: Iterable[str], offline: bool = False, client: Optional[Client] = None,
+                    **filters) -> pd.DataFrame:
+    """Returns submission columns from the warehouse, syncing it first unless offline."""
+    warehouse = Warehouse()
+    try:
+        if not offline:
+            warehouse.sync(client or Client(), form_id)
+        return warehouse.query(form_id, columns, **filters)
+    finally:
+        warehouse.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the local submission warehouse or ask it a question.")
+    parser.add_argument('form_id')
+    parser.add_argument('--full', action='store_true', help="Drop the form's data and download it again.")
+    parser.add_argument('--offline', action='store_true', help="Skip syncing with Central.")
+    parser.add_argument('--since', help="Only count plots on or after this date (YYYY-MM-DD).")
+    args = parser.parse_args()
+
+    warehouse = Warehouse()
+    if not args.offline:
+        warehouse.sync(Client(), args.form_id, full=args.full)
+    print("\n🧮 Unique plots per submitter:")
+    print(warehouse.unique_plots_per_submitter(args.form_id, start=args.since))
+    warehouse.close()
@@ -1,9 +1,16 @@
 import os
-import pandas as pd
+import sys
 import pygsheets
 from pyodk.client import Client
 from dotenv import load_dotenv
 
+# Shared helpers live next to the tracker
+TRACKER_DIR = os.path.join(os.path.dirname(__file__), 'Automatic ODK Submissions Tracker+Email Notification')
+sys.path.append(TRACKER_DIR)
+from submission_reader import iter_submission_frames
+from field_spec import TRACKER_FIELDS
+from aggregation import combine_partials, group_daily, pivot_daily
+
 load_dotenv()
 
 sheet_name = os.getenv("SHEETNAME")
@@ -14,49 +21,21 @@ service_file = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE')
 # Initialize ODK client
 client = Client()
 
-# Fetch submissions
-data = client.submissions.get_table(form_id='Image Safari Crop Scout (Phone Approach)')
-records = data['value']
-
-# Normalize nested JSON
-df = pd.json_normalize(records)
-
-# Handle missing submitter names
-df['submitter'] = df['__system.submitterName'].fillna('unknown')
-
 allowed_sites = ['is_cimmyt', 'is_cip_ke', 'is_qed_mw']
 
-df = df[df['submitter'].isin(allowed_sites)]
-
-# Extract photo count and duration
-df['photo_count'] = df['photos.photoQuantity'].fillna(0).astype(int)
-df['duration'] = df['photos.photoSessionDuration'].fillna(0).astype(int)
+# Fetch submissions page by page and keep only per-page sums
+partials = []
+# Only the submitter, date, photo count and duration are requested and flattened;
+# missing submitter names come back as 'unknown' and missing counts as 0
+for chunk in iter_submission_frames(client, 'Image Safari Crop Scout (Phone Approach)', fields=TRACKER_FIELDS):
+    chunk = chunk[chunk['submitter'].isin(allowed_sites)]
+    partials.append(group_daily(chunk))
 
 # Group by date and submitter, then sum photo counts and durations
-grouped = df.groupby(['today', 'submitter'])[['photo_count', 'duration']].sum().reset_index()
-
-# Pivot both photo counts and durations
-pivot_counts = grouped.pivot(index='today', columns='submitter', values='photo_count').fillna(0).astype(int)
-pivot_duration = grouped.pivot(index='today', columns='submitter', values='duration').fillna(0).astype(int)
-
-# Format to hh:mm:ss
-def format_seconds_to_hhmmss(seconds):
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-    return f'{hours}:{minutes:02}:{secs:02}'
-
-pivot_duration = pivot_duration.applymap(format_seconds_to_hhmmss)
-
-# Optional: rename column levels for clarity
-pivot_counts.columns = [f'{col}_count' for col in pivot_counts.columns]
-pivot_duration.columns = [f'{col}_duration' for col in pivot_duration.columns]
-
-# Combine the two pivot tables side by side
-pivot_combined = pd.concat([pivot_counts, pivot_duration], axis=1)
+grouped = combine_partials(partials)
 
-# Sort columns for neatness
-pivot_combined = pivot_combined.reindex(sorted(pivot_combined.columns), axis=1)
+# Pivot counts and hh:mm:ss durations side by side, one column pair per submitter
+pivot_combined = pivot_daily(grouped)
 
 # Create output directory
 output_dir = os.path.join(os.path.dirname(__file__), 'output_files')
@@ -0,0 +1,229 @@
+import os
+import json
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+from pyodk.client import Client
+
+from tracker_path import add_tracker_path
+add_tracker_path()
+from http_cache import mount_pool
+from submission_reader import iter_submissions
+
+FORM_ID = 'Image Safari Crop Scout (Phone Approach)'
+CHUNK_SIZE = 256 * 1024
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def attachment_files(record, extension='.zip'):
+    """Attachment filenames among the values of a record's photos group."""
+    photos = record.get('photos') or {}
+    return [str(value) for value in photos.values() if value and str(value).endswith(extension)]
+
+
+def attachment_jobs(records, extension='.zip'):
+    """Lists the attachment files of the records, with the submission fields later checks need."""
+    jobs = []
+    for record in records:
+        photos = record.get('photos') or {}
+        meta = {
+            'submitter': (record.get('__system') or {}).get('submitterName'),
+            'plot_id': record.get('plot_id'),
+            'today': record.get('today'),
+            'photoQuantity': photos.get('photoQuantity'),
+            'photoSessionDuration': photos.get('photoSessionDuration'),
+        }
+        for filename in attachment_files(record, extension):
+            jobs.append({'instance_id': record['__id'], 'filename': filename, 'meta': meta})
+    return jobs
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_key(instance_id, filename):
+    """Attachments are only unique per submission; two instances can send the same filename."""
+    return f"{instance_id}/{filename}"
+
+
+def load_manifest(output_dir):
+    """Returns the latest manifest entry per submission attachment (see manifest_key)."""
+    entries = {}
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[manifest_key(entry['instance_id'], entry['filename'])] = entry
+    return entries
+
+
+def files_manifest(output_dir):
+    """Returns the latest manifest entry per file in the output directory."""
+    return {entry.get('local_name', entry['filename']): entry for entry in load_manifest(output_dir).values()}
+
+
+def content_range_total(header):
+    """N from a 'bytes */N' or 'bytes a-b/N' Content-Range header; None when unknown."""
+    total = (header or '').rpartition('/')[2].strip()
+    return int(total) if total.isdigit() else None
+
+
+class AttachmentDownloader:
+    """Downloads submission attachments with a bounded worker pool over one pooled session.
+
+    Files are streamed to disk in chunks, partial downloads (.part files) are resumed with a Range
+    request, files already on disk with the recorded size and hash are skipped, and every fetched
+    file is appended to a manifest.jsonl in the output directory. A file whose name another
+    submission already uses on disk is saved with the instance id in front of it.
+    """
+
+    def __init__(self, client, output_dir, form_id=FORM_ID, project_id=None, max_workers=8, verify_hash=False):
+        self.project_id = project_id or client.config.central.default_project_id
+        self.base_url = client.config.central.base_url.rstrip('/')
+        self.form_id = form_id
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.verify_hash = verify_hash
+
+        self.session = client.session
+        mount_pool(self.session, self.base_url, max_workers)
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest = load_manifest(output_dir)
+        # which submission each file on disk belongs to
+        self._owners = {entry.get('local_name', entry['filename']): entry['instance_id']
+                        for entry in self.manifest.values()}
+        self._lock = threading.Lock()
+
+    def url(self, job):
+        return (f"{self.base_url}/v1/projects/{self.project_id}/forms/{quote(self.form_id, safe='')}"
+                f"/submissions/{quote(job['instance_id'], safe='')}/attachments/{quote(job['filename'], safe='')}")
+
+    def local_name(self, job):
+        """File name on disk, claimed for the job's submission."""
+        with self._lock:
+            known = self.manifest.get(manifest_key(job['instance_id'], job['filename']))
+            if known:
+                return known.get('local_name', job['filename'])
+            if self._owners.setdefault(job['filename'], job['instance_id']) == job['instance_id']:
+                return job['filename']
+            name = f"{job['instance_id'].replace('uuid:', '').replace(':', '_')}_{job['filename']}"
+            self._owners[name] = job['instance_id']
+            return name
+
+    def _record(self, job, path, status):
+        entry = dict(job['meta'], filename=job['filename'], instance_id=job['instance_id'],
+                     local_name=os.path.basename(path), size=os.path.getsize(path), sha256=file_sha256(path),
+                     status=status, fetched_at=datetime.now().isoformat(timespec='seconds'))
+        with self._lock:
+            self.manifest[manifest_key(job['instance_id'], job['filename'])] = entry
+            with open(os.path.join(self.output_dir, MANIFEST_NAME), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+        return entry
+
+    def _already_present(self, job, path):
+        known = self.manifest.get(manifest_key(job['instance_id'], job['filename']))
+        if not known or not os.path.exists(path) or os.path.getsize(path) != known['size']:
+            return False
+        return not self.verify_hash or file_sha256(path) == known['sha256']
+
+    def download(self, job, resume=True):
+        """Fetches one attachment and returns its manifest entry; resume=False ignores any partial file."""
+        path = os.path.join(self.output_dir, self.local_name(job))
+        if self._already_present(job, path):
+            return dict(self.manifest[manifest_key(job['instance_id'], job['filename'])], status='skipped')
+
+        part_path = path + '.part'
+        offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        with self.session.get(self.url(job), headers=headers, stream=True) as response:
+            if response.status_code == 416 and offset:
+                if content_range_total(response.headers.get('Content-Range')) == offset:
+                    # the range starts right at the end of the attachment: the partial file is complete
+                    os.replace(part_path, path)
+                    return self._record(job, path, 'resumed')
+                # the partial file is longer than the attachment, so not a prefix of it; start over once,
+                # without a Range header, so this branch cannot be reached again
+                os.remove(part_path)
+                return self.download(job, resume=False)
+            response.raise_for_status()
+            if offset and response.status_code != 206:
+                offset = 0
+
+            expected = response.headers.get('Content-Length')
+            expected = int(expected) + offset if expected is not None else None
+            if not offset and expected is not None and os.path.exists(path) and os.path.getsize(path) == expected:
+                # present on disk from an earlier run without a manifest entry
+                return self._record(job, path, 'skipped')
+
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+
+        if expected is not None and os.path.getsize(part_path) != expected:
+            raise IOError(f"Incomplete download of {job['filename']}: "
+                          f"{os.path.getsize(part_path)} of {expected} bytes")
+        os.replace(part_path, path)
+        return self._record(job, path, 'resumed' if offset else 'downloaded')
+
+    def download_all(self, jobs):
+        """Downloads the jobs concurrently; failures are reported and left for the next run to resume."""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.download, job): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    entry = future.result()
+                    print(f"{'⏭️' if entry['status'] == 'skipped' else '✅'} {entry['status']}: {job['filename']}")
+                    results.append(entry)
+                except Exception as e:
+                    print(f"❌ Error downloading {job['filename']} from {job['instance_id']}: {e}")
+                    results.append(dict(job['meta'], filename=job['filename'], instance_id=job['instance_id'],
+                                        status='failed', error=str(e)))
+        return results
+
+
+def day_filter(day):
+    """OData $filter selecting the submissions received on one day (UTC)."""
+    start = datetime.strptime(day, '%Y-%m-%d')
+    end = start + timedelta(days=1)
+    return (f"__system/submissionDate ge {start:%Y-%m-%d}T00:00:00.000Z and "
+            f"__system/submissionDate lt {end:%Y-%m-%d}T00:00:00.000Z")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download all photo zips of the submissions received on a day.")
+    parser.add_argument('day', help="Submission date, YYYY-MM-DD")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--verify-hash', action='store_true', help="Re-hash existing files before skipping them")
+    args = parser.parse_args()
+
+    client = Client()
+    output_dir = os.path.join(os.path.dirname(__file__), 'output_files', 'photos', args.day)
+    downloader = AttachmentDownloader(client, output_dir, max_workers=args.workers, verify_hash=args.verify_hash)
+
+    jobs = attachment_jobs(iter_submissions(client, FORM_ID, odata_filter=day_filter(args.day)))
+    print(f"📥 {len(jobs)} attachment(s) submitted on {args.day}")
+    results = downloader.download_all(jobs)
+
+    fetched = sum(1 for r in results if r['status'] in ('downloaded', 'resumed'))
+    skipped = sum(1 for r in results if r['status'] == 'skipped')
+    failed = sum(1 for r in results if r['status'] == 'failed')
+    print(f"\n✅ {fetched} downloaded, {skipped} already present, {failed} failed -> {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
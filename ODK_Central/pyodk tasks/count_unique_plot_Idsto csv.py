@@ -1,22 +1,49 @@
 import pandas as pd
 import os
+import argparse
+import xlsxwriter
 from pyodk.client import Client
 
-def fetch_records(form_id):
-    """Fetches submission records from the ODK Central server."""
+from tracker_path import add_tracker_path
+add_tracker_path()
+from submission_reader import iter_submission_frames
+from field_spec import PLOT_FIELDS
+from warehouse import add_warehouse_arguments, warehouse_frame
+from typed_frames import concat_frames, print_memory_report
+from photo_dedupe import DUPLICATES_REPORT
+from plot_stats import (iter_submitter_tables, plot_counts_by_submitter, sheet_name_for, submitter_plot_stats,
+                        submitter_sheet_tables)
+from plot_sketches import load_sketches, sketch_stats
+
+def fetch_plot_frame(form_id, warehouse=False, offline=False, memory_report=False):
+    """Streams submissions from the ODK Central server, requesting only the submitter and plot columns.
+
+    With warehouse (or offline) the columns are read from the local warehouse instead. memory_report
+    prints the frame's memory next to the one json_normalize builds from the same pages.
+    """
+    columns = [spec.column for spec in PLOT_FIELDS]
+    if warehouse or offline:
+        if memory_report:
+            print("ℹ️ --memory-report measures the pages fetched from Central; skipped for warehouse reads")
+        return warehouse_frame(form_id, columns, offline=offline)
     client = Client()
     project_id = client.config.central.default_project_id
-    records = client.submissions.get_table(project_id=project_id, form_id=form_id)['value']
-    return records
+    untyped = [] if memory_report else None
+    chunks = iter_submission_frames(client, form_id, project_id=project_id, fields=PLOT_FIELDS, untyped=untyped)
+    # submitter and plot_id stay categorical across pages instead of falling back to object
+    df = concat_frames(chunks, columns=columns)
+    if memory_report:
+        print_memory_report(concat_frames(untyped, columns=columns), df)
+    return df
 
 def analyze_global_stats(df):
     """Prints overall statistics about plot submissions."""
-    submitter_names = df['__system.submitterName'].dropna().unique()
+    submitter_names = df['submitter'].dropna().unique()
     print(f"Unique submitter names: {len(submitter_names)}")
     for name in submitter_names:
         print(name)
 
-    unique_plot_counts = df.groupby('__system.submitterName')['plot_id'].nunique().reset_index()
+    unique_plot_counts = df.groupby('submitter', observed=True)['plot_id'].nunique().reset_index()
     print("\nUnique plot counts by submitter:")
     print(unique_plot_counts)
 
@@ -32,82 +59,163 @@ def analyze_global_stats(df):
     
     return submitter_names
 
+def analyze_sketch_stats(per_submitter, overall):
+    """Prints the same overview as analyze_global_stats, estimated from the stored sketches.
+
+    Sketches only keep the heaviest plots, so the least repeated plot is left to the exact mode.
+    """
+    submitter_names = sorted(per_submitter)
+    print(f"Unique submitter names: {len(submitter_names)}")
+    for name in submitter_names:
+        print(name)
+
+    unique_plot_counts = pd.DataFrame({'submitter': submitter_names,
+                                       'plot_id': [per_submitter[n].unique_plots() for n in submitter_names]})
+    print("\nUnique plot counts by submitter (approximate):")
+    print(unique_plot_counts)
+
+    unique = overall.unique_plots()
+    top = overall.top(1)
+    if top:
+        print(f"\nMost repeated plot ID: {top[0][0]} (≈{top[0][1]} times, at most "
+              f"{overall.error_bound():.0f} too high)")
+    if unique:
+        print(f"Average number of repetitions of a plot ID: ≈{overall.rows / unique:.2f}")
+
+    return submitter_names
+
 def create_output_directory():
     """Ensures output directory exists and returns its path."""
     output_dir = os.path.join(os.path.dirname(__file__), 'output_files')
     os.makedirs(output_dir, exist_ok=True)
     return output_dir
 
-def generate_submitter_reports(df, submitter_names, output_file):
+STATS_LABELS = [
+    ('Total Submissions', 'total_submissions'),
+    ('Unique Plot IDs', 'unique_plots'),
+    ('Most Frequent Plot ID', 'most_frequent_plot'),
+    ('Most Frequent Count', 'most_frequent_count'),
+    ('Least Frequent Count', 'least_frequent_count'),
+    ('Average Submissions per Plot', 'average_submissions'),
+]
+
+# Added from photo_dedupe.py's per-submitter report with --duplicates
+DUPLICATE_LABELS = [
+    ('Photos Checked for Duplicates', 'photos'),
+    ('Duplicate Photos', 'duplicate_photos'),
+    ('Duplicate Photos under Another Plot', 'cross_plot_duplicates'),
+]
+
+# Sketch mode: counts are estimates, with the Count-Min error bound alongside
+SKETCH_LABELS = [
+    ('Total Submissions', 'total_submissions'),
+    ('Unique Plot IDs (approx.)', 'unique_plots'),
+    ('Most Frequent Plot ID', 'most_frequent_plot'),
+    ('Most Frequent Count (approx.)', 'most_frequent_count'),
+    ('Average Submissions per Plot (approx.)', 'average_submissions'),
+    ('Count Error (at most, 98%)', 'count_error'),
+]
+SKETCH_TOP = 20
+
+def iter_sheets(df, submitter_names, duplicates=None):
+    """Yields (submitter, left rows, right rows) in submitter_names order from one grouped pass.
+
+    duplicates (photo_dedupe.py's per-submitter report) adds its counts to each stats table.
+    """
+    counts = plot_counts_by_submitter(df)
+    stats = submitter_plot_stats(df, counts)
+    labels = STATS_LABELS
+    if duplicates is not None:
+        columns = [key for _, key in DUPLICATE_LABELS]
+        stats = stats.join(duplicates[columns])
+        stats[columns] = stats[columns].fillna(0).astype(int)
+        labels = STATS_LABELS + DUPLICATE_LABELS
+    stats = stats.astype(object)
+    tables = dict(iter_submitter_tables(counts))
+    for name in (str(n) for n in submitter_names):
+        if name in tables:
+            yield submitter_sheet_tables(name, tables[name], stats.loc[name].to_dict(), labels)
+
+def iter_sketch_sheets(per_submitter, submitter_names, top=SKETCH_TOP):
+    """Yields (submitter, most repeated plots, estimated stats) from the per-submitter sketches."""
+    stats = sketch_stats(per_submitter).astype(object)
+    for name in submitter_names:
+        plots = pd.DataFrame(per_submitter[name].top(top), columns=['plot_id', 'submission_count'])
+        yield submitter_sheet_tables(name, plots, stats.loc[name].to_dict(), SKETCH_LABELS)
+
+def generate_submitter_reports(df, submitter_names, output_file, duplicates=None):
     """Generates an Excel file with pivoted plot counts and side-by-side statistics for each submitter."""
+    write_report(iter_sheets(df, submitter_names, duplicates), output_file)
+
+def write_report(sheets, output_file):
+    """Writes (submitter, left rows, right rows) sheets side by side.
+
+    Rows are streamed with xlsxwriter's constant_memory mode, so memory stays flat however many
+    plots a submitter has.
+    """
     if os.path.exists(output_file):
         os.remove(output_file)
 
-    with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
-        for name in submitter_names:
-            submitter_df = df[df['__system.submitterName'] == name]
-            plot_counts = submitter_df['plot_id'].value_counts().reset_index()
-            plot_counts.columns = ['plot_id', 'submission_count']
-
-            # Pivot-style table
-            pivot_df = plot_counts.set_index('plot_id')
-
-            # Stats table
-            total_submissions = len(submitter_df)
-            unique_plots = len(pivot_df)
-            most_frequent_plot = pivot_df['submission_count'].idxmax()
-            most_frequent_count = pivot_df['submission_count'].max()
-            least_frequent_count = pivot_df['submission_count'].min()
-            average_submissions = pivot_df['submission_count'].mean()
-
-            stats_df = pd.DataFrame({
-                'Metric': [
-                    'Total Submissions',
-                    'Unique Plot IDs',
-                    'Most Frequent Plot ID',
-                    'Most Frequent Count',
-                    'Least Frequent Count',
-                    'Average Submissions per Plot'
-                ],
-                'Value': [
-                    total_submissions,
-                    unique_plots,
-                    most_frequent_plot,
-                    most_frequent_count,
-                    least_frequent_count,
-                    round(average_submissions, 2)
-                ]
-            })
-
-            # Clean Excel sheet name
-            sheet_name = name[:31].replace('/', '_').replace('\\', '_')
-
-            # Write to Excel sheet side by side
-            pivot_df.reset_index().to_excel(writer, sheet_name=sheet_name, startrow=0, startcol=0, index=False)
-            stats_df.to_excel(writer, sheet_name=sheet_name, startrow=0, startcol=3, index=False)
-
-            # Excel formatting
-            worksheet = writer.sheets[sheet_name]
+    workbook = xlsxwriter.Workbook(output_file, {'constant_memory': True})
+    header = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+    used = set()
+    try:
+        for name, left, right in sheets:
+            sheet_name = sheet_name_for(name, used)
+            used.add(sheet_name.lower())
+            worksheet = workbook.add_worksheet(sheet_name)
             worksheet.freeze_panes(1, 0)
             worksheet.set_column('A:B', 22)
             worksheet.set_column('D:E', 28)
 
+            # constant_memory only keeps the current row, so both tables are written row by row together
+            for row in range(max(len(left), len(right))):
+                fmt = header if row == 0 else None
+                if row < len(left):
+                    worksheet.write_row(row, 0, left[row], fmt)
+                if row < len(right):
+                    worksheet.write_row(row, 3, right[row], fmt)
+    finally:
+        workbook.close()
+
 def main():
+    parser = argparse.ArgumentParser(description="Excel report of plot counts per submitter.")
+    add_warehouse_arguments(parser)
+    parser.add_argument('--memory-report', action='store_true',
+                        help="Print how much memory the typed columns save over json_normalize's")
+    parser.add_argument('--duplicates', nargs='?', const=DUPLICATES_REPORT,
+                        help="Add photo_dedupe.py's per-submitter duplicate counts to the stats tables")
+    parser.add_argument('--stats', choices=['exact', 'sketch'], default='exact',
+                        help="sketch estimates the statistics from plot_sketches.py's stored sketches "
+                             "instead of downloading every submission; exact is for audits")
+    parser.add_argument('--days', type=int, help="With --stats sketch, only the last N days")
+    args = parser.parse_args()
+
     form_id = 'Image Safari Crop Scout (Phone Approach)'
+    output_dir = create_output_directory()
+    if args.stats == 'sketch':
+        print("Updating plot sketches...")
+        per_submitter, overall = load_sketches(form_id, args.days, update=not args.offline)
+        print("Analyzing global statistics...")
+        submitter_names = analyze_sketch_stats(per_submitter, overall)
+        output_file = os.path.join(output_dir, 'submitter_plot_counts_sketch.xlsx')
+        print(f"Generating Excel reports in {output_file} ...")
+        write_report(iter_sketch_sheets(per_submitter, submitter_names), output_file)
+        print("Done.")
+        return
+
     print("Fetching records...")
-    records = fetch_records(form_id)
-    
-    print("Normalizing records into a DataFrame...")
-    df = pd.json_normalize(records)
+    df = fetch_plot_frame(form_id, warehouse=args.warehouse, offline=args.offline, memory_report=args.memory_report)
 
     print("Analyzing global statistics...")
     submitter_names = analyze_global_stats(df)
 
-    output_dir = create_output_directory()
     output_file = os.path.join(output_dir, 'submitter_plot_counts.xlsx')
 
+    duplicates = pd.read_csv(args.duplicates, index_col='submitter') if args.duplicates else None
+
     print(f"Generating Excel reports in {output_file} ...")
-    generate_submitter_reports(df, submitter_names, output_file)
+    generate_submitter_reports(df, submitter_names, output_file, duplicates=duplicates)
     print("Done.")
 
 if __name__ == "__main__":
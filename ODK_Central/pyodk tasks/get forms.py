@@ -1,9 +1,15 @@
 from pyodk.client import Client
 
+from tracker_path import add_tracker_path
+add_tracker_path()
+from http_cache import install_cache
+
 client = Client()
+cache = install_cache(client)
 
 forms = client.forms.list()
 
 if (forms):
     print("forms are present")
-    print(forms)
\ No newline at end of file
+    print(forms)
+print(cache.report())
\ No newline at end of file
@@ -1,14 +1,19 @@
 from pyodk.client import Client
 
+from tracker_path import add_tracker_path
+add_tracker_path()
+from submission_stats import SubmissionStats
+from ndjson_export import export_submissions
+
 client = Client()
 
-Submission_count = client.submissions.get_table(form_id='Image Safari Crop Scout (Phone Approach)')
+form_id = 'Image Safari Crop Scout (Phone Approach)'
+
+# Ask Central for the number of submissions only ($count=true&$top=0), no submission bodies
+total_submissions = SubmissionStats(client, form_id).count()
 
-if Submission_count:
+if total_submissions:
     print("sobmissions are available")
-    # print(Submission_count)
-    print("Total submissions:", len(Submission_count))
-    # otuput submission in json file
-    with open('submissions.json', 'w') as f:
-        import json
-        json.dump(Submission_count, f, indent=4)
\ No newline at end of file
+    print("Total submissions:", total_submissions)
+    # Stream the submissions page by page into compressed NDJSON instead of one in-memory JSON dump
+    export_submissions(client, form_id, 'submissions.ndjson.gz')
\ No newline at end of file
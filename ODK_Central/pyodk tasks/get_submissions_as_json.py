@@ -1,15 +1,31 @@
 import os
+import sys
 import json
+import argparse
 from pyodk.client import Client
 
+from ndjson_export import EXTENSIONS, default_export_path, export_submissions
+
+parser = argparse.ArgumentParser(description="Save a form's submissions to disk.")
+parser.add_argument('--format', choices=['json'] + sorted(EXTENSIONS), default='json',
+                    help="json writes one pretty-printed file; gzip/zstd stream compressed NDJSON, parquet writes parts")
+parser.add_argument('--full', action='store_true', help="Start the streamed export over instead of appending to it")
+args = parser.parse_args()
+
 client = Client()
 
 form_id = 'Image Safari Crop Scout (Phone Approach)'
-submissions = client.submissions.get_table(form_id=form_id)
 
 output_dir = os.path.join(os.path.dirname(__file__), 'output_files')
 os.makedirs(output_dir, exist_ok=True)
 
+if args.format != 'json':
+    # Streamed page by page; only the submissions added or edited since the last export are appended
+    export_submissions(client, form_id, default_export_path(form_id, args.format), full=args.full)
+    sys.exit(0)
+
+submissions = client.submissions.get_table(form_id=form_id)
+
 # output file path
 output_file_path = os.path.join(output_dir, "submissions.json")
 
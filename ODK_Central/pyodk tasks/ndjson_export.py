@@ -0,0 +1,210 @@
+import io
+import os
+import json
+import gzip
+import argparse
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+from pyodk.client import Client
+
+from tracker_path import add_tracker_path
+add_tracker_path()
+from submission_reader import SubmissionReader
+from sync_store import WatermarkPass
+from field_spec import project_frame
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORM_ID = 'Image Safari Crop Scout (Phone Approach)'
+EXPORT_DIR = os.path.join(os.path.dirname(__file__), 'output_files', 'exports')
+EXTENSIONS = {'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst', 'parquet': '.parquet.d'}
+
+
+def encode_lines(records):
+    """Encodes records as NDJSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return b''.join(orjson.dumps(record) + b'\n' for record in records)
+    return ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                   for record in records).encode('utf-8')
+
+
+def decode_line(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def codec_for(path):
+    """Works out the format of an export from its file name."""
+    for codec, extension in EXTENSIONS.items():
+        if path.endswith(extension):
+            return codec
+    raise ValueError(f"Unknown export format for {path}; expected one of {', '.join(EXTENSIONS.values())}")
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise ImportError("The 'zstandard' package is required for .ndjson.zst exports (pip install zstandard)")
+
+
+def compress(data, codec):
+    """Compresses one page as a self-contained gzip member or zstd frame, so pages can be appended."""
+    if codec == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    _require_zstd()
+    return zstandard.ZstdCompressor(level=6).compress(data)
+
+
+def state_path(path):
+    return path.rstrip('/\\') + '.state.json'
+
+
+def load_state(path):
+    if os.path.exists(state_path(path)):
+        with open(state_path(path), encoding='utf-8') as f:
+            return json.load(f)
+    return {'watermark': None, 'pending': None, 'records': 0, 'pages': 0, 'bytes': 0}
+
+
+def save_state(path, state):
+    tmp_path = state_path(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path(path))
+
+
+def export_submissions(client, form_id, path, project_id=None, page_size=1000, full=False):
+    """Appends the form's new and edited submissions to an NDJSON (.gz/.zst) or Parquet export.
+
+    Each page is written as its own gzip member, zstd frame or Parquet part and then checkpointed
+    together with the file's committed size, so an interrupted export drops any half-written page and
+    resumes where it stopped, and later runs only append what changed since the last completed one.
+    Edited submissions are appended again; the last copy of an __id wins.
+    """
+    codec = codec_for(path)
+    if full:
+        if codec == 'parquet' and os.path.isdir(path):
+            for name in os.listdir(path):
+                os.remove(os.path.join(path, name))
+        elif os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(state_path(path)):
+            os.remove(state_path(path))
+    if codec == 'zstd':
+        _require_zstd()
+
+    state = load_state(path)
+    sync_pass = WatermarkPass(state['watermark'])
+    if state['pending'] is None:
+        state['pending'] = {'filter': sync_pass.odata_filter(), 'skip': 0, 'watermark': state['watermark'],
+                            'started_at': datetime.now().isoformat(timespec='seconds')}
+    else:
+        print(f"↩️ Resuming the interrupted export after {state['pending']['skip']} record(s)")
+    pending = state['pending']
+    # a resumed pass carries on from the stamps its finished pages already saw
+    sync_pass.see([pending['watermark']])
+
+    os.makedirs(path if codec == 'parquet' else os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    committed = state.get('bytes')
+    if codec != 'parquet' and committed is not None and os.path.exists(path) and os.path.getsize(path) > committed:
+        print(f"✂️ Dropping {os.path.getsize(path) - committed} byte(s) of a page that was not checkpointed")
+        with open(path, 'r+b') as f:
+            f.truncate(committed)
+    reader = SubmissionReader(client, form_id, project_id, page_size)
+    written = 0
+    for page in reader.iter_pages(odata_filter=pending['filter'], skip=pending['skip']):
+        if codec == 'parquet':
+            part = os.path.join(path, f"part-{state['pages']:06d}.parquet")
+            pd.json_normalize(page).to_parquet(part, index=False)
+        else:
+            with open(path, 'ab') as f:
+                f.write(compress(encode_lines(page), codec))
+                f.flush()
+                os.fsync(f.fileno())
+                state['bytes'] = f.tell()
+
+        sync_pass.see_records(page)
+        pending['watermark'] = sync_pass.watermark
+        pending['skip'] += len(page)
+        state['records'] += len(page)
+        state['pages'] += 1
+        written += len(page)
+        save_state(path, state)
+
+    state['watermark'] = sync_pass.watermark
+    state['pending'] = None
+    state['exported_at'] = datetime.now().isoformat(timespec='seconds')
+    save_state(path, state)
+    print(f"✅ Exported {written} submission(s) in {reader.pages_read} page(s) "
+          f"({reader.bytes_read / 1024:.0f} KiB downloaded) -> {path}")
+    return written
+
+
+def _open_lines(path, codec):
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    _require_zstd()
+    raw = open(path, 'rb')
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True))
+
+
+def iter_chunks(path, chunk_size=10000):
+    """Lazily yields lists of up to chunk_size records from an export."""
+    codec = codec_for(path)
+    if codec == 'parquet':
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.parquet'):
+                records = pd.read_parquet(os.path.join(path, name)).to_dict('records')
+                for start in range(0, len(records), chunk_size):
+                    yield records[start:start + chunk_size]
+        return
+
+    chunk = []
+    with _open_lines(path, codec) as f:
+        for line in f:
+            if line.strip():
+                chunk.append(decode_line(line))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_records(path):
+    for chunk in iter_chunks(path):
+        yield from chunk
+
+
+def iter_frames(path, chunk_size=10000, fields=None):
+    """Yields one DataFrame per chunk, flattened with json_normalize or projected to the given FieldSpecs."""
+    for chunk in iter_chunks(path, chunk_size):
+        yield project_frame(chunk, fields) if fields else pd.json_normalize(chunk)
+
+
+def default_export_path(form_id, codec='gzip'):
+    return os.path.join(EXPORT_DIR, quote(form_id, safe='') + EXTENSIONS[codec])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a form's submissions into a compressed NDJSON or Parquet export.")
+    parser.add_argument('--form', default=FORM_ID)
+    parser.add_argument('--codec', choices=sorted(EXTENSIONS), default='gzip')
+    parser.add_argument('--output', help="Export path; the extension selects the format")
+    parser.add_argument('--full', action='store_true', help="Start a fresh export instead of appending")
+    args = parser.parse_args()
+
+    path = args.output or default_export_path(args.form, args.codec)
+    export_submissions(Client(), args.form, path, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import io
+import os
+import sqlite3
+import zipfile
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from attachment_downloader import files_manifest
+from verify_photo_zips import IMAGE_EXTENSIONS, image_kind
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), 'output_files')
+DEFAULT_DIR = os.path.join(OUTPUT_DIR, 'sample_photos')
+# Read by count_unique_plot_Idsto csv.py --duplicates
+DUPLICATES_REPORT = os.path.join(OUTPUT_DIR, 'photo_duplicates_by_submitter.csv')
+INDEX_NAME = 'photo_hashes.db'
+MAX_DISTANCE = 8  # differing bits out of 64 still counted as the same photo
+
+
+def default_method():
+    return 'dhash' if Image is not None else 'exact'
+
+
+def dhash(data, size=8):
+    """64-bit difference hash: whether each pixel of a downscaled grey image is brighter than its right neighbour."""
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft('L', (size * 8, size * 8))  # lets JPEG decode at a fraction of full size
+        pixels = list(image.convert('L').resize((size + 1, size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def exact_hash(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def hash_zip(path, method):
+    """(member name, 64-bit hash) for every image in a zip, read in memory."""
+    hashes = []
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or '__MACOSX' in info.filename:
+                    continue
+                data = archive.read(info)
+                if not info.filename.lower().endswith(IMAGE_EXTENSIONS) and image_kind(data) is None:
+                    continue
+                try:
+                    hashes.append((info.filename, dhash(data) if method == 'dhash' else exact_hash(data)))
+                except Exception:
+                    # undecodable images are reported by verify_photo_zips.py
+                    continue
+    except (zipfile.BadZipFile, OSError, EOFError):
+        pass
+    return path, hashes
+
+
+def _signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance; a radius search only visits branches that can match."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        node = [value, [item], {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = bin(current[0] ^ value).count('1')
+            if distance == 0:
+                current[1].append(item)
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value, radius):
+        """(distance, item) of everything within radius bits of value."""
+        if self.root is None:
+            return []
+        found, stack = [], [self.root]
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = bin(node_value ^ value).count('1')
+            if distance <= radius:
+                found.extend((distance, item) for item in items)
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+class PhotoHashIndex:
+    """Perceptual hashes of every photo inside the downloaded zips, kept in SQLite so each run only
+    hashes zips it has not seen."""
+
+    def __init__(self, directory, method=None):
+        self.directory = directory
+        self.method = method or default_method()
+        self.conn = sqlite3.connect(os.path.join(directory, INDEX_NAME))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS hashed_zips (
+                filename TEXT NOT NULL,
+                method TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (filename, method)
+            );
+            CREATE TABLE IF NOT EXISTS photos (
+                filename TEXT NOT NULL,
+                member TEXT NOT NULL,
+                method TEXT NOT NULL,
+                hash INTEGER NOT NULL,
+                instance_id TEXT,
+                submitter TEXT,
+                plot_id TEXT,
+                today TEXT,
+                PRIMARY KEY (filename, member, method)
+            );
+        """)
+
+    def pending(self):
+        """Zips that are new or changed size since they were hashed."""
+        known = dict(self.conn.execute('SELECT filename, size FROM hashed_zips WHERE method = ?', (self.method,)))
+        return [name for name in sorted(os.listdir(self.directory))
+                if name.endswith('.zip') and known.get(name) != os.path.getsize(os.path.join(self.directory, name))]
+
+    def update(self, workers=None):
+        """Hashes the pending zips across a process pool; returns how many were hashed."""
+        names = self.pending()
+        if not names:
+            return 0
+        manifest = files_manifest(self.directory)
+        workers = workers or os.cpu_count() or 1
+        paths = [os.path.join(self.directory, name) for name in names]
+        if workers > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(hash_zip, paths, [self.method] * len(paths),
+                                   chunksize=max(1, len(paths) // (workers * 8)))
+                for path, hashes in results:
+                    self._store(path, hashes, manifest)
+        else:
+            for path in paths:
+                self._store(*hash_zip(path, self.method), manifest)
+        return len(names)
+
+    def _store(self, path, hashes, manifest):
+        name = os.path.basename(path)
+        meta = manifest.get(name) or {}
+        with self.conn:
+            self.conn.execute('DELETE FROM photos WHERE filename = ? AND method = ?', (name, self.method))
+            self.conn.executemany('INSERT INTO photos VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+                (name, member, self.method, _signed(value), meta.get('instance_id'), meta.get('submitter'),
+                 meta.get('plot_id'), meta.get('today'))
+                for member, value in hashes
+            ])
+            self.conn.execute('INSERT OR REPLACE INTO hashed_zips VALUES (?, ?, ?)',
+                              (name, self.method, os.path.getsize(path)))
+
+    def photos(self):
+        frame = pd.read_sql_query('SELECT filename, member, hash, instance_id, submitter, plot_id, today '
+                                  'FROM photos WHERE method = ? ORDER BY filename, member',
+                                  self.conn, params=[self.method])
+        frame['hash'] = frame['hash'].map(_unsigned)
+        return frame
+
+    def duplicate_pairs(self, max_distance=MAX_DISTANCE):
+        """Pairs of photos from different zips (so different submissions) within max_distance bits of each other."""
+        if self.method == 'exact':
+            max_distance = 0
+        photos = self.photos()
+        tree = BKTree()
+        pairs = []
+        for row in photos.itertuples(index=False):
+            # each photo is looked up before it is added, so every pair is found once
+            for distance, other in tree.search(row.hash, max_distance):
+                if other.filename != row.filename:
+                    pairs.append({
+                        'filename': other.filename, 'member': other.member, 'instance_id': other.instance_id,
+                        'submitter': other.submitter, 'plot_id': other.plot_id, 'today': other.today,
+                        'dup_filename': row.filename, 'dup_member': row.member, 'dup_instance_id': row.instance_id,
+                        'dup_submitter': row.submitter, 'dup_plot_id': row.plot_id, 'dup_today': row.today,
+                        'distance': distance,
+                    })
+            tree.add(row.hash, row)
+        pairs = pd.DataFrame(pairs, columns=[
+            'filename', 'member', 'instance_id', 'submitter', 'plot_id', 'today', 'dup_filename', 'dup_member',
+            'dup_instance_id', 'dup_submitter', 'dup_plot_id', 'dup_today', 'distance'])
+        pairs['cross_plot'] = pairs['plot_id'] != pairs['dup_plot_id']
+        return photos, pairs
+
+    def close(self):
+        self.conn.close()
+
+
+def submitter_report(photos, pairs):
+    """Per-submitter photo counts, photos that reappear in another submission, and those under another plot_id."""
+    # each pair counts for the photos on both of its sides
+    sides = pd.concat([
+        pairs[['submitter', 'filename', 'member', 'cross_plot', 'dup_submitter']]
+        .rename(columns={'dup_submitter': 'other_submitter'}),
+        pairs[['dup_submitter', 'dup_filename', 'dup_member', 'cross_plot', 'submitter']]
+        .rename(columns={'dup_submitter': 'submitter', 'dup_filename': 'filename', 'dup_member': 'member',
+                         'submitter': 'other_submitter'}),
+    ], ignore_index=True)
+    sides['submitter'] = sides['submitter'].fillna('unknown')
+    sides['photo'] = sides['filename'] + '/' + sides['member']
+
+    report = pd.DataFrame({
+        'photos': photos.assign(submitter=photos['submitter'].fillna('unknown')).groupby('submitter').size(),
+        'duplicate_photos': sides.groupby('submitter')['photo'].nunique(),
+        'cross_plot_duplicates': sides[sides['cross_plot']].groupby('submitter')['photo'].nunique(),
+        'matched_submitters': sides.groupby('submitter')['other_submitter'].agg(
+            lambda names: ', '.join(sorted({str(n) for n in names}))),
+    })
+    report[['duplicate_photos', 'cross_plot_duplicates']] = (
+        report[['duplicate_photos', 'cross_plot_duplicates']].fillna(0).astype(int))
+    report['matched_submitters'] = report['matched_submitters'].fillna('')
+    report.index.name = 'submitter'
+    return report.sort_values('cross_plot_duplicates', ascending=False, kind='stable')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find photos resubmitted across submissions and plot_ids.")
+    parser.add_argument('directory', nargs='?', default=DEFAULT_DIR, help="Folder written by the attachment downloader")
+    parser.add_argument('--workers', type=int, help="Processes used to hash new zips (all cores by default)")
+    parser.add_argument('--max-distance', type=int, default=MAX_DISTANCE,
+                        help="Differing hash bits still treated as the same photo")
+    parser.add_argument('--method', choices=['dhash', 'exact'], help="dhash needs Pillow; exact only finds identical files")
+    args = parser.parse_args()
+
+    index = PhotoHashIndex(args.directory, args.method)
+    if index.method == 'dhash' and Image is None:
+        parser.error("Perceptual hashing needs Pillow (pip install Pillow)")
+    if index.method == 'exact':
+        print("⚠️ Pillow is not installed or --method exact was given; only byte-identical photos are matched.")
+    try:
+        hashed = index.update(args.workers)
+        photos, pairs = index.duplicate_pairs(args.max_distance)
+    finally:
+        index.close()
+    print(f"🧮 Hashed {hashed} new zip(s); {len(photos)} photo(s) indexed, {len(pairs)} duplicate pair(s) found")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    pairs_path = os.path.join(OUTPUT_DIR, 'photo_duplicate_pairs.csv')
+    pairs.to_csv(pairs_path, index=False)
+    report = submitter_report(photos, pairs)
+    report.to_csv(DUPLICATES_REPORT)
+    print(report)
+    print(f"📝 Pairs saved to {pairs_path}\n📝 Per-submitter report saved to {DUPLICATES_REPORT}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import random
+import argparse
+from pyodk.client import Client
+
+from tracker_path import add_tracker_path
+add_tracker_path()
+from submission_reader import SubmissionReader
+from submission_stats import SubmissionStats, combine_filters, date_filter, submitter_filter
+from attachment_downloader import AttachmentDownloader, attachment_files, attachment_jobs
+
+FORM_ID = 'Image Safari Crop Scout (Phone Approach)'
+# Only the fields attachment_jobs and the strata need; the whole photos group, since the zip
+# can be in any of its fields
+SAMPLE_SELECT = '__id,__system/submitterName,plot_id,today,photos'
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), 'output_files', 'sample_photos')
+
+
+class Reservoir:
+    """Uniform sample of up to k items from a stream of unknown length (Algorithm R)."""
+
+    def __init__(self, k, rng):
+        self.k = k
+        self.rng = rng
+        self.seen = 0
+        self.items = []
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.k:
+            self.items.append(item)
+        else:
+            slot = self.rng.randrange(self.seen)
+            if slot < self.k:
+                self.items[slot] = item
+
+
+def has_photos(record):
+    return bool(attachment_files(record))
+
+
+def stratum_of(record):
+    """(submitter, day) a record is sampled within."""
+    return (record.get('__system') or {}).get('submitterName'), record.get('today')
+
+
+def reservoir_sample(records, k, seed=None):
+    """k records drawn uniformly from the stream in one pass."""
+    reservoir = Reservoir(k, random.Random(seed))
+    for record in records:
+        reservoir.add(record)
+    return reservoir.items
+
+
+def stratified_sample(records, per_stratum=1, quotas=None, seed=None):
+    """Up to per_stratum records per (submitter, day) in one pass.
+
+    quotas overrides the per-stratum size by submitter name or by (submitter, day); a quota of 0
+    leaves the stratum out. Strata are returned in submitter, then day order.
+    """
+    quotas = quotas or {}
+    rng = random.Random(seed)
+    reservoirs = {}
+    for record in records:
+        stratum = stratum_of(record)
+        if stratum not in reservoirs:
+            size = quotas.get(stratum, quotas.get(stratum[0], per_stratum))
+            reservoirs[stratum] = Reservoir(size, rng) if size > 0 else None
+        if reservoirs[stratum] is not None:
+            reservoirs[stratum].add(record)
+    return {stratum: reservoir.items for stratum, reservoir in
+            sorted(reservoirs.items(), key=lambda item: tuple(str(part) for part in item[0]))
+            if reservoir is not None}
+
+
+def sample_filter(stats, submitters=None, start=None, end=None):
+    """Server-side $filter for the submitters (by name) and [start, end) submission dates."""
+    ids = None
+    if submitters:
+        known = stats.submitters()
+        missing = [name for name in submitters if name not in known]
+        if missing:
+            print(f"⚠️ Unknown submitter(s): {', '.join(missing)}")
+        ids = [known[name] for name in submitters if name in known] or [-1]
+    return combine_filters(date_filter(start, end), submitter_filter(ids))
+
+
+def sample_submissions(client, form_id=FORM_ID, k=5, per_stratum=None, quotas=None, submitters=None,
+                       start=None, end=None, seed=None, project_id=None):
+    """Samples submissions with photos from one filtered, streamed pass over the form.
+
+    With per_stratum (or quotas) the sample is stratified by submitter and day, otherwise k records
+    are drawn uniformly. Returns the sampled records.
+    """
+    stats = SubmissionStats(client, form_id, project_id)
+    odata_filter = sample_filter(stats, submitters, start, end)
+    matching = stats.count_matching(odata_filter)
+    print(f"🔎 {matching} submission(s) match the filters")
+    if not matching:
+        return []
+
+    reader = SubmissionReader(client, form_id, stats.project_id)
+    records = (r for r in reader.iter_records(odata_filter=odata_filter, select=SAMPLE_SELECT) if has_photos(r))
+    if per_stratum or quotas:
+        strata = stratified_sample(records, per_stratum or 0, quotas, seed)
+        sample = [record for items in strata.values() for record in items]
+        print(f"🎲 Sampled {len(sample)} submission(s) across {len(strata)} submitter × day strata")
+    else:
+        sample = reservoir_sample(records, k, seed)
+        print(f"🎲 Sampled {len(sample)} submission(s)")
+    print(f"   ({reader.pages_read} page(s), {reader.bytes_read / 1024:.0f} KiB downloaded)")
+    return sample
+
+
+def download_sample(client, sample, output_dir=SAMPLE_DIR, form_id=FORM_ID, project_id=None, max_workers=8):
+    """Downloads the photo zips of the sampled submissions."""
+    downloader = AttachmentDownloader(client, output_dir, form_id=form_id, project_id=project_id,
+                                      max_workers=max_workers)
+    return downloader.download_all(attachment_jobs(sample))
+
+
+def parse_quota(text):
+    """SUBMITTER=N or SUBMITTER@YYYY-MM-DD=N."""
+    key, _, size = text.rpartition('=')
+    if not key:
+        raise argparse.ArgumentTypeError(f"Expected SUBMITTER=N or SUBMITTER@DAY=N, got {text!r}")
+    submitter, _, day = key.partition('@')
+    return ((submitter, day) if day else submitter), int(size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample submissions for photo QA and download their zips.")
+    parser.add_argument('--form', default=FORM_ID)
+    parser.add_argument('--submitter', action='append', help="Only sample this submitter (repeatable)")
+    parser.add_argument('--start', help="First submission date, YYYY-MM-DD")
+    parser.add_argument('--end', help="Day after the last submission date, YYYY-MM-DD")
+    parser.add_argument('-k', '--size', type=int, default=5, help="Sample size without stratification")
+    parser.add_argument('--per-stratum', type=int, help="Sample this many per submitter and day")
+    parser.add_argument('--quota', type=parse_quota, action='append', default=[],
+                        help="Per-stratum size override, SUBMITTER=N or SUBMITTER@YYYY-MM-DD=N (repeatable)")
+    parser.add_argument('--seed', type=int, help="Seed for a reproducible sample")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--output', default=SAMPLE_DIR)
+    args = parser.parse_args()
+
+    client = Client()
+    sample = sample_submissions(client, args.form, args.size, args.per_stratum, dict(args.quota),
+                                args.submitter, args.start, args.end, args.seed)
+    if not sample:
+        print("No submissions with photos matched; nothing to download.")
+        return
+    results = download_sample(client, sample, args.output, args.form, max_workers=args.workers)
+    failed = sum(1 for r in results if r['status'] == 'failed')
+    print(f"\n✅ Finished downloading {len(results) - failed} sample zip file(s), {failed} failed -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
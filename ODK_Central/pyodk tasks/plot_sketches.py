@@ -0,0 +1,356 @@
+import os
+import json
+import math
+import zlib
+import sqlite3
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from pyodk.client import Client
+
+from tracker_path import add_tracker_path
+add_tracker_path()
+from submission_reader import SubmissionReader
+from sync_store import WatermarkPass
+
+FORM_ID = 'Image Safari Crop Scout (Phone Approach)'
+SKETCH_DB = os.path.join(os.path.dirname(__file__), 'output_files', 'plot_sketches.db')
+SKETCH_SELECT = '__id,__system/submitterName,__system/submissionDate,plot_id,today'
+HLL_PRECISION = 11     # 2048 registers, about 2.3% standard error on distinct counts
+CMS_WIDTH = 2048       # counts overestimate by at most e/width of the rows, 98% of the time (depth 4)
+CMS_DEPTH = 4
+CANDIDATES = 25        # heavy-hitter candidates kept per sketch
+UNKNOWN = 'unknown'
+
+
+def received_after(watermark):
+    """$filter for submissions received after the watermark; sketches ignore edits (see SketchStore)."""
+    return f"__system/submissionDate gt {watermark}"
+
+
+def hash_plots(plot_ids):
+    """Stable 64-bit hashes of plot_id strings (the same across runs, processes and dtypes)."""
+    return pd.util.hash_pandas_object(pd.Series(plot_ids, dtype=object), index=False).to_numpy(np.uint64)
+
+
+def _leading_zeros(values):
+    """Leading zero bits of uint64 values, by binary search over shifts."""
+    values = values.copy()
+    zeros = np.zeros(len(values), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        small = values < np.uint64(1 << (64 - shift))
+        zeros[small] += shift
+        values[small] <<= np.uint64(shift)
+    zeros[values == 0] = 64
+    return zeros
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch; merging takes the register-wise maximum."""
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes << np.uint64(self.precision)
+        rank = np.minimum(_leading_zeros(rest), 64 - self.precision) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # linear counting is more accurate while most registers are still empty
+            estimate = m * math.log(m / empty)
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """Mergeable frequency sketch; estimates never undercount."""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes):
+        # double hashing on the two 32-bit halves gives depth independent-enough rows
+        low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        high = (hashes >> np.uint64(32)).astype(np.int64)
+        return [(low + row * high) % self.width for row in range(self.depth)]
+
+    def add_hashes(self, hashes):
+        for row, columns in enumerate(self._columns(hashes)):
+            np.add.at(self.table[row], columns, 1)
+
+    def estimate_hashes(self, hashes):
+        return np.min([self.table[row][columns] for row, columns in enumerate(self._columns(hashes))], axis=0)
+
+    def merge(self, other):
+        self.table += other.table
+        return self
+
+
+class PlotSketch:
+    """Unique plots (HyperLogLog), plot frequencies (Count-Min) and the most repeated plots of a set of
+    submissions, in a fixed amount of memory however many submissions it has seen."""
+
+    def __init__(self):
+        self.rows = 0
+        self.hll = HyperLogLog()
+        self.cms = CountMinSketch()
+        self.candidates = {}
+
+    def _keep_top(self, plot_ids):
+        plot_ids = list(dict.fromkeys(plot_ids))
+        estimates = self.cms.estimate_hashes(hash_plots(plot_ids)) if plot_ids else []
+        ranked = sorted(zip(plot_ids, (int(e) for e in estimates)), key=lambda item: (-item[1], item[0]))
+        self.candidates = dict(ranked[:CANDIDATES])
+
+    def add(self, plot_ids):
+        plot_ids = [p for p in plot_ids if p is not None and p == p]
+        if not plot_ids:
+            return self
+        hashes = hash_plots(plot_ids)
+        self.rows += len(plot_ids)
+        self.hll.add_hashes(hashes)
+        self.cms.add_hashes(hashes)
+        self._keep_top(list(self.candidates) + plot_ids)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.hll.merge(other.hll)
+        self.cms.merge(other.cms)
+        self._keep_top(list(self.candidates) + list(other.candidates))
+        return self
+
+    def unique_plots(self):
+        return min(self.hll.count(), self.rows)
+
+    def top(self, k=10):
+        return list(self.candidates.items())[:k]
+
+    def error_bound(self):
+        """Most a Count-Min estimate overcounts by (with 98% probability)."""
+        return math.e / self.cms.width * self.rows
+
+    def to_blob(self):
+        header = json.dumps({'rows': self.rows, 'candidates': self.candidates}).encode('utf-8')
+        body = self.hll.registers.tobytes() + self.cms.table.astype(np.int32).tobytes()
+        return zlib.compress(len(header).to_bytes(4, 'big') + header + body)
+
+    @classmethod
+    def from_blob(cls, blob):
+        data = zlib.decompress(blob)
+        size = int.from_bytes(data[:4], 'big')
+        header = json.loads(data[4:4 + size])
+        body = data[4 + size:]
+        sketch = cls()
+        registers = len(sketch.hll.registers)
+        sketch.rows = header['rows']
+        sketch.candidates = header['candidates']
+        sketch.hll.registers = np.frombuffer(body[:registers], dtype=np.uint8).copy()
+        sketch.cms.table = np.frombuffer(body[registers:], dtype=np.int32).astype(np.int64).reshape(CMS_DEPTH, CMS_WIDTH)
+        return sketch
+
+
+class SketchStore:
+    """Persisted PlotSketches per (form, submitter, day), updated from new submissions only.
+
+    Buckets merge into per-submitter or all-time sketches for any date window. Sketches cannot
+    take a count back, so edits to submissions already counted are not applied; rebuild with
+    full=True (or use the exact mode) for audits. For the same reason an update is all or
+    nothing: its sketches are staged in pending_sketches and only merged into the buckets, with
+    the new watermark, once the whole pass has been read.
+    """
+
+    def __init__(self, path=SKETCH_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sketches (
+                form_id TEXT NOT NULL,
+                submitter TEXT NOT NULL,
+                day TEXT NOT NULL,
+                sketch BLOB NOT NULL,
+                PRIMARY KEY (form_id, submitter, day)
+            );
+            CREATE TABLE IF NOT EXISTS pending_sketches (
+                form_id TEXT NOT NULL,
+                submitter TEXT NOT NULL,
+                day TEXT NOT NULL,
+                sketch BLOB NOT NULL,
+                PRIMARY KEY (form_id, submitter, day)
+            );
+            CREATE TABLE IF NOT EXISTS sketch_state (
+                form_id TEXT PRIMARY KEY,
+                watermark TEXT
+            );
+        """)
+
+    def get_watermark(self, form_id):
+        row = self.conn.execute('SELECT watermark FROM sketch_state WHERE form_id = ?', (form_id,)).fetchone()
+        return row[0] if row else None
+
+    def _load(self, table, form_id, submitter, day):
+        row = self.conn.execute(f'SELECT sketch FROM {table} WHERE form_id = ? AND submitter = ? AND day = ?',
+                                (form_id, submitter, day)).fetchone()
+        return PlotSketch.from_blob(row[0]) if row else None
+
+    def _stage(self, form_id, buckets):
+        """Adds a batch of sketches to the pending ones of this update."""
+        for (submitter, day), sketch in buckets.items():
+            staged = self._load('pending_sketches', form_id, submitter, day)
+            if staged is not None:
+                sketch.merge(staged)
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO pending_sketches VALUES (?, ?, ?, ?)',
+                                  [(form_id, submitter, day, sketch.to_blob())
+                                   for (submitter, day), sketch in buckets.items()])
+
+    def _commit(self, form_id, watermark):
+        """Merges the pending sketches into the buckets and moves the watermark, in one transaction."""
+        keys = self.conn.execute('SELECT submitter, day FROM pending_sketches WHERE form_id = ?', (form_id,)).fetchall()
+        with self.conn:
+            for submitter, day in keys:
+                sketch = self._load('pending_sketches', form_id, submitter, day)
+                bucket = self._load('sketches', form_id, submitter, day)
+                if bucket is not None:
+                    sketch.merge(bucket)
+                self.conn.execute('INSERT OR REPLACE INTO sketches VALUES (?, ?, ?, ?)',
+                                  (form_id, submitter, day, sketch.to_blob()))
+            self.conn.execute('DELETE FROM pending_sketches WHERE form_id = ?', (form_id,))
+            self.conn.execute('INSERT OR REPLACE INTO sketch_state VALUES (?, ?)', (form_id, watermark))
+
+    def reset(self, form_id):
+        with self.conn:
+            for table in ('sketches', 'pending_sketches', 'sketch_state'):
+                self.conn.execute(f'DELETE FROM {table} WHERE form_id = ?', (form_id,))
+
+    def update(self, client, form_id=FORM_ID, project_id=None, full=False, flush_rows=50000):
+        """Folds submissions received since the last update into the day buckets; returns how many.
+
+        Nothing is counted and the watermark does not move until the last page is in (see
+        WatermarkPass); an interrupted update leaves the buckets as they were.
+        """
+        if full:
+            self.reset(form_id)
+        with self.conn:
+            # left over by an interrupted update, whose submissions are fetched again
+            self.conn.execute('DELETE FROM pending_sketches WHERE form_id = ?', (form_id,))
+        sync_pass = WatermarkPass(self.get_watermark(form_id))
+        reader = SubmissionReader(client, form_id, project_id)
+        buckets, pending, added = {}, 0, 0
+        for page in reader.iter_pages(odata_filter=sync_pass.odata_filter(received_after), select=SKETCH_SELECT):
+            frame = pd.DataFrame({
+                'submitter': [(r.get('__system') or {}).get('submitterName') or UNKNOWN for r in page],
+                'day': [r.get('today') or UNKNOWN for r in page],
+                'plot_id': [r.get('plot_id') for r in page],
+            })
+            for key, group in frame.groupby(['submitter', 'day'], sort=False):
+                buckets.setdefault(key, PlotSketch()).add(group['plot_id'].tolist())
+            sync_pass.see((r.get('__system') or {}).get('submissionDate') for r in page)
+            pending += len(page)
+            added += len(page)
+            if pending >= flush_rows:
+                self._stage(form_id, buckets)
+                buckets, pending = {}, 0
+        self._stage(form_id, buckets)
+        self._commit(form_id, sync_pass.watermark)
+        print(f"🧮 Sketches: {added} new submission(s) of '{form_id}' added "
+              f"({reader.bytes_read / 1024:.0f} KiB downloaded)")
+        return added
+
+    def merged(self, form_id=FORM_ID, start=None, end=None, submitters=None):
+        """(per-submitter sketches, all-submitter sketch) for days in [start, end)."""
+        clauses, params = ['form_id = ?'], [form_id]
+        if start:
+            clauses.append('day >= ?')
+            params.append(str(start))
+        if end:
+            clauses.append('day < ?')
+            params.append(str(end))
+        if submitters:
+            clauses.append(f"submitter IN ({', '.join('?' * len(submitters))})")
+            params.extend(submitters)
+        per_submitter, overall = {}, PlotSketch()
+        for submitter, blob in self.conn.execute(
+                f"SELECT submitter, sketch FROM sketches WHERE {' AND '.join(clauses)}", params):
+            sketch = PlotSketch.from_blob(blob)
+            overall.merge(sketch)
+            per_submitter.setdefault(submitter, PlotSketch()).merge(sketch)
+        return per_submitter, overall
+
+    def close(self):
+        self.conn.close()
+
+
+def window_start(days):
+    """First day of a rolling window of the last `days` days (None for all time)."""
+    return (date.today() - timedelta(days=days - 1)).isoformat() if days else None
+
+
+def sketch_stats(per_submitter):
+    """Per-submitter plot statistics estimated from the sketches, in the columns submitter_plot_stats uses."""
+    rows = {}
+    for submitter, sketch in sorted(per_submitter.items()):
+        top = sketch.top(1)
+        unique = sketch.unique_plots()
+        rows[submitter] = {
+            'total_submissions': sketch.rows,
+            'unique_plots': unique,
+            'most_frequent_plot': top[0][0] if top else None,
+            'most_frequent_count': top[0][1] if top else 0,
+            'average_submissions': round(sketch.rows / unique, 2) if unique else 0.0,
+            'count_error': round(sketch.error_bound(), 1),
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def load_sketches(form_id=FORM_ID, days=None, update=True, path=SKETCH_DB):
+    """Updates the persisted sketches (unless offline) and merges the requested window."""
+    store = SketchStore(path)
+    try:
+        if update:
+            store.update(Client(), form_id)
+        return store.merged(form_id, start=window_start(days))
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Approximate plot_id statistics from persisted, mergeable sketches.")
+    parser.add_argument('--form', default=FORM_ID)
+    parser.add_argument('--days', type=int, help="Only the last N days (default: all time)")
+    parser.add_argument('--offline', action='store_true', help="Use the stored sketches without fetching")
+    parser.add_argument('--full', action='store_true', help="Rebuild the sketches from the whole form history")
+    args = parser.parse_args()
+
+    store = SketchStore()
+    try:
+        if args.full or not args.offline:
+            store.update(Client(), args.form, full=args.full)
+        per_submitter, overall = store.merged(args.form, start=window_start(args.days))
+    finally:
+        store.close()
+
+    print(sketch_stats(per_submitter))
+    print(f"\n≈ {overall.unique_plots()} unique plot IDs in {overall.rows} submissions "
+          f"(±{100 * 1.04 / math.sqrt(2 ** HLL_PRECISION):.1f}%)")
+    for plot_id, count in overall.top(5):
+        print(f"• {plot_id}: ≈{count} times (at most {overall.error_bound():.0f} too high)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import pandas as pd
+
+
+def plot_counts_by_submitter(df):
+    """Counts submissions per (submitter, plot_id) in one grouped pass, most submitted plots first."""
+    counts = (
+        df.dropna(subset=['submitter', 'plot_id'])
+        .groupby(['submitter', 'plot_id'], observed=True, sort=False)
+        .size()
+        .rename('submission_count')
+        .reset_index()
+    )
+    counts['submitter'] = counts['submitter'].astype(str)
+    return counts.sort_values(['submitter', 'submission_count'], ascending=[True, False], kind='stable',
+                              ignore_index=True)
+
+
+def submitter_plot_stats(df, counts):
+    """Per-submitter plot statistics computed for every submitter at once from the grouped counts."""
+    by_submitter = counts.groupby('submitter', sort=False)['submission_count']
+    firsts = counts.groupby('submitter', sort=False).first()
+    least = counts[counts['submission_count'] == by_submitter.transform('min')].groupby('submitter', sort=False).first()
+
+    stats = pd.DataFrame({
+        'total_submissions': df.dropna(subset=['submitter']).groupby('submitter', observed=True).size(),
+        'unique_plots': by_submitter.size(),
+        'most_frequent_plot': firsts['plot_id'],
+        'most_frequent_count': firsts['submission_count'],
+        'least_frequent_plot': least['plot_id'],
+        'least_frequent_count': least['submission_count'],
+        'average_submissions': by_submitter.mean().round(2),
+    })
+    stats.index = stats.index.astype(str)
+    stats = stats.dropna(subset=['unique_plots'])
+    return stats.astype({'total_submissions': int, 'unique_plots': int,
+                         'most_frequent_count': int, 'least_frequent_count': int})
+
+
+def iter_submitter_tables(counts):
+    """Yields (submitter, plot_id/submission_count table) without re-filtering the full frame per submitter."""
+    for name, table in counts.groupby('submitter', sort=False):
+        yield name, table[['plot_id', 'submission_count']].reset_index(drop=True)
+
+
+def submitter_sheet_tables(name, plot_counts, stats, labels, stats_header=('Metric', 'Value')):
+    """(submitter, plot count rows, stats rows) for one report sheet, header rows included."""
+    left = [['plot_id', 'submission_count']] + plot_counts.values.tolist()
+    right = [list(stats_header)] + [[label, stats[key]] for label, key in labels]
+    return name, left, right
+
+
+def sheet_name_for(name, used=(), limit=31):
+    """Clean sheet name, with a numeric suffix when its first limit characters are already taken.
+
+    used holds the lowercased names given out so far; Excel and Google Sheets both compare tab names
+    without case.
+    """
+    base = name.replace('/', '_').replace('\\', '_')
+    candidate, n = base[:limit], 1
+    while candidate.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        candidate = base[:limit - len(suffix)] + suffix
+    return candidate
@@ -1,7 +1,7 @@
-import os
-import random
 from pyodk.client import Client
 
+from photo_sampler import download_sample, sample_submissions
+
 client = Client()
 
 # Use default project ID from config
@@ -12,42 +12,13 @@ submitter_name = input("Enter submitter name to filter photos: ")
 
 form_id = 'Image Safari Crop Scout (Phone Approach)'
 
-# Fetch records
-records = client.submissions.get_table(project_id=project_id, form_id=form_id)['value']
-
-# Filter records by submitter's name
-filtered_records = [record for record in records if record.get('__system', {}).get('submitterName') == submitter_name]
+# Central filters on the submitter, so only their records are streamed; 5 are kept (or fewer)
+sample = sample_submissions(client, form_id, k=5, submitters=[submitter_name], project_id=project_id)
 
-if not filtered_records:
+if not sample:
     print(f"No records found for submitter: {submitter_name}")
 else:
-    # Get authenticated session and base URL
-    base_url = client.config.central.base_url.rstrip('/')
-    session = client.session
-
-    # Sample 5 random records (or fewer if there are not enough records)
-    sample = random.sample(filtered_records, min(5, len(filtered_records)))
-
-    # Set up output directory
-    output_dir = os.path.join(os.path.dirname(__file__), 'output_files', 'sample_photos')
-    os.makedirs(output_dir, exist_ok=True)
-
-    for record in sample:
-        instance_id = record['__id']
-        photos = record.get('photos', {})
-
-        for part_key, filename in photos.items():
-            if filename and str(filename).endswith('.zip'):
-                print(f"📥 Downloading {filename} from {instance_id}...")
-                url = f"{base_url}/v1/projects/{project_id}/forms/{form_id}/submissions/{instance_id}/attachments/{filename}"
-                try:
-                    response = session.get(url)
-                    response.raise_for_status()
-                    file_path = os.path.join(output_dir, filename)
-                    with open(file_path, 'wb') as f:
-                        f.write(response.content)
-                    print(f"✅ Saved to: {file_path}")
-                except Exception as e:
-                    print(f"❌ Error downloading {filename}: {e}")
+    # Download the sampled zips concurrently, streaming to disk and skipping files fetched before
+    download_sample(client, sample, form_id=form_id, project_id=project_id)
 
     print("\n✅ Finished downloading sample zip files.")
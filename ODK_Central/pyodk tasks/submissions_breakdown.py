@@ -1,21 +1,32 @@
 import os
-import pandas as pd
+import argparse
 from pyodk.client import Client
 
-client = Client()
+from tracker_path import add_tracker_path
+add_tracker_path()
+from submission_stats import SubmissionStats
+from warehouse import add_warehouse_arguments, warehouse_frame
 
-data = client.submissions.get_table(form_id='Image Safari Crop Scout (Phone Approach)')
-records = data['value']
+FORM_ID = 'Image Safari Crop Scout (Phone Approach)'
 
-records = data['value']
+parser = argparse.ArgumentParser(description="Total submissions and photos per day.")
+add_warehouse_arguments(parser)
+args = parser.parse_args()
 
-df = pd.json_normalize(records)
+if args.warehouse or args.offline:
+    # Both answers come from the local warehouse; only new/edited submissions are fetched (none when offline)
+    frame = warehouse_frame(FORM_ID, ['today', 'photo_count'], offline=args.offline)
+    print(f"Total submissions: {len(frame)}")
+    photo_summary = frame.groupby('today')['photo_count'].sum().astype('int64').reset_index()
+else:
+    client = Client()
+    stats = SubmissionStats(client, FORM_ID)
 
-# Extract 'photoQuantity' from 'photos', ignoring None values
-df['photo_count'] = df['photos.photoQuantity'].fillna(0).astype(int)
+    # The total is a server-side $count, no submissions are downloaded for it
+    print(f"Total submissions: {stats.count()}")
 
-# Group by 'today' and sum the counts
-photo_summary = df.groupby('today')['photo_count'].sum().reset_index()
+    # Summing photos per day needs the rows, so only 'today' and 'photos/photoQuantity' are streamed page by page
+    photo_summary = stats.photo_totals_by_day().reset_index()
 
 # Create output directory path
 output_dir = os.path.join(os.path.dirname(__file__), 'output_files')
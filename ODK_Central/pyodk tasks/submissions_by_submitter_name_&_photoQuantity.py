@@ -1,50 +1,38 @@
 import os
-import pandas as pd
+import argparse
 from pyodk.client import Client
 
-# Initialize ODK client
-client = Client()
+from tracker_path import add_tracker_path
+add_tracker_path()
+from submission_reader import iter_submission_frames
+from field_spec import TRACKER_FIELDS
+from aggregation import combine_partials, group_daily, pivot_daily
+from warehouse import add_warehouse_arguments, warehouse_frame
 
-# Fetch submissions
-data = client.submissions.get_table(form_id='Image Safari Crop Scout (Phone Approach)')
-records = data['value']
+FORM_ID = 'Image Safari Crop Scout (Phone Approach)'
 
-# Normalize nested JSON
-df = pd.json_normalize(records)
+parser = argparse.ArgumentParser(description="Daily photo counts and durations per submitter.")
+add_warehouse_arguments(parser)
+args = parser.parse_args()
 
-# Handle missing submitter names
-df['submitter'] = df['__system.submitterName'].fillna('unknown')
+if args.warehouse or args.offline:
+    # Read the same columns from the local warehouse instead of refetching them
+    chunks = [warehouse_frame(FORM_ID, [spec.column for spec in TRACKER_FIELDS], offline=args.offline)]
+else:
+    # Only the submitter, date, photo count and duration are requested and flattened;
+    # missing submitter names come back as 'unknown' and missing counts as 0
+    chunks = iter_submission_frames(Client(), FORM_ID, fields=TRACKER_FIELDS)
 
-# Extract photo count and duration
-df['photo_count'] = df['photos.photoQuantity'].fillna(0).astype(int)
-df['duration'] = df['photos.photoSessionDuration'].fillna(0).astype(int)
+# Fetch submissions page by page and keep only per-page sums
+partials = []
+for chunk in chunks:
+    partials.append(group_daily(chunk))
 
 # Group by date and submitter, then sum photo counts and durations
-grouped = df.groupby(['today', 'submitter'])[['photo_count', 'duration']].sum().reset_index()
+grouped = combine_partials(partials)
 
-# Pivot both photo counts and durations
-pivot_counts = grouped.pivot(index='today', columns='submitter', values='photo_count').fillna(0).astype(int)
-pivot_duration = grouped.pivot(index='today', columns='submitter', values='duration').fillna(0).astype(int)
-
-# Format to hh:mm:ss
-def format_seconds_to_hhmmss(seconds):
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-    return f'{hours}:{minutes:02}:{secs:02}'
-
-pivot_duration = pivot_duration.applymap(format_seconds_to_hhmmss)
-
-
-# Optional: rename column levels for clarity
-pivot_counts.columns = [f'{col}_count' for col in pivot_counts.columns]
-pivot_duration.columns = [f'{col}_duration' for col in pivot_duration.columns]
-
-# Combine the two pivot tables side by side
-pivot_combined = pd.concat([pivot_counts, pivot_duration], axis=1)
-
-# Sort columns for neatness
-pivot_combined = pivot_combined.reindex(sorted(pivot_combined.columns), axis=1)
+# Pivot counts and hh:mm:ss durations side by side, one column pair per submitter
+pivot_combined = pivot_daily(grouped)
 
 # Create output directory
 output_dir = os.path.join(os.path.dirname(__file__), 'output_files')
@@ -0,0 +1,24 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+# The task scripts are run from their own folder, not installed; tracker_path makes the tracker's modules importable
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from tracker_path import TRACKER_DIR, add_tracker_path  # noqa: E402
+
+add_tracker_path()
+sys.path.append(os.path.join(TRACKER_DIR, 'benchmarks'))
+
+
+@pytest.fixture
+def local_central(tmp_path):
+    """The tracker's mock Central with 300 submissions on a free localhost port, and a Client for it."""
+    pytest.importorskip('pyodk')
+    from mock_central import LocalCentral
+
+    central = LocalCentral(300, str(tmp_path))
+    yield central
+    central.close()
@@ -0,0 +1,152 @@
+# test_attachment_downloader.py
+import os
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from attachment_downloader import (AttachmentDownloader, attachment_jobs, content_range_total, load_manifest,
+                                   manifest_key)
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class FakeSession:
+    """Serves attachment bodies by URL suffix, honouring Range the way Central does."""
+
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False):
+        headers = headers or {}
+        self.requests.append(headers.get('Range'))
+        body = self.files[url.rsplit('/', 1)[1]]
+        if 'Range' in headers:
+            start = int(headers['Range'][len('bytes='):-1])
+            if start >= len(body):
+                return FakeResponse(416, headers={'Content-Range': f'bytes */{len(body)}'})
+            return FakeResponse(206, body[start:], {'Content-Length': str(len(body) - start)})
+        return FakeResponse(200, body, {'Content-Length': str(len(body))})
+
+
+class RangeNotSatisfiableSession(FakeSession):
+    """A misbehaving server that answers every request with 416."""
+
+    def get(self, url, headers=None, stream=False):
+        self.requests.append((headers or {}).get('Range'))
+        return FakeResponse(416, headers={'Content-Range': 'bytes */5'})
+
+
+def fake_client():
+    central = SimpleNamespace(default_project_id=1, base_url='https://central.test')
+    return SimpleNamespace(config=SimpleNamespace(central=central), session=requests.Session())
+
+
+def job(instance_id, filename='photos.zip'):
+    return {'instance_id': instance_id, 'filename': filename, 'meta': {'submitter': 'ann'}}
+
+
+@pytest.fixture
+def make_downloader(tmp_path):
+    def make(files):
+        downloader = AttachmentDownloader(fake_client(), str(tmp_path), max_workers=2)
+        downloader.session = FakeSession(files)
+        return downloader
+    return make
+
+
+def test_content_range_total():
+    assert content_range_total('bytes */1234') == 1234
+    assert content_range_total('bytes 0-99/1234') == 1234
+    assert content_range_total('bytes 0-99/*') is None
+    assert content_range_total(None) is None
+
+
+def test_attachment_jobs_keep_only_zip_files():
+    records = [{'__id': 'uuid:1', 'plot_id': 'p1', '__system': {'submitterName': 'ann'},
+                'photos': {'photoQuantity': 2, 'zip': 'a.zip', 'thumb': 'a.jpg', 'empty': None}},
+               {'__id': 'uuid:2', 'photos': None}]
+    jobs = attachment_jobs(records)
+    assert [(j['instance_id'], j['filename']) for j in jobs] == [('uuid:1', 'a.zip')]
+    assert jobs[0]['meta']['photoQuantity'] == 2
+
+
+def test_same_filename_from_two_submissions_gets_two_files(make_downloader, tmp_path):
+    downloader = make_downloader({'photos.zip': b'first'})
+    first = downloader.download(job('uuid:1'))
+    downloader.session.files['photos.zip'] = b'second'
+    second = downloader.download(job('uuid:2'))
+
+    assert first['local_name'] == 'photos.zip'
+    assert second['local_name'] == '2_photos.zip'
+    assert (tmp_path / 'photos.zip').read_bytes() == b'first'
+    assert (tmp_path / '2_photos.zip').read_bytes() == b'second'
+    assert set(load_manifest(str(tmp_path))) == {manifest_key('uuid:1', 'photos.zip'),
+                                                  manifest_key('uuid:2', 'photos.zip')}
+
+
+def test_second_run_skips_files_in_the_manifest(make_downloader):
+    make_downloader({'photos.zip': b'data'}).download(job('uuid:1'))
+    downloader = make_downloader({'photos.zip': b'data'})
+    assert downloader.download(job('uuid:1'))['status'] == 'skipped'
+    assert downloader.session.requests == []
+
+
+def test_partial_file_is_resumed_with_a_range_request(make_downloader, tmp_path):
+    (tmp_path / 'photos.zip.part').write_bytes(b'0123')
+    downloader = make_downloader({'photos.zip': b'0123456789'})
+
+    entry = downloader.download(job('uuid:1'))
+    assert entry['status'] == 'resumed'
+    assert downloader.session.requests == ['bytes=4-']
+    assert (tmp_path / 'photos.zip').read_bytes() == b'0123456789'
+    assert not (tmp_path / 'photos.zip.part').exists()
+
+
+def test_complete_partial_file_is_kept_on_416(make_downloader, tmp_path):
+    (tmp_path / 'photos.zip.part').write_bytes(b'0123456789')
+    downloader = make_downloader({'photos.zip': b'0123456789'})
+
+    assert downloader.download(job('uuid:1'))['status'] == 'resumed'
+    assert downloader.session.requests == ['bytes=10-']
+
+
+def test_oversized_partial_file_restarts_once(make_downloader, tmp_path):
+    (tmp_path / 'photos.zip.part').write_bytes(b'not a prefix of the attachment')
+    downloader = make_downloader({'photos.zip': b'short'})
+
+    entry = downloader.download(job('uuid:1'))
+    assert entry['status'] == 'downloaded'
+    assert downloader.session.requests == ['bytes=30-', None]
+    assert (tmp_path / 'photos.zip').read_bytes() == b'short'
+
+
+def test_416_after_restart_does_not_loop(make_downloader, tmp_path):
+    (tmp_path / 'photos.zip.part').write_bytes(b'0123456789')
+    downloader = make_downloader({'photos.zip': b'01234'})
+    downloader.session = RangeNotSatisfiableSession({})
+
+    with pytest.raises(requests.HTTPError):
+        downloader.download(job('uuid:1'))
+    assert downloader.session.requests == ['bytes=10-', None]
+    assert not os.path.exists(tmp_path / 'photos.zip')
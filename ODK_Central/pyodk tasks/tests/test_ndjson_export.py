@@ -0,0 +1,113 @@
+# test_ndjson_export.py
+import json
+import os
+
+import pytest
+
+import ndjson_export
+from ndjson_export import codec_for, export_submissions, iter_frames, iter_records, load_state, state_path
+from odk_payloads import FORM_ID
+from submission_reader import SubmissionReader
+from sync_store import record_watermark
+
+CODECS = ['gzip', 'zstd', 'parquet']
+
+
+def export_path(tmp_path, codec):
+    if codec == 'zstd':
+        pytest.importorskip('zstandard')
+    if codec == 'parquet':
+        pytest.importorskip('pyarrow')
+    return str(tmp_path / 'exports' / f'form{ndjson_export.EXTENSIONS[codec]}')
+
+
+def latest_by_id(path):
+    """The export as readers see it: the last copy of each __id wins."""
+    return {record['__id']: record for record in iter_records(path)}
+
+
+def newest_stamp(form):
+    return max(record_watermark(record) for record in form.records(range(len(form))))
+
+
+def fail_after_pages(monkeypatch, pages):
+    """Makes the next export lose its connection after the given number of pages."""
+    iter_pages = SubmissionReader.iter_pages
+
+    def dropping(self, *args, **kwargs):
+        for n, page in enumerate(iter_pages(self, *args, **kwargs)):
+            if n == pages:
+                raise ConnectionError('connection reset')
+            yield page
+
+    monkeypatch.setattr(SubmissionReader, 'iter_pages', dropping)
+
+
+def test_codec_from_the_file_name():
+    assert codec_for('a.ndjson.gz') == 'gzip'
+    assert codec_for('a.parquet.d') == 'parquet'
+    with pytest.raises(ValueError):
+        codec_for('a.json')
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_full_then_incremental_export(local_central, tmp_path, codec):
+    path = export_path(tmp_path, codec)
+    assert export_submissions(local_central.client, FORM_ID, path, page_size=100) == 300
+    state = load_state(path)
+    assert state['pending'] is None
+    assert state['watermark'] == newest_stamp(local_central.form)
+    assert len(latest_by_id(path)) == 300
+
+    local_central.edit(7, photo_quantity=123)
+    export_submissions(local_central.client, FORM_ID, path, page_size=100)
+    records = latest_by_id(path)
+    assert len(records) == 300
+    photos = records[local_central.form.instance_id(7)]
+    quantity = photos['photos']['photoQuantity'] if codec != 'parquet' else photos['photos.photoQuantity']
+    assert quantity == 123
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_interrupted_export_resumes_where_it_stopped(local_central, tmp_path, monkeypatch, codec):
+    path = export_path(tmp_path, codec)
+    fail_after_pages(monkeypatch, 2)
+    with pytest.raises(ConnectionError):
+        export_submissions(local_central.client, FORM_ID, path, page_size=100)
+    monkeypatch.undo()
+
+    state = load_state(path)
+    assert state['watermark'] is None
+    assert state['pending']['skip'] == 200
+    if codec != 'parquet':
+        # a page that was being written when the process died
+        with open(path, 'ab') as f:
+            f.write(b'\x1f\x8b half a page')
+
+    assert export_submissions(local_central.client, FORM_ID, path, page_size=100) == 100
+    state = load_state(path)
+    assert state['pending'] is None and state['records'] == 300
+    assert state['watermark'] == newest_stamp(local_central.form)
+    assert sum(1 for _ in iter_records(path)) == 300
+    assert len(latest_by_id(path)) == 300
+
+
+def test_full_export_starts_over(local_central, tmp_path):
+    path = export_path(tmp_path, 'gzip')
+    export_submissions(local_central.client, FORM_ID, path)
+    export_submissions(local_central.client, FORM_ID, path)
+    assert export_submissions(local_central.client, FORM_ID, path, full=True) == 300
+    assert sum(1 for _ in iter_records(path)) == 300
+    with open(state_path(path), encoding='utf-8') as f:
+        assert json.load(f)['records'] == 300
+
+
+def test_frames_can_be_projected(local_central, tmp_path):
+    from field_spec import PLOT_FIELDS
+
+    path = export_path(tmp_path, 'gzip')
+    export_submissions(local_central.client, FORM_ID, path)
+    frames = list(iter_frames(path, chunk_size=128, fields=PLOT_FIELDS))
+    assert [len(frame) for frame in frames] == [128, 128, 44]
+    assert list(frames[0].columns) == ['submitter', 'plot_id']
+    assert os.path.getsize(path) < sum(len(json.dumps(r)) for r in iter_records(path))
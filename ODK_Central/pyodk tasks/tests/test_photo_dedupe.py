@@ -0,0 +1,121 @@
+# test_photo_dedupe.py
+import io
+import json
+import random
+import zipfile
+
+import pytest
+
+from attachment_downloader import MANIFEST_NAME
+from photo_dedupe import BKTree, PhotoHashIndex, _signed, _unsigned, submitter_report
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def test_bktree_finds_exactly_what_a_scan_finds():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    # near copies of some values, a few bits flipped
+    values += [value ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for value in values[:100]]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    assert tree.size == len(values)
+
+    for probe in values[:50] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 2, 8):
+            expected = sorted((hamming(probe, value), i) for i, value in enumerate(values)
+                              if hamming(probe, value) <= radius)
+            assert sorted(tree.search(probe, radius)) == expected
+
+
+def test_bktree_keeps_every_item_of_an_equal_value():
+    tree = BKTree()
+    tree.add(0b1010, 'a')
+    tree.add(0b1010, 'b')
+    tree.add(0b1011, 'c')
+    assert sorted(tree.search(0b1010, 0)) == [(0, 'a'), (0, 'b')]
+    assert sorted(tree.search(0b1010, 1)) == [(0, 'a'), (0, 'b'), (1, 'c')]
+
+
+def test_empty_bktree():
+    assert BKTree().search(123, 64) == []
+
+
+def test_hashes_round_trip_through_sqlite_integers():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        assert -(1 << 63) <= _signed(value) < 1 << 63
+        assert _unsigned(_signed(value)) == value
+
+
+def png(seed):
+    Image = pytest.importorskip('PIL.Image')
+    buffer = io.BytesIO()
+    Image.effect_noise((64, 64), 40 + seed).convert('RGB').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def write_zip(directory, name, photos, manifest_entry):
+    with zipfile.ZipFile(directory / name, 'w') as archive:
+        for member, data in photos.items():
+            archive.writestr(member, data)
+    with open(directory / MANIFEST_NAME, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(dict(manifest_entry, filename=name, local_name=name)) + '\n')
+
+
+@pytest.fixture
+def photo_dir(tmp_path):
+    first, second, third = png(1), png(2), png(3)
+    write_zip(tmp_path, 'a.zip', {'1.png': first, '2.png': second},
+              {'instance_id': 'uuid:a', 'submitter': 'ann', 'plot_id': 'p1'})
+    # the same photo sent again with another submission, under another plot
+    write_zip(tmp_path, 'b.zip', {'1.png': first, '3.png': third},
+              {'instance_id': 'uuid:b', 'submitter': 'bob', 'plot_id': 'p2'})
+    # a repeat inside one zip is not a duplicate submission
+    write_zip(tmp_path, 'c.zip', {'3.png': third, 'again.png': third},
+              {'instance_id': 'uuid:c', 'submitter': 'ann', 'plot_id': 'p2'})
+    return tmp_path
+
+
+@pytest.mark.parametrize('method', ['exact', 'dhash'])
+def test_duplicates_across_submissions(photo_dir, method):
+    index = PhotoHashIndex(str(photo_dir), method)
+    assert index.update(workers=1) == 3
+    assert index.update(workers=1) == 0  # nothing new to hash
+
+    photos, pairs = index.duplicate_pairs()
+    assert len(photos) == 6
+    found = sorted((p.filename, p.member, p.dup_filename, p.dup_member, p.cross_plot)
+                   for p in pairs.itertuples())
+    assert found == [('a.zip', '1.png', 'b.zip', '1.png', True),
+                     ('b.zip', '3.png', 'c.zip', '3.png', False),
+                     ('b.zip', '3.png', 'c.zip', 'again.png', False)]
+
+    report = submitter_report(photos, pairs)
+    assert report.loc['ann', 'photos'] == 4
+    assert report.loc['ann', 'duplicate_photos'] == 3
+    assert report.loc['ann', 'cross_plot_duplicates'] == 1
+    assert report.loc['bob', 'matched_submitters'] == 'ann'
+    index.close()
+
+
+def test_changed_zip_is_hashed_again(photo_dir):
+    index = PhotoHashIndex(str(photo_dir), 'exact')
+    index.update(workers=1)
+    with zipfile.ZipFile(photo_dir / 'c.zip', 'w') as archive:
+        archive.writestr('4.png', png(4))
+    assert index.pending() == ['c.zip']
+    index.update(workers=1)
+    assert sorted(index.photos().query("filename == 'c.zip'")['member']) == ['4.png']
+    index.close()
+
+
+def test_no_zips(tmp_path):
+    index = PhotoHashIndex(str(tmp_path), 'exact')
+    assert index.update() == 0
+    photos, pairs = index.duplicate_pairs()
+    assert photos.empty and pairs.empty
+    assert submitter_report(photos, pairs).empty
+    index.close()
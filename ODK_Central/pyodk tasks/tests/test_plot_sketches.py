@@ -0,0 +1,130 @@
+# test_plot_sketches.py
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import plot_sketches
+from plot_sketches import CountMinSketch, HyperLogLog, PlotSketch, SketchStore, hash_plots, sketch_stats
+from submission_reader import SubmissionReader
+
+FORM_ID = plot_sketches.FORM_ID
+
+
+def plots(n, distinct, seed=0):
+    rng = np.random.default_rng(seed)
+    # skewed, like real revisits: a few plots come up far more often than the rest
+    return [f'PLT-{i:05d}' for i in rng.zipf(1.3, n) % distinct]
+
+
+def test_hll_counts_distinct_values_within_its_error():
+    for distinct in (10, 1_000, 50_000):
+        hll = HyperLogLog()
+        hll.add_hashes(hash_plots([f'PLT-{i}' for i in range(distinct)] * 2))
+        assert abs(hll.count() - distinct) <= max(1, 0.06 * distinct)
+    assert HyperLogLog().count() == 0
+
+
+def test_merged_halves_equal_the_sketch_of_the_whole():
+    ids = plots(20_000, 3_000)
+    whole = PlotSketch().add(ids)
+    halves = PlotSketch().add(ids[:7_000]).merge(PlotSketch().add(ids[7_000:]))
+
+    assert np.array_equal(halves.hll.registers, whole.hll.registers)
+    assert np.array_equal(halves.cms.table, whole.cms.table)
+    assert halves.rows == whole.rows == 20_000
+    assert halves.top(3) == whole.top(3)
+
+
+def test_count_min_never_undercounts():
+    ids = plots(20_000, 3_000)
+    cms = CountMinSketch()
+    cms.add_hashes(hash_plots(ids))
+    exact = pd.Series(ids).value_counts()
+    estimates = cms.estimate_hashes(hash_plots(exact.index.tolist()))
+    assert (estimates >= exact.to_numpy()).all()
+    assert (estimates - exact.to_numpy()).mean() <= np.e / cms.width * len(ids)
+
+
+def test_top_plots_are_the_most_repeated():
+    ids = plots(20_000, 3_000)
+    sketch = PlotSketch().add(ids)
+    exact = pd.Series(ids).value_counts()
+    (plot, count), = sketch.top(1)
+    assert plot == exact.index[0]
+    assert exact.iloc[0] <= count <= exact.iloc[0] + sketch.error_bound()
+
+
+def test_missing_plot_ids_are_skipped():
+    sketch = PlotSketch().add(['PLT-1', None, float('nan'), 'PLT-1'])
+    assert sketch.rows == 2
+    assert sketch.unique_plots() == 1
+    assert PlotSketch().add([None]).rows == 0
+
+
+def test_blob_round_trip():
+    sketch = PlotSketch().add(plots(5_000, 800))
+    restored = PlotSketch.from_blob(sketch.to_blob())
+    assert restored.rows == sketch.rows
+    assert restored.candidates == sketch.candidates
+    assert np.array_equal(restored.hll.registers, sketch.hll.registers)
+    assert np.array_equal(restored.cms.table, sketch.cms.table)
+
+    empty = PlotSketch.from_blob(PlotSketch().to_blob())
+    assert empty.rows == 0 and empty.unique_plots() == 0 and empty.top() == []
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SketchStore(str(tmp_path / 'sketches.db'))
+    yield store
+    store.close()
+
+
+def exact_stats(local_central):
+    records = local_central.form.records(range(len(local_central.form)))
+    frame = pd.DataFrame({'submitter': [r['__system']['submitterName'] for r in records],
+                          'plot_id': [r['plot_id'] for r in records]})
+    return frame.groupby('submitter')['plot_id'].agg(['size', 'nunique'])
+
+
+def test_update_against_central(store, local_central):
+    assert store.update(local_central.client, FORM_ID) == 300
+    watermark = store.get_watermark(FORM_ID)
+    assert store.update(local_central.client, FORM_ID) == 0
+    assert store.get_watermark(FORM_ID) == watermark
+
+    per_submitter, overall = store.merged(FORM_ID)
+    exact = exact_stats(local_central)
+    stats = sketch_stats(per_submitter)
+    assert overall.rows == 300
+    assert stats['total_submissions'].to_dict() == exact['size'].to_dict()
+    assert (abs(stats['unique_plots'] - exact['nunique']) <= 2).all()
+
+    some = sorted(per_submitter)[:2]
+    assert set(store.merged(FORM_ID, submitters=some)[0]) == set(some)
+
+
+def test_interrupted_update_counts_nothing(store, local_central, monkeypatch):
+    monkeypatch.setattr(plot_sketches, 'SubmissionReader', partial(SubmissionReader, page_size=100))
+    iter_pages = SubmissionReader.iter_pages
+
+    def drop_after_two_pages(self, *args, **kwargs):
+        for i, page in enumerate(iter_pages(self, *args, **kwargs)):
+            if i == 2:
+                raise ConnectionError('connection reset')
+            yield page
+
+    monkeypatch.setattr(SubmissionReader, 'iter_pages', drop_after_two_pages)
+    with pytest.raises(ConnectionError):
+        # a flush per page, so the first pages are already staged when the connection drops
+        store.update(local_central.client, FORM_ID, flush_rows=100)
+    assert store.conn.execute('SELECT COUNT(*) FROM pending_sketches').fetchone()[0] > 0
+    assert store.merged(FORM_ID)[1].rows == 0
+    assert store.get_watermark(FORM_ID) is None
+
+    monkeypatch.undo()
+    assert store.update(local_central.client, FORM_ID) == 300
+    assert store.merged(FORM_ID)[1].rows == 300
+    assert store.conn.execute('SELECT COUNT(*) FROM pending_sketches').fetchone()[0] == 0
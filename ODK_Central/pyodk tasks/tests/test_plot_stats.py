@@ -0,0 +1,55 @@
+# test_plot_stats.py
+import pandas as pd
+
+from plot_stats import iter_submitter_tables, plot_counts_by_submitter, sheet_name_for, submitter_plot_stats
+
+
+def plot_frame():
+    return pd.DataFrame({
+        'submitter': pd.Categorical(['ann', 'ann', 'ann', 'bob', 'bob', None]),
+        'plot_id': pd.Categorical(['p1', 'p1', 'p2', 'p3', None, 'p4']),
+    })
+
+
+def test_counts_and_stats_per_submitter():
+    df = plot_frame()
+    counts = plot_counts_by_submitter(df)
+    assert counts.values.tolist() == [['ann', 'p1', 2], ['ann', 'p2', 1], ['bob', 'p3', 1]]
+
+    stats = submitter_plot_stats(df, counts)
+    assert stats.loc['ann', 'total_submissions'] == 3
+    assert stats.loc['ann', 'unique_plots'] == 2
+    assert stats.loc['ann', 'most_frequent_plot'] == 'p1'
+    assert stats.loc['ann', 'least_frequent_plot'] == 'p2'
+    assert stats.loc['bob', 'total_submissions'] == 2  # the row without a plot still counts as a submission
+    assert dict(iter_submitter_tables(counts))['bob'].values.tolist() == [['p3', 1]]
+
+
+def test_empty_frame_gives_no_tables():
+    df = plot_frame().iloc[:0]
+    counts = plot_counts_by_submitter(df)
+    assert counts.empty
+    assert submitter_plot_stats(df, counts).empty
+    assert list(iter_submitter_tables(counts)) == []
+
+
+def test_sheet_name_is_cleaned_and_truncated():
+    assert sheet_name_for('north/south\\east') == 'north_south_east'
+    assert sheet_name_for('x' * 60) == 'x' * 31
+    assert sheet_name_for('x' * 60, limit=50) == 'x' * 50
+
+
+def test_sheet_names_sharing_a_prefix_get_suffixes():
+    used = set()
+    names = []
+    for name in ['Enumerator ' + 'a' * 45 + ' one', 'Enumerator ' + 'a' * 45 + ' two', 'ENUMERATOR ' + 'A' * 45]:
+        names.append(sheet_name_for(name, used, limit=50))
+        used.add(names[-1].lower())
+    assert names[0] == ('Enumerator ' + 'a' * 45)[:50]
+    assert names[1] == ('Enumerator ' + 'a' * 45)[:46] + ' (2)'
+    assert names[2] == ('ENUMERATOR ' + 'A' * 45)[:46] + ' (3)'
+    assert all(len(name) <= 50 for name in names)
+
+
+def test_reserved_sheet_name_is_not_reused():
+    assert sheet_name_for('Update History', {'update history'}, limit=50) == 'Update History (2)'
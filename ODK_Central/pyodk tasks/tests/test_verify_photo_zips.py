@@ -0,0 +1,70 @@
+# test_verify_photo_zips.py
+import io
+import zipfile
+
+import pytest
+
+from verify_photo_zips import image_kind, inspect_image, verify_zip
+
+WAV = b'RIFF\x24\x00\x00\x00WAVEfmt ' + b'\x00' * 32
+AVI = b'RIFF\x24\x00\x00\x00AVI LIST' + b'\x00' * 32
+
+
+def heif(brand):
+    return b'\x00\x00\x00\x18ftyp' + brand + b'\x00\x00\x00\x00mif1heic' + b'\x00' * 32
+
+
+def test_image_kind_from_leading_bytes():
+    assert image_kind(b'\xff\xd8\xff\xe0' + b'\x00' * 16) == 'jpeg'
+    assert image_kind(b'\x89PNG\r\n\x1a\n' + b'\x00' * 16) == 'png'
+    assert image_kind(b'RIFF\x24\x00\x00\x00WEBPVP8 ' + b'\x00' * 16) == 'webp'
+    assert image_kind(heif(b'heic')) == 'heic'
+    assert image_kind(heif(b'heix')) == 'heic'
+    assert image_kind(heif(b'mif1')) == 'heic'
+
+
+def test_other_riff_and_iso_media_files_are_not_images():
+    assert image_kind(WAV) is None
+    assert image_kind(AVI) is None
+    assert image_kind(b'\x00\x00\x00\x18ftypisom' + b'\x00' * 16) is None  # MP4 video
+    assert image_kind(b'') is None
+
+
+def test_heic_is_checked_by_header_and_size_only():
+    image = inspect_image('IMG_0001.heic', heif(b'heic') + b'\x00' * 8192)
+    assert image['kind'] == 'heic'
+    assert image['problems'] == []
+
+
+def write_zip(path, files):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+def png_bytes():
+    Image = pytest.importorskip('PIL.Image')
+    buffer = io.BytesIO()
+    Image.effect_noise((96, 96), 64).convert('RGB').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def test_zip_counts_images_but_not_audio_notes(tmp_path):
+    path = write_zip(tmp_path / 'photos.zip', {'a.png': png_bytes(), 'b.png': png_bytes(), 'note.wav': WAV})
+    result = verify_zip(path, {'photoQuantity': '2'}, min_bytes=1)
+    assert result['images'] == 2
+    assert result['status'] == 'ok', result['problems']
+
+
+def test_zip_with_fewer_photos_than_reported(tmp_path):
+    path = write_zip(tmp_path / 'photos.zip', {'a.png': png_bytes()})
+    result = verify_zip(path, {'photoQuantity': 3}, min_bytes=1)
+    assert result['status'] == 'mismatch'
+    assert '1 image(s), photoQuantity says 3' in result['problems']
+
+
+def test_unreadable_zip_is_reported_corrupt(tmp_path):
+    path = tmp_path / 'photos.zip'
+    path.write_bytes(b'PK\x03\x04 not really a zip')
+    assert verify_zip(str(path))['status'] == 'corrupt'
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The task scripts share the modules kept next to the tracker (submission_reader, field_spec, warehouse, ...)
+TRACKER_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'With_Pygsheets',
+                                            'Automatic ODK Submissions Tracker+Email Notification'))
+
+
+def add_tracker_path():
+    """Makes the tracker's modules importable; call it before importing them."""
+    if TRACKER_DIR not in sys.path:
+        sys.path.append(TRACKER_DIR)
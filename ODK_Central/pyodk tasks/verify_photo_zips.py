@@ -0,0 +1,230 @@
+import io
+import os
+import zipfile
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from attachment_downloader import files_manifest
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SIGNATURES = {
+    b'\xff\xd8\xff': 'jpeg',
+    b'\x89PNG\r\n\x1a\n': 'png',
+}
+# RIFF is shared with WAV and AVI, so WEBP also needs its form type at offset 8
+RIFF_FORMS = {b'WEBP': 'webp'}
+# ISO media files carry 'ftyp' at offset 4 and their major brand at offset 8
+HEIF_BRANDS = (b'heic', b'heix', b'mif1')
+# Pillow cannot decode HEIC without a plugin, so those are only checked by header and size
+DECODABLE_KINDS = ('jpeg', 'png', 'webp')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.heic')
+MIN_IMAGE_BYTES = 4 * 1024
+DURATION_TOLERANCE = 0.25  # share of photoSessionDuration, and at least a minute
+EXIF_DATETIME_TAGS = (0x9003, 0x9004, 0x0132)  # DateTimeOriginal, DateTimeDigitized, DateTime
+DEFAULT_DIR = os.path.join(os.path.dirname(__file__), 'output_files', 'sample_photos')
+
+
+def _tiff_timestamp(tiff):
+    order = {b'II': 'little', b'MM': 'big'}.get(tiff[:2])
+    if order is None:
+        return None
+
+    def u16(offset):
+        return int.from_bytes(tiff[offset:offset + 2], order)
+
+    def u32(offset):
+        return int.from_bytes(tiff[offset:offset + 4], order)
+
+    def entries(offset):
+        for i in range(u16(offset)):
+            entry = offset + 2 + 12 * i
+            yield u16(entry), u32(entry + 4), entry + 8
+
+    def ascii_value(count, value_offset):
+        start = value_offset if count <= 4 else u32(value_offset)
+        return tiff[start:start + count].split(b'\x00')[0].decode('ascii', 'replace')
+
+    values, exif_ifd = {}, None
+    for tag, count, value_offset in entries(u32(4)):
+        if tag == 0x8769:
+            exif_ifd = u32(value_offset)
+        elif tag == 0x0132:
+            values[tag] = ascii_value(count, value_offset)
+    if exif_ifd:
+        for tag, count, value_offset in entries(exif_ifd):
+            if tag in (0x9003, 0x9004):
+                values[tag] = ascii_value(count, value_offset)
+
+    for tag in EXIF_DATETIME_TAGS:
+        if values.get(tag):
+            return datetime.strptime(values[tag].strip(), '%Y:%m:%d %H:%M:%S')
+    return None
+
+
+def exif_timestamp(data):
+    """When a JPEG was taken, from the EXIF APP1 segment; None without one."""
+    if data[:2] != b'\xff\xd8':
+        return None
+    pos = 2
+    try:
+        while pos + 4 <= len(data) and data[pos] == 0xFF:
+            marker = data[pos + 1]
+            if marker in (0xD9, 0xDA):
+                return None
+            length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+            if marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\x00\x00':
+                return _tiff_timestamp(data[pos + 10:pos + 2 + length])
+            pos += 2 + length
+    except (IndexError, ValueError):
+        return None
+    return None
+
+
+def image_kind(data):
+    """Image format from the leading bytes; None when they are not one of the photo formats."""
+    kind = next((kind for signature, kind in SIGNATURES.items() if data.startswith(signature)), None)
+    if kind is None and data[:4] == b'RIFF':
+        kind = RIFF_FORMS.get(data[8:12])
+    if kind is None and data[4:8] == b'ftyp' and data[8:12] in HEIF_BRANDS:
+        kind = 'heic'
+    return kind
+
+
+def inspect_image(name, data, min_bytes=MIN_IMAGE_BYTES):
+    """Format, problems and EXIF time of one image held in memory."""
+    kind = image_kind(data)
+    problems = []
+    if kind is None:
+        problems.append('unknown header')
+    if len(data) < min_bytes:
+        problems.append(f'only {len(data)} bytes')
+    if Image is not None and kind in DECODABLE_KINDS:
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.verify()
+        except Exception as e:
+            problems.append(f'not decodable ({e.__class__.__name__})')
+    elif kind == 'jpeg' and not data.rstrip(b'\x00').endswith(b'\xff\xd9'):
+        problems.append('truncated')
+    return {'name': name, 'kind': kind, 'problems': problems,
+            'taken_at': exif_timestamp(data) if kind == 'jpeg' else None}
+
+
+def _number(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def verify_zip(path, meta=None, min_bytes=MIN_IMAGE_BYTES, duration_tolerance=DURATION_TOLERANCE):
+    """Checks one photo zip in memory against its submission's photoQuantity and photoSessionDuration."""
+    meta = meta or {}
+    result = {
+        'filename': os.path.basename(path), 'instance_id': meta.get('instance_id'),
+        'submitter': meta.get('submitter'), 'plot_id': meta.get('plot_id'), 'today': meta.get('today'),
+        'expected_photos': _number(meta.get('photoQuantity')), 'images': 0, 'bad_images': 0,
+        'expected_duration': _number(meta.get('photoSessionDuration')), 'exif_span': None,
+        'problems': [],
+    }
+    stamps = []
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or '__MACOSX' in info.filename:
+                    continue
+                data = archive.read(info)  # also checks the CRC
+                if not info.filename.lower().endswith(IMAGE_EXTENSIONS) and image_kind(data) is None:
+                    continue
+                image = inspect_image(info.filename, data, min_bytes)
+                result['images'] += 1
+                if image['problems']:
+                    result['bad_images'] += 1
+                    result['problems'].append(f"{info.filename}: {', '.join(image['problems'])}")
+                if image['taken_at']:
+                    stamps.append(image['taken_at'])
+    except (zipfile.BadZipFile, OSError, EOFError) as e:
+        result['problems'].append(f"unreadable zip: {e}")
+        result['status'] = 'corrupt'
+        result['problems'] = '; '.join(result['problems'])
+        return result
+
+    if result['expected_photos'] is not None and result['images'] != result['expected_photos']:
+        result['problems'].append(f"{result['images']} image(s), photoQuantity says {result['expected_photos']}")
+    if len(stamps) > 1:
+        result['exif_span'] = int((max(stamps) - min(stamps)).total_seconds())
+        expected = result['expected_duration']
+        if expected is not None and abs(result['exif_span'] - expected) > max(60, expected * duration_tolerance):
+            result['problems'].append(f"photos span {result['exif_span']}s, "
+                                      f"photoSessionDuration says {expected}s")
+
+    result['status'] = 'mismatch' if result['problems'] else 'ok'
+    result['problems'] = '; '.join(result['problems'])
+    return result
+
+
+def zip_jobs(directory):
+    """(path, manifest meta) for every downloaded zip in the directory."""
+    manifest = files_manifest(directory)
+    jobs = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.zip'):
+            entry = manifest.get(name) or {}
+            jobs.append((os.path.join(directory, name), entry))
+    return jobs
+
+
+def verify_directory(directory, workers=None, min_bytes=MIN_IMAGE_BYTES, duration_tolerance=DURATION_TOLERANCE):
+    """Verifies every zip in the directory across a process pool; returns one row per zip."""
+    jobs = zip_jobs(directory)
+    if not jobs:
+        return pd.DataFrame()
+    workers = workers or os.cpu_count() or 1
+    paths, metas = zip(*jobs)
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(verify_zip, paths, metas, [min_bytes] * len(jobs),
+                                    [duration_tolerance] * len(jobs),
+                                    chunksize=max(1, len(jobs) // (workers * 8))))
+    else:
+        results = [verify_zip(path, meta, min_bytes, duration_tolerance) for path, meta in jobs]
+    return pd.DataFrame(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check downloaded photo zips against photoQuantity and photoSessionDuration.")
+    parser.add_argument('directory', nargs='?', default=DEFAULT_DIR, help="Folder written by the attachment downloader")
+    parser.add_argument('--workers', type=int, help="Processes to use (all cores by default)")
+    parser.add_argument('--min-bytes', type=int, default=MIN_IMAGE_BYTES, help="Smallest plausible photo size")
+    parser.add_argument('--duration-tolerance', type=float, default=DURATION_TOLERANCE)
+    parser.add_argument('--report', help="CSV report of mismatches (defaults to the directory)")
+    parser.add_argument('--all', action='store_true', help="Include zips that passed in the report")
+    args = parser.parse_args()
+
+    started = datetime.now()
+    results = verify_directory(args.directory, args.workers, args.min_bytes, args.duration_tolerance)
+    if results.empty:
+        print(f"No zip files found in {args.directory}")
+        return
+
+    report = results if args.all else results[results['status'] != 'ok']
+    report_path = args.report or os.path.join(args.directory, 'verification_report.csv')
+    report.to_csv(report_path, index=False)
+
+    seconds = (datetime.now() - started).total_seconds()
+    counts = results['status'].value_counts()
+    print(f"🔍 Verified {len(results)} zip(s), {int(results['images'].sum())} image(s) in {seconds:.1f}s"
+          f"{'' if Image is not None else ' (install Pillow to decode images)'}")
+    print(f"✅ {counts.get('ok', 0)} ok, ⚠️ {counts.get('mismatch', 0)} mismatched, ❌ {counts.get('corrupt', 0)} corrupt")
+    print(f"📝 Report saved to {report_path}")
+
+
+if __name__ == "__main__":
+    main()